@@ -2,6 +2,14 @@ from .base import *
 
 DEBUG = True
 
+# Pick up new frontend builds without running collectstatic
+WHITENOISE_USE_FINDERS = True
+WHITENOISE_AUTOREFRESH = True
+STORAGES = {
+    **STORAGES,
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
 # Development-specific settings can go here
 if not hasattr(globals(), 'SECURE_BROWSER_XSS_FILTER'):
     SECURE_BROWSER_XSS_FILTER = False
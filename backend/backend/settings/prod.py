@@ -2,6 +2,14 @@ from .base import *
 
 DEBUG = False
 
+# Serve the precompressed collectstatic output from WhiteNoise's startup index
+WHITENOISE_USE_FINDERS = False
+WHITENOISE_AUTOREFRESH = False
+STORAGES = {
+    **STORAGES,
+    'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+}
+
 # Production-specific security settings
 SECURE_BROWSER_XSS_FILTER = True
 SECURE_CONTENT_TYPE_NOSNIFF = False  # Disabled to allow proper MIME type handling for static files
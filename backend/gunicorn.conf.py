@@ -0,0 +1,113 @@
+"""
+Gunicorn configuration for production.
+
+Run from the backend directory with ``gunicorn -c gunicorn.conf.py``. Every
+option can be overridden through the environment:
+
+* ``SERVER_INTERFACE``: ``wsgi`` (default, threaded gthread workers) or
+  ``asgi`` (uvicorn workers running the native async views).
+* ``WEB_CONCURRENCY``: worker processes, by default ``2 * cores + 1``, where
+  cores honours both CPU affinity and a cgroup (container) CPU quota.
+* ``GUNICORN_THREADS``: threads per WSGI worker.
+* ``GUNICORN_PRELOAD``: import the app in the master before forking, so
+  workers share its memory copy-on-write.
+* ``GUNICORN_MAX_REQUESTS`` / ``GUNICORN_MAX_REQUESTS_JITTER``: recycle workers
+  after that many requests to bound memory growth, staggered so they do not
+  all restart at once.
+* ``GUNICORN_TIMEOUT`` / ``GUNICORN_GRACEFUL_TIMEOUT`` / ``GUNICORN_KEEPALIVE``.
+* ``PRESTART``: before loading the app, collect static files and apply
+  migrations in the master process, skipping unchanged steps (see
+  ``stats.startup``).
+"""
+
+import math
+import os
+import time
+
+boot_started = time.perf_counter()
+
+
+def cgroup_cpu_limit():
+    """CPUs allowed by the cgroup CPU quota (v2 ``cpu.max``, else v1 CFS files), or None when unlimited."""
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()[:2]
+    except (OSError, ValueError):
+        try:
+            with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as f:
+                quota = f.read().strip()
+            with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as f:
+                period = f.read().strip()
+        except OSError:
+            return None
+    if quota in ('max', '-1'):
+        return None
+    try:
+        return max(math.ceil(int(quota) / int(period)), 1)
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+def available_cores():
+    """CPU cores this process may use: its CPU affinity, capped by a container's cgroup CPU quota."""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    limit = cgroup_cpu_limit()
+    return min(cores, limit) if limit else cores
+
+
+interface = os.environ.get('SERVER_INTERFACE', 'wsgi').lower()
+if interface not in ('wsgi', 'asgi'):
+    raise ValueError(f"SERVER_INTERFACE must be 'wsgi' or 'asgi', not {interface!r}")
+settings_package = os.environ.get('DJANGO_PROJECT', 'overwatch_api')
+
+wsgi_app = f'{settings_package}.{interface}:application'
+worker_class = 'gthread' if interface == 'wsgi' else 'uvicorn.workers.UvicornWorker'
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2 * available_cores() + 1))
+# Each comparison blocks on OverFast I/O, so a WSGI worker serves several at once; uvicorn ignores this
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True').lower() == 'true'
+
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', '100'))
+# Longer than OVERFAST_FETCH_DEADLINE, so slow upstream fetches are not killed mid-request
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', '5'))
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+forwarded_allow_ips = '*'
+
+
+def on_starting(server):
+    if os.environ.get('PRESTART', 'True').lower() != 'true':
+        return
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', f'{settings_package}.settings')
+    django.setup()
+    from stats.startup import prepare
+
+    try:
+        prepare(log=server.log.info)
+    except Exception:
+        # Like the old start scripts, a failed step is reported but does not keep the server down
+        server.log.exception("Pre-start failed, starting anyway")
+
+
+def when_ready(server):
+    server.log.info(f"Ready {(time.perf_counter() - boot_started) * 1000:.0f} ms after boot")
+
+
+def post_fork(server, worker):
+    if not server.cfg.preload_app:
+        return
+    # Connections opened while preloading belong to the master; each worker opens its own
+    from django.db import connections
+
+    connections.close_all()
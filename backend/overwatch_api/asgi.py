@@ -13,4 +13,13 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'overwatch_api.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from stats.async_upstream import with_client_lifespan  # noqa: E402
+from stats.spa import preload_spa_shell  # noqa: E402
+
+# Close the shared OverFast client when the server shuts the worker down
+application = with_client_lifespan(django_application)
+
+# Render the React shell before the first request (and before workers fork)
+preload_spa_shell()
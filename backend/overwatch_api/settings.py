@@ -14,6 +14,8 @@ from pathlib import Path
 import os
 from urllib.parse import urlparse
 
+from corsheaders.defaults import default_headers
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -48,6 +50,7 @@ MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'stats.middleware.APICompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -63,6 +66,17 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 CORS_ALLOW_CREDENTIALS = True
+# Let the frontend revalidate cached comparisons with If-None-Match
+CORS_ALLOW_HEADERS = (*default_headers, 'if-none-match')
+CORS_EXPOSE_HEADERS = ['ETag']
+
+# API responses are encoded with orjson (stdlib json if it is not installed)
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'stats.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
 
 ROOT_URLCONF = 'overwatch_api.urls'
 
@@ -117,6 +131,15 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# Production collectstatic writes hashed, gzip/brotli-precompressed copies of the React build
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+        else 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
 # Template configuration for serving React frontend
 TEMPLATES = [
     {
@@ -167,8 +190,14 @@ if not DEBUG:
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # WhiteNoise configuration for serving static files
-WHITENOISE_USE_FINDERS = True
-WHITENOISE_AUTOREFRESH = True
+# Finders and autorefresh re-scan files on every request; production serves the
+# collectstatic output (hashed and precompressed) from a precomputed index instead
+WHITENOISE_USE_FINDERS = DEBUG
+WHITENOISE_AUTOREFRESH = DEBUG
+# Hashed names (CRA's build hashes and the manifest's) get far-future immutable caching
+WHITENOISE_IMMUTABLE_FILE_TEST = r'^.+\.[0-9a-f]{8,12}\.'
+# index.html references CRA's own file names, which are not in the manifest
+WHITENOISE_MANIFEST_STRICT = False
 
 # Configure MIME types for WhiteNoise
 WHITENOISE_MIMETYPES = {
@@ -179,3 +208,56 @@ WHITENOISE_MIMETYPES = {
     '.ico': 'image/x-icon',
     '.svg': 'image/svg+xml',
 }
+
+# OverFast upstream API configuration
+OVERFAST_FETCH_WORKERS = int(os.environ.get('OVERFAST_FETCH_WORKERS', '8'))
+OVERFAST_FETCH_DEADLINE = float(os.environ.get('OVERFAST_FETCH_DEADLINE', '30'))
+OVERFAST_BATCH_MAX_JOBS = int(os.environ.get('OVERFAST_BATCH_MAX_JOBS', '50'))
+OVERFAST_TOP_K_MAX = int(os.environ.get('OVERFAST_TOP_K_MAX', '50'))
+OVERFAST_BASE_URL = os.environ.get('OVERFAST_BASE_URL', 'https://overfast-api.tekrop.fr')
+OVERFAST_POOL_SIZE = int(os.environ.get('OVERFAST_POOL_SIZE', '10'))
+OVERFAST_ASYNC_POOL_SIZE = int(os.environ.get('OVERFAST_ASYNC_POOL_SIZE', '100'))
+OVERFAST_CONNECT_TIMEOUT = float(os.environ.get('OVERFAST_CONNECT_TIMEOUT', '5'))
+OVERFAST_READ_TIMEOUT = float(os.environ.get('OVERFAST_READ_TIMEOUT', '30'))
+OVERFAST_MAX_RETRIES = int(os.environ.get('OVERFAST_MAX_RETRIES', '2'))
+OVERFAST_RETRY_BACKOFF = float(os.environ.get('OVERFAST_RETRY_BACKOFF', '0.3'))
+OVERFAST_RETRY_JITTER = float(os.environ.get('OVERFAST_RETRY_JITTER', '0.3'))
+# Outbound token bucket (per worker); a 429, or a 5xx with Retry-After, pauses it for Retry-After (or the default) seconds
+OVERFAST_RATE_LIMIT = float(os.environ.get('OVERFAST_RATE_LIMIT', '10'))
+OVERFAST_RATE_LIMIT_BURST = int(os.environ.get('OVERFAST_RATE_LIMIT_BURST', '20'))
+OVERFAST_RATE_LIMIT_MAX_WAIT = float(os.environ.get('OVERFAST_RATE_LIMIT_MAX_WAIT', '2'))
+OVERFAST_RATE_LIMIT_DEFAULT_RETRY_AFTER = float(os.environ.get('OVERFAST_RATE_LIMIT_DEFAULT_RETRY_AFTER', '5'))
+# Stop calling OverFast after this many consecutive failures, and retry after the recovery timeout
+OVERFAST_BREAKER_FAILURE_THRESHOLD = int(os.environ.get('OVERFAST_BREAKER_FAILURE_THRESHOLD', '5'))
+OVERFAST_BREAKER_RECOVERY_TIMEOUT = float(os.environ.get('OVERFAST_BREAKER_RECOVERY_TIMEOUT', '30'))
+
+# Player-stats cache: 'memory' (per-worker LRU) or 'django' (uses OVERFAST_CACHE_ALIAS)
+OVERFAST_CACHE_BACKEND = os.environ.get('OVERFAST_CACHE_BACKEND', 'memory')
+OVERFAST_CACHE_ALIAS = os.environ.get('OVERFAST_CACHE_ALIAS', 'default')
+OVERFAST_CACHE_TTL = int(os.environ.get('OVERFAST_CACHE_TTL', '300'))
+OVERFAST_CACHE_MAX_ENTRIES = int(os.environ.get('OVERFAST_CACHE_MAX_ENTRIES', '1024'))
+OVERFAST_CACHE_MAX_BYTES = int(os.environ.get('OVERFAST_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+# Serve expired stats while refreshing in the background, and longer if OverFast is down
+OVERFAST_CACHE_STALE_GRACE = int(os.environ.get('OVERFAST_CACHE_STALE_GRACE', '600'))
+OVERFAST_CACHE_STALE_IF_ERROR = int(os.environ.get('OVERFAST_CACHE_STALE_IF_ERROR', '86400'))
+
+# Persist fetched payloads so restarted workers can serve them before hitting OverFast
+OVERFAST_SNAPSHOTS_ENABLED = os.environ.get('OVERFAST_SNAPSHOTS_ENABLED', 'True').lower() == 'true'
+OVERFAST_SNAPSHOT_RETENTION_DAYS = int(os.environ.get('OVERFAST_SNAPSHOT_RETENTION_DAYS', '30'))
+
+# Computed comparison results, addressed by ETag
+OVERFAST_RESULT_CACHE_TTL = int(os.environ.get('OVERFAST_RESULT_CACHE_TTL', '300'))
+OVERFAST_RESULT_CACHE_MAX_ENTRIES = int(os.environ.get('OVERFAST_RESULT_CACHE_MAX_ENTRIES', '512'))
+OVERFAST_RESULT_CACHE_MAX_BYTES = int(os.environ.get('OVERFAST_RESULT_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+
+# Population distributions (per hero/stat/gamemode/platform quantile sketches) fed from new snapshots
+OVERFAST_POPULATION_ENABLED = os.environ.get('OVERFAST_POPULATION_ENABLED', 'True').lower() == 'true'
+OVERFAST_POPULATION_MIN_SAMPLES = int(os.environ.get('OVERFAST_POPULATION_MIN_SAMPLES', '30'))
+OVERFAST_POPULATION_FLUSH_SAMPLES = int(os.environ.get('OVERFAST_POPULATION_FLUSH_SAMPLES', '2000'))
+OVERFAST_POPULATION_FLUSH_INTERVAL = int(os.environ.get('OVERFAST_POPULATION_FLUSH_INTERVAL', '60'))
+OVERFAST_POPULATION_REFRESH = int(os.environ.get('OVERFAST_POPULATION_REFRESH', '300'))
+
+# Compression of /api/ JSON responses (brotli when installed, else gzip)
+OVERFAST_COMPRESS_MIN_SIZE = int(os.environ.get('OVERFAST_COMPRESS_MIN_SIZE', '512'))
+OVERFAST_BROTLI_QUALITY = int(os.environ.get('OVERFAST_BROTLI_QUALITY', '4'))
+OVERFAST_GZIP_LEVEL = int(os.environ.get('OVERFAST_GZIP_LEVEL', '6'))
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'overwatch_api.settings')
 
 application = get_wsgi_application()
+
+# Render the React shell before the first request (and before workers fork)
+from stats.spa import preload_spa_shell  # noqa: E402
+
+preload_spa_shell()
@@ -1,3 +1,29 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import PlayerStatsSnapshot, StatDistribution, StatMoments
+
+
+@admin.register(PlayerStatsSnapshot)
+class PlayerStatsSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('battletag', 'gamemode', 'platform', 'fetched_at', 'payload_size')
+    list_filter = ('gamemode', 'platform')
+    search_fields = ('battletag',)
+    exclude = ('payload',)
+    readonly_fields = ('battletag', 'gamemode', 'platform', 'fetched_at', 'payload_hash', 'payload_size', 'recorded')
+
+
+@admin.register(StatDistribution)
+class StatDistributionAdmin(admin.ModelAdmin):
+    list_display = ('hero', 'stat_key', 'gamemode', 'platform', 'sample_count', 'updated_at')
+    list_filter = ('gamemode', 'platform', 'hero')
+    search_fields = ('hero', 'stat_key')
+    exclude = ('sketch',)
+    readonly_fields = ('hero', 'stat_key', 'gamemode', 'platform', 'sample_count', 'quantiles', 'updated_at')
+
+
+@admin.register(StatMoments)
+class StatMomentsAdmin(admin.ModelAdmin):
+    list_display = ('hero', 'stat_key', 'gamemode', 'platform', 'count', 'mean', 'updated_at')
+    list_filter = ('gamemode', 'platform', 'hero')
+    search_fields = ('hero', 'stat_key')
+    readonly_fields = ('hero', 'stat_key', 'gamemode', 'platform', 'count', 'mean', 'm2', 'updated_at')
@@ -0,0 +1,136 @@
+"""
+Async player-stats lookups for the ASGI views.
+
+Mirrors ``lookup_player_stats`` in ``stats.overwatch_service``: the same cache,
+stale-while-revalidate rules and DB snapshots, but the OverFast round trip is
+awaited on the event loop instead of blocking a worker thread. Cache and
+database work is delegated to the sync helpers through ``sync_to_async``.
+"""
+
+import asyncio
+import weakref
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from . import async_upstream
+from .cache import FRESH, STALE, get_stats_cache, make_stats_key
+from .overwatch_service import (
+    MISSING,
+    PlayerStatsLookup,
+    _load_recent_snapshot,
+    _lookup_from_entry,
+    _stale_fallback,
+    _store_fetched_stats,
+)
+from .resilience import UpstreamUnavailable
+from .utils import format_battletag
+
+
+class AsyncSingleFlight:
+    """Coalesce concurrent coroutine calls for the same key within an event loop."""
+
+    def __init__(self):
+        self._calls = weakref.WeakKeyDictionary()
+
+    async def do(self, key, fn, *args, **kwargs):
+        calls = self._calls.setdefault(asyncio.get_running_loop(), {})
+        future = calls.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = calls[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await fn(*args, **kwargs)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Mark the exception as retrieved when there are no waiters.
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del calls[key]
+
+
+_player_stats_flight = AsyncSingleFlight()
+_background_tasks = set()
+
+
+async def afetch_player_stats(battletag, gamemode='quickplay', platform='pc'):
+    """Fetch and return the player stats from OverFast, or None on failure."""
+    formatted_tag = format_battletag(battletag)
+    try:
+        response = await async_upstream.get(
+            f"players/{formatted_tag}/stats",
+            params={'gamemode': gamemode, 'platform': platform},
+        )
+        if response.status_code != 200:
+            return None
+        return response.json()
+    except (httpx.HTTPError, UpstreamUnavailable, ValueError):
+        return None
+
+
+async def _aload_player_stats(key, battletag, gamemode, platform, use_snapshots=True):
+    if use_snapshots:
+        lookup = await sync_to_async(_load_recent_snapshot)(key, battletag, gamemode, platform)
+        if lookup is not None:
+            return lookup
+    stats = await afetch_player_stats(battletag, gamemode, platform)
+    return await sync_to_async(_store_fetched_stats)(key, battletag, gamemode, platform, stats)
+
+
+def _schedule_refresh(key, battletag, gamemode, platform):
+    task = asyncio.create_task(
+        _player_stats_flight.do(key, _aload_player_stats, key, battletag, gamemode, platform, use_snapshots=False)
+    )
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def alookup_player_stats(battletag, gamemode='quickplay', platform='pc'):
+    """Async version of ``lookup_player_stats`` returning a PlayerStatsLookup."""
+    cache = get_stats_cache()
+    key = make_stats_key(battletag, gamemode, platform)
+    entry, state = await sync_to_async(cache.get_entry, thread_sensitive=False)(key)
+    if state == FRESH:
+        return _lookup_from_entry(cache, entry, FRESH)
+    if state == STALE:
+        _schedule_refresh(key, battletag, gamemode, platform)
+        return _lookup_from_entry(cache, entry, STALE)
+
+    lookup = await _player_stats_flight.do(key, _aload_player_stats, key, battletag, gamemode, platform)
+    if lookup.stats is not None:
+        return lookup
+    return await sync_to_async(_stale_fallback)(cache, entry, battletag, gamemode, platform)
+
+
+async def alookup_many_player_stats(battletags, gamemode='quickplay', platform='pc', deadline=None):
+    """Look up several players concurrently under one shared deadline.
+
+    Returns a dict mapping each distinct battletag to a PlayerStatsLookup; players
+    that fail or miss the deadline map to a ``'missing'`` lookup.
+    """
+    if deadline is None:
+        deadline = getattr(settings, 'OVERFAST_FETCH_DEADLINE', 30)
+
+    tasks = {
+        tag: asyncio.ensure_future(alookup_player_stats(tag, gamemode, platform))
+        for tag in dict.fromkeys(battletags)
+    }
+    await asyncio.wait(tasks.values(), timeout=deadline)
+
+    results = {}
+    for tag, task in tasks.items():
+        if task.done() and not task.cancelled() and task.exception() is None:
+            results[tag] = task.result()
+        else:
+            task.cancel()
+            results[tag] = PlayerStatsLookup(None, MISSING)
+    return results
@@ -0,0 +1,113 @@
+"""
+Async HTTP client for the OverFast API.
+
+The async counterpart of ``stats.upstream``: one pooled keep-alive
+``httpx.AsyncClient`` per event loop, with the same base URL, timeouts and
+jittered retry policy taken from Django settings. Under an ASGI server there is
+a single loop per worker, so all async views share one connection pool, closed
+on lifespan shutdown by ``with_client_lifespan``. Under WSGI every async view
+runs on its own short-lived loop, so the views close that loop's client when the
+request ends. Calls share the sync client's rate limiter and circuit breaker.
+"""
+
+import asyncio
+import weakref
+
+import httpx
+
+from .resilience import UpstreamUnavailable
+from .upstream import (
+    build_url,
+    ensure_available,
+    get_circuit_breaker,
+    get_rate_limiter,
+    get_setting,
+    record_response,
+    retry_delay,
+    should_retry,
+    start_call,
+)
+
+_clients = weakref.WeakKeyDictionary()
+
+
+def build_client():
+    """Create a new pooled async client configured from settings."""
+    pool_size = get_setting('OVERFAST_ASYNC_POOL_SIZE', 100)
+    return httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        timeout=httpx.Timeout(
+            get_setting('OVERFAST_READ_TIMEOUT', 30),
+            connect=get_setting('OVERFAST_CONNECT_TIMEOUT', 5),
+        ),
+        headers={'Accept': 'application/json'},
+    )
+
+
+def get_client():
+    """Return the shared client for the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = _clients[loop] = build_client()
+    return client
+
+
+async def close_client():
+    """Close the running loop's client, e.g. on ASGI lifespan shutdown."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def with_client_lifespan(application):
+    """Wrap an ASGI application so the worker's client is closed on lifespan shutdown.
+
+    Django's ASGI handler only speaks HTTP, so lifespan events are answered here.
+    """
+    async def app(scope, receive, send):
+        if scope['type'] != 'lifespan':
+            return await application(scope, receive, send)
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await close_client()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    return app
+
+
+async def get(path, params=None):
+    """Issue a GET request against the OverFast API, retrying 5xx and connection errors.
+
+    Like ``upstream.get``, every attempt goes through the rate limiter and the
+    breaker, and UpstreamUnavailable is raised under the same conditions.
+    """
+    retries = get_setting('OVERFAST_MAX_RETRIES', 2)
+    for attempt in range(retries + 1):
+        response = None
+        try:
+            response = await _guarded_get(path, params)
+        except httpx.TransportError:
+            if attempt == retries:
+                raise
+        else:
+            if not should_retry(response, attempt, retries):
+                return response
+        await asyncio.sleep(retry_delay(response, attempt))
+
+
+async def _guarded_get(path, params):
+    ensure_available()
+    if not await get_rate_limiter().aacquire(get_setting('OVERFAST_RATE_LIMIT_MAX_WAIT', 2)):
+        raise UpstreamUnavailable("OverFast rate limit reached")
+    start_call()
+    try:
+        response = await get_client().get(build_url(path), params=params)
+    except Exception:
+        get_circuit_breaker().record_failure()
+        raise
+    record_response(response)
+    return response
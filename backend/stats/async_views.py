@@ -0,0 +1,120 @@
+"""
+Native async API views for the ASGI entry point.
+
+These mirror the DRF views in ``stats.views`` but await OverFast through the
+async client, so a single ASGI worker can keep many comparisons in flight while
+waiting on upstream I/O. Validation and the comparisons themselves go through
+the same plans (``plan_comparison``, ``plan_summary``, ``plan_batch``) as the
+sync views, so both accept the same options.
+"""
+
+import functools
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponseNotModified, JsonResponse
+
+from . import async_upstream
+from .async_service import alookup_many_player_stats
+from .renderers import dumps, json_response
+from .results import etag_matches, get_cached_result, store_result
+from .views import get_hero_choices, plan_batch, plan_comparison, plan_summary, tag_response
+
+
+def async_api_view(methods):
+    """Restrict an async view to the given methods and exempt it from CSRF like DRF views.
+
+    Outside ASGI each request runs on its own short-lived event loop, so the
+    loop's OverFast client is closed when the view returns.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return JsonResponse(
+                    {"detail": f'Method "{request.method}" not allowed.'},
+                    status=405,
+                    headers={'Allow': ', '.join(methods)},
+                )
+            try:
+                return await view(request, *args, **kwargs)
+            except Exception as e:
+                return JsonResponse({"error": f"Internal server error: {str(e)}"}, status=500)
+            finally:
+                if not isinstance(request, ASGIRequest):
+                    await async_upstream.close_client()
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
+
+
+def parse_json_body(request):
+    """Return the decoded JSON body of a request, or None if it is not valid JSON."""
+    try:
+        data = json.loads(request.body or b'{}')
+    except (TypeError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+async def _run_comparison(request, planner):
+    """Async version of ``views.run_comparison``."""
+    data = parse_json_body(request)
+    if data is None:
+        return JsonResponse({"error": "Request body must be a JSON object"}, status=400)
+    plan, error = planner(data, request.GET)
+    if error:
+        return JsonResponse({"error": error}, status=400)
+
+    lookups = await alookup_many_player_stats(plan.battletags, plan.gamemode, plan.platform)
+    error = plan.missing_player(lookups)
+    if error:
+        return JsonResponse({"error": error}, status=404)
+
+    # The ETag includes the population version, which may hit the database
+    etag = await sync_to_async(plan.etag)(lookups)
+    if etag_matches(request, etag):
+        return tag_response(HttpResponseNotModified(), etag)
+    cached = get_cached_result(etag)
+    if cached is not None:
+        return tag_response(json_response(cached), etag)
+
+    # Population lookups may hit the database too, so the comparison runs off the event loop
+    comparison_result = await sync_to_async(plan.run)(lookups)
+    if "error" in comparison_result:
+        return JsonResponse(comparison_result, status=404)
+    return tag_response(json_response(store_result(etag, comparison_result)), etag)
+
+
+@async_api_view(['GET'])
+async def get_heroes(request):
+    """Return list of all available heroes."""
+    return JsonResponse(get_hero_choices(), safe=False)
+
+
+@async_api_view(['POST'])
+async def compare_players(request):
+    """Compare two players' stats for a specific hero, or for every hero with hero="all"."""
+    return await _run_comparison(request, plan_comparison)
+
+
+@async_api_view(['POST'])
+async def get_enhanced_summary(request):
+    """Get only the enhanced analysis summary without detailed stat breakdown."""
+    return await _run_comparison(request, plan_summary)
+
+
+@async_api_view(['POST'])
+async def compare_players_batch(request):
+    """Compare many (player1, player2, hero) jobs, fetching each distinct player once."""
+    data = parse_json_body(request)
+    if data is None:
+        return JsonResponse({"error": "Request body must be a JSON object"}, status=400)
+    plan, error = plan_batch(data, request.GET)
+    if error:
+        return JsonResponse({"error": error}, status=400)
+
+    battletags = plan.battletags
+    lookups = await alookup_many_player_stats(battletags, plan.gamemode, plan.platform) if battletags else {}
+    return json_response(dumps(await sync_to_async(plan.run)(lookups)))
@@ -0,0 +1,276 @@
+"""
+Caching layer for OverFast player stats.
+
+Entries are keyed by the normalized (battletag, gamemode, platform) triple and
+expire after a configurable TTL. The default in-process backend evicts least
+recently used entries once it exceeds either its entry or byte budget; a Django
+cache backend can be selected instead to share entries between workers.
+
+Expired entries are kept around for a while so callers can apply a
+stale-while-revalidate policy: within ``stale_grace`` seconds of expiry an entry
+is reported as STALE (serve it and refresh in the background), and up to
+``stale_if_error`` seconds it is reported as EXPIRED (serve it only if upstream
+cannot be reached).
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .utils import format_battletag
+
+
+FRESH = 'fresh'
+STALE = 'stale'
+EXPIRED = 'expired'
+
+
+def make_stats_key(battletag, gamemode='quickplay', platform='pc'):
+    """Build the normalized cache key for a player's stats."""
+    return (
+        format_battletag(battletag.strip()),
+        (gamemode or 'quickplay').strip().lower(),
+        (platform or 'pc').strip().lower(),
+    )
+
+
+def approximate_size(value):
+    """Approximate the memory footprint of a JSON payload (or already-encoded bytes) by its encoded length."""
+    if hasattr(value, 'approximate_size'):
+        return value.approximate_size()
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    return len(json.dumps(value, separators=(',', ':')))
+
+
+class CacheEntry:
+    __slots__ = ('value', 'stored_at', 'expires_at', 'size')
+
+    def __init__(self, value, stored_at, expires_at, size):
+        self.value = value
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+        self.size = size
+
+
+class BaseStatsCache:
+    """Shared freshness rules and hit/miss accounting for cache backends."""
+
+    def __init__(self, ttl, stale_grace=0, stale_if_error=0):
+        self.ttl = ttl
+        self.stale_grace = stale_grace
+        self.stale_if_error = max(stale_if_error, stale_grace)
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._counter_lock = threading.Lock()
+
+    def _record(self, hit, stale=False):
+        with self._counter_lock:
+            if stale:
+                self.stale_hits += 1
+            elif hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _state(self, entry, now):
+        """Classify an entry as FRESH, STALE, EXPIRED or unusable (None)."""
+        overdue = now - entry.expires_at
+        if overdue < 0:
+            return FRESH
+        if overdue < self.stale_grace:
+            return STALE
+        if overdue < self.stale_if_error:
+            return EXPIRED
+        return None
+
+    def get(self, key):
+        """Return the cached value if it is still fresh, otherwise None."""
+        entry, state = self.get_entry(key)
+        return entry.value if state == FRESH else None
+
+    def stats(self):
+        """Return hit/miss counters for monitoring."""
+        total = self.hits + self.stale_hits + self.misses
+        return {
+            'backend': self.name,
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'hit_ratio': round((self.hits + self.stale_hits) / total, 4) if total else 0.0,
+        }
+
+
+class MemoryStatsCache(BaseStatsCache):
+    """Thread-safe in-process TTL cache with LRU eviction by count and size."""
+
+    name = 'memory'
+
+    def __init__(self, ttl=300, max_entries=1024, max_bytes=64 * 1024 * 1024,
+                 stale_grace=0, stale_if_error=0, clock=time.monotonic):
+        super().__init__(ttl, stale_grace, stale_if_error)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.evictions = 0
+        self.expirations = 0
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_entry(self, key):
+        """Return ``(entry, state)`` for a key, or ``(None, None)`` on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            state = None
+            if entry is not None:
+                state = self._state(entry, self.clock())
+                if state is None:
+                    self._remove(key)
+                    self.expirations += 1
+                    entry = None
+                else:
+                    self._entries.move_to_end(key)
+        self._record(state == FRESH, stale=state == STALE)
+        return entry, state
+
+    def set(self, key, value, ttl=None):
+        size = approximate_size(value)
+        if size > self.max_bytes:
+            return
+        now = self.clock()
+        entry = CacheEntry(value, now, now + (self.ttl if ttl is None else ttl), size)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self.current_bytes += size
+            while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self.current_bytes -= entry.size
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        data = super().stats()
+        data.update({
+            'entries': len(self._entries),
+            'bytes': self.current_bytes,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        })
+        return data
+
+
+class DjangoStatsCache(BaseStatsCache):
+    """Player-stats cache backed by one of the configured Django caches."""
+
+    name = 'django'
+
+    def __init__(self, alias='default', ttl=300, stale_grace=0, stale_if_error=0,
+                 key_prefix='overfast-stats', clock=time.time):
+        super().__init__(ttl, stale_grace, stale_if_error)
+        self.clock = clock
+        self.alias = alias
+        self.key_prefix = key_prefix
+
+    @property
+    def backend(self):
+        return caches[self.alias]
+
+    def _make_key(self, key):
+        return ':'.join((self.key_prefix,) + tuple(key))
+
+    def get_entry(self, key):
+        """Return ``(entry, state)`` for a key, or ``(None, None)`` on a miss."""
+        stored = self.backend.get(self._make_key(key))
+        entry = state = None
+        if stored is not None:
+            value, stored_at, expires_at = stored
+            entry = CacheEntry(value, stored_at, expires_at, 0)
+            state = self._state(entry, self.clock())
+            if state is None:
+                entry = None
+        self._record(state == FRESH, stale=state == STALE)
+        return entry, state
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        now = self.clock()
+        self.backend.set(
+            self._make_key(key),
+            (value, now, now + ttl),
+            timeout=ttl + self.stale_if_error,
+        )
+
+    def delete(self, key):
+        self.backend.delete(self._make_key(key))
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        data = super().stats()
+        data['alias'] = self.alias
+        return data
+
+
+_stats_cache = None
+_stats_cache_lock = threading.Lock()
+
+
+def build_stats_cache():
+    """Create the player-stats cache described by the OVERFAST_CACHE_* settings."""
+    options = {
+        'ttl': getattr(settings, 'OVERFAST_CACHE_TTL', 300),
+        'stale_grace': getattr(settings, 'OVERFAST_CACHE_STALE_GRACE', 0),
+        'stale_if_error': getattr(settings, 'OVERFAST_CACHE_STALE_IF_ERROR', 0),
+    }
+    backend = getattr(settings, 'OVERFAST_CACHE_BACKEND', 'memory')
+    if backend == 'django':
+        return DjangoStatsCache(alias=getattr(settings, 'OVERFAST_CACHE_ALIAS', 'default'), **options)
+    if backend != 'memory':
+        raise ValueError(f"Unknown OVERFAST_CACHE_BACKEND: {backend}")
+    return MemoryStatsCache(
+        **options,
+        max_entries=getattr(settings, 'OVERFAST_CACHE_MAX_ENTRIES', 1024),
+        max_bytes=getattr(settings, 'OVERFAST_CACHE_MAX_BYTES', 64 * 1024 * 1024),
+    )
+
+
+def get_stats_cache():
+    """Return the process-wide player-stats cache."""
+    global _stats_cache
+    if _stats_cache is None:
+        with _stats_cache_lock:
+            if _stats_cache is None:
+                _stats_cache = build_stats_cache()
+    return _stats_cache
+
+
+def reset_stats_cache():
+    """Discard the process-wide cache so it is rebuilt from current settings."""
+    global _stats_cache
+    with _stats_cache_lock:
+        _stats_cache = None
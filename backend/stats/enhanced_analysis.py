@@ -9,8 +9,10 @@ import requests
 import json
 import statistics
 from enum import Enum
-from dataclasses import dataclass
-from typing import Dict, List, Optional, Union, Tuple
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Union, Tuple
+
+from .registry import intern_stat_key
 
 # Enhanced stat categorization with weights and types
 @dataclass
@@ -20,6 +22,10 @@ class StatDefinition:
     weight: float  # Importance weight (0-1)
     stat_type: str  # 'higher_better', 'lower_better', 'neutral'
     format_type: str  # 'number', 'percentage', 'time', 'ratio'
+    stat_id: int = field(init=False, repr=False, compare=False)  # Id in the shared stat registry
+
+    def __post_init__(self):
+        self.stat_id = intern_stat_key(self.key)
 
 # Stat definitions with weights and importance
 STAT_DEFINITIONS = {
@@ -43,11 +49,27 @@ STAT_DEFINITIONS = {
     'time_played': StatDefinition('time_played', 'general', 0.3, 'neutral', 'time'),
 }
 
+# Stats that drive role effectiveness for each hero role
+ROLE_STATS = {
+    'tank': ['damage_blocked', 'damage_dealt', 'eliminations', 'objective_time'],
+    'damage': ['eliminations', 'damage_dealt', 'weapon_accuracy', 'objective_kills'],
+    'support': ['healing_done', 'eliminations', 'deaths', 'weapon_accuracy']
+}
+
+# Stat categories compared by the performance pattern analysis
+PATTERN_CATEGORIES = ['combat', 'accuracy', 'objective', 'support', 'tank']
+
 class EnhancedOverwatchService:
     
     @staticmethod
-    def calculate_weighted_score(stats: Dict, stat_definitions: Dict[str, StatDefinition]) -> float:
-        """Calculate a weighted performance score based on stat importance."""
+    def calculate_weighted_score(stats: Dict, stat_definitions: Dict[str, StatDefinition],
+                                 normalizer: Optional[Callable[[str, float], Optional[float]]] = None) -> float:
+        """Calculate a weighted performance score based on stat importance.
+
+        ``normalizer(stat_key, value)`` may map a value onto a 0-1 scale (e.g. its
+        population z-score through the normal CDF); stats it returns None for use
+        the fixed scaling.
+        """
         total_score = 0
         total_weight = 0
         
@@ -55,8 +77,10 @@ class EnhancedOverwatchService:
             if stat_key in stat_definitions and isinstance(value, (int, float)):
                 stat_def = stat_definitions[stat_key]
                 
-                # Normalize value to 0-1 scale (simplified)
-                normalized_value = min(value / 1000, 1.0)  # Adjust scaling as needed
+                # Normalize value to 0-1 scale
+                normalized_value = normalizer(stat_key, value) if normalizer else None
+                if normalized_value is None:
+                    normalized_value = min(value / 1000, 1.0)  # Fallback without population data
                 
                 # Apply direction (higher_better vs lower_better)
                 if stat_def.stat_type == 'lower_better':
@@ -85,6 +109,18 @@ class EnhancedOverwatchService:
             'range': max(all_stats) - min(all_stats)
         }
 
+    @staticmethod
+    def calculate_population_scores(stats: Dict, score: Callable[[str, float], Optional[float]],
+                                    stat_definitions: Dict[str, StatDefinition] = STAT_DEFINITIONS) -> Dict:
+        """Population score (e.g. percentile or z-score) of each defined stat that has one."""
+        scores = {}
+        for stat_key, value in stats.items():
+            if stat_key in stat_definitions and isinstance(value, (int, float)):
+                stat_score = score(stat_key, value)
+                if stat_score is not None:
+                    scores[stat_key] = stat_score
+        return scores
+
     @staticmethod
     def analyze_performance_pattern(stats1: Dict, stats2: Dict) -> Dict:
         """Analyze performance patterns and provide insights."""
@@ -97,7 +133,7 @@ class EnhancedOverwatchService:
         
         # Calculate category-wise dominance
         category_scores = {}
-        for category in ['combat', 'accuracy', 'objective', 'support', 'tank']:
+        for category in PATTERN_CATEGORIES:
             p1_score = 0
             p2_score = 0
             stat_count = 0
@@ -192,15 +228,14 @@ class EnhancedOverwatchService:
         return insights
 
     @staticmethod
-    def calculate_role_effectiveness(stats: Dict, hero_role: str) -> float:
-        """Calculate effectiveness score based on hero role."""
-        role_weights = {
-            'tank': ['damage_blocked', 'damage_dealt', 'eliminations', 'objective_time'],
-            'damage': ['eliminations', 'damage_dealt', 'weapon_accuracy', 'objective_kills'],
-            'support': ['healing_done', 'eliminations', 'deaths', 'weapon_accuracy']
-        }
-        
-        relevant_stats = role_weights.get(hero_role, [])
+    def calculate_role_effectiveness(stats: Dict, hero_role: str,
+                                     normalizer: Optional[Callable[[str, float], Optional[float]]] = None) -> float:
+        """Calculate effectiveness score based on hero role.
+
+        ``normalizer`` works as in calculate_weighted_score, falling back to the
+        fixed /100 scaling.
+        """
+        relevant_stats = ROLE_STATS.get(hero_role, [])
         if not relevant_stats:
             return 0
         
@@ -209,8 +244,10 @@ class EnhancedOverwatchService:
         
         for stat_key in relevant_stats:
             if stat_key in stats and isinstance(stats[stat_key], (int, float)):
-                # Simplified effectiveness calculation
-                effectiveness_score += min(stats[stat_key] / 100, 1.0)  # Normalize
+                normalized_value = normalizer(stat_key, stats[stat_key]) if normalizer else None
+                if normalized_value is None:
+                    normalized_value = min(stats[stat_key] / 100, 1.0)  # Simplified fallback
+                effectiveness_score += normalized_value
                 stat_count += 1
         
         return effectiveness_score / stat_count if stat_count > 0 else 0
@@ -0,0 +1,118 @@
+"""
+Sparse fieldsets for comparison responses.
+
+Clients can ask for a subset of a comparison with three options, given in the
+query string or the JSON body (the body wins):
+
+* ``fields``: comma-separated dotted paths such as
+  ``categories.stats.difference,enhanced_analysis.performance_scores``. A path
+  selects everything below it; identifying keys (``hero``, ``player1``,
+  ``player2``, a category's ``name`` and a stat's ``key``) are always returned.
+* ``categories``: category names to include (case-insensitive).
+* ``stats``: stat keys to include.
+
+The selection is handed to the comparison before it runs, so unselected
+sections and stat fields are never computed. For ``hero=all`` paths are
+relative to the overview (``heroes.performance_scores``, ``summary``) and
+per-hero details are selected below ``details``, e.g.
+``details.enhanced_analysis``.
+"""
+
+
+def parse_list(value):
+    """Normalize a comma-separated string or a list of strings into a list, or None if empty."""
+    if isinstance(value, str):
+        items = value.split(',')
+    elif isinstance(value, (list, tuple)):
+        items = [item for item in value if isinstance(item, str)]
+    else:
+        return None
+    items = [item.strip() for item in items if item.strip()]
+    return items or None
+
+
+def parse_fields(paths):
+    """Build a nested ``{name: subtree}`` dict from dotted paths; an empty subtree means "everything"."""
+    if not paths:
+        return None
+    tree = {}
+    for path in paths:
+        node = tree
+        parts = [part for part in path.split('.') if part]
+        for depth, part in enumerate(parts):
+            if depth == len(parts) - 1:
+                node[part] = {}
+            elif part in node and node[part] == {}:
+                # A shorter path already selected everything below this point
+                break
+            else:
+                node = node.setdefault(part, {})
+    return tree
+
+
+class FieldSelection:
+    """Which sections, fields, categories and stats of a comparison to build."""
+
+    def __init__(self, fields=None, categories=None, stats=None):
+        self.fields = parse_fields(fields)
+        self.categories = {name.lower() for name in categories} if categories else None
+        self.stats = set(stats) if stats else None
+
+    @classmethod
+    def from_request(cls, query_params, data):
+        """Read the ``fields``, ``categories`` and ``stats`` options from a request."""
+        options = {}
+        for option in ('fields', 'categories', 'stats'):
+            value = data.get(option) if isinstance(data, dict) and option in data else query_params.get(option)
+            options[option] = parse_list(value)
+        return cls(**options)
+
+    def select(self, *path):
+        """Return the field subtree for a path: None for everything, False if it is not selected."""
+        tree = self.fields
+        for part in path:
+            if not tree:
+                return None
+            if part not in tree:
+                return False
+            tree = tree[part]
+        return tree or None
+
+    def wants(self, *path):
+        return self.select(*path) is not False
+
+    def within(self, *path):
+        """The selection relative to a path, for nested comparisons; None if the path is not selected."""
+        subtree = self.select(*path)
+        if subtree is False:
+            return None
+        selection = FieldSelection(categories=self.categories, stats=self.stats)
+        selection.fields = subtree
+        return selection
+
+    def wants_category(self, name):
+        return self.categories is None or name.lower() in self.categories
+
+    def wants_stat(self, stat_key):
+        return self.stats is None or stat_key in self.stats
+
+    def cache_key(self):
+        """A JSON-serializable description of the selection, for result cache keys."""
+        return {
+            'fields': self.fields,
+            'categories': sorted(self.categories) if self.categories is not None else None,
+            'stats': sorted(self.stats) if self.stats is not None else None,
+        }
+
+    def __bool__(self):
+        return any(option is not None for option in (self.fields, self.categories, self.stats))
+
+
+def prune(value, tree):
+    """Keep only the keys of a dict selected by a field subtree (None keeps everything)."""
+    if not tree or not isinstance(value, dict):
+        return value
+    return {key: prune(value[key], subtree) for key, subtree in tree.items() if key in value}
+
+
+ALL_FIELDS = FieldSelection()
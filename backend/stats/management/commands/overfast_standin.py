@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+
+from stats.standin import StandinConfig, make_server
+
+
+class Command(BaseCommand):
+    help = "Serve recorded or synthetic OverFast player stats locally, with configurable latency and failures."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1', help="Interface to listen on.")
+        parser.add_argument('--port', type=int, default=8765, help="Port to listen on (0 picks a free port).")
+        parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response.")
+        parser.add_argument('--jitter', type=float, default=0.0, help="Up to this many extra seconds per response.")
+        parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with 500.")
+        parser.add_argument(
+            '--throttle-rate', type=float, default=0.0, help="Fraction of requests answered with 429.",
+        )
+        parser.add_argument(
+            '--rate-limit', type=float, default=None, help="Requests per second served before answering 429.",
+        )
+        parser.add_argument(
+            '--throttle-status', type=int, default=429, help="Status sent instead of 429, e.g. 503 for maintenance.",
+        )
+        parser.add_argument('--retry-after', type=int, default=1, help="Retry-After seconds sent with 429s.")
+        parser.add_argument('--recordings', default=None, help="Directory of recorded payloads to replay.")
+        parser.add_argument(
+            '--record-from', default=None,
+            help="Upstream base URL to fetch and save payloads missing from --recordings.",
+        )
+        parser.add_argument(
+            '--no-synthetic', action='store_true',
+            help="Answer 404 for players without a recording instead of generating a payload.",
+        )
+        parser.add_argument('--seed', type=int, default=0, help="Seed for synthetic payloads and injected failures.")
+
+    def handle(self, *args, **options):
+        config = StandinConfig(
+            latency=options['latency'],
+            jitter=options['jitter'],
+            error_rate=options['error_rate'],
+            throttle_rate=options['throttle_rate'],
+            throttle_status=options['throttle_status'],
+            rate_limit=options['rate_limit'],
+            retry_after=options['retry_after'],
+            recordings=options['recordings'],
+            record_from=options['record_from'],
+            synthetic=not options['no_synthetic'],
+            seed=options['seed'],
+        )
+        server = make_server(options['host'], options['port'], config)
+        self.stdout.write(self.style.SUCCESS(f"OverFast stand-in listening on {server.base_url}"))
+        self.stdout.write(f"Point the app at it with OVERFAST_BASE_URL={server.base_url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from stats.startup import prepare
+
+
+class Command(BaseCommand):
+    help = "Collect static files and apply migrations, skipping whichever has nothing to do, and report timings."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--skip-static',
+            action='store_true',
+            help="Do not check or collect static files.",
+        )
+        parser.add_argument(
+            '--skip-migrate',
+            action='store_true',
+            help="Do not check or apply migrations (e.g. at image build time, without a database).",
+        )
+
+    def handle(self, *args, **options):
+        prepare(static=not options['skip_static'], migrate=not options['skip_migrate'], log=self.stdout.write)
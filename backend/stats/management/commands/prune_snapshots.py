@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from stats.snapshots import prune_snapshots
+
+
+class Command(BaseCommand):
+    help = "Delete player-stats snapshots older than the retention window."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=getattr(settings, 'OVERFAST_SNAPSHOT_RETENTION_DAYS', 30),
+            help="Delete snapshots fetched more than this many days ago.",
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help="Also delete each player's latest snapshot when it is past the window.",
+        )
+
+    def handle(self, *args, **options):
+        deleted = prune_snapshots(older_than_days=options['days'], keep_latest=not options['all'])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} snapshot(s) older than {options['days']} day(s)."))
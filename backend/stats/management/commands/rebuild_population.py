@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from stats.population import rebuild_population
+
+
+class Command(BaseCommand):
+    help = "Recompute population distributions and running moments from each player's latest snapshot."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help="Number of snapshots to read before merging them into the database.",
+        )
+
+    def handle(self, *args, **options):
+        players = rebuild_population(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt population statistics from {players} snapshot(s)."))
@@ -0,0 +1,88 @@
+"""
+Compression for API JSON responses.
+
+Static assets are compressed ahead of time by collectstatic and served by
+WhiteNoise; this middleware covers the dynamic ``/api/`` JSON, negotiating
+brotli (when the ``brotli`` package is installed) or gzip from the request's
+``Accept-Encoding``. It must sit below WhiteNoiseMiddleware so static files
+never reach it.
+"""
+
+import gzip
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+
+def parse_accept_encoding(header):
+    """Return ``{coding: q}`` for an Accept-Encoding header."""
+    accepted = {}
+    for item in (header or '').split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def negotiate_encoding(header):
+    """Pick ``'br'`` or ``'gzip'`` for an Accept-Encoding header, or None to send the body as is."""
+    accepted = parse_accept_encoding(header)
+    for coding in ('br', 'gzip'):
+        if coding == 'br' and brotli is None:
+            continue
+        if accepted.get(coding, accepted.get('*', 0)) > 0:
+            return coding
+    return None
+
+
+def compress(body, coding):
+    if coding == 'br':
+        return brotli.compress(body, quality=getattr(settings, 'OVERFAST_BROTLI_QUALITY', 4))
+    return gzip.compress(body, compresslevel=getattr(settings, 'OVERFAST_GZIP_LEVEL', 6), mtime=0)
+
+
+class APICompressionMiddleware(MiddlewareMixin):
+    """Compress JSON responses under ``/api/`` with the best encoding the client accepts."""
+
+    def process_response(self, request, response):
+        if (
+            not request.path.startswith('/api/')
+            or response.streaming
+            or response.has_header('Content-Encoding')
+            or not response.get('Content-Type', '').startswith('application/json')
+            or len(response.content) < getattr(settings, 'OVERFAST_COMPRESS_MIN_SIZE', 512)
+        ):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        coding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+        if coding is None:
+            return response
+        body = compress(response.content, coding)
+        if len(body) >= len(response.content):
+            return response
+
+        response.content = body
+        response['Content-Length'] = str(len(body))
+        response['Content-Encoding'] = coding
+        # The compressed bytes differ from the identity representation, so the ETag can only be weak
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = f'W/{etag}'
+        return response
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:16
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerStatsSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('battletag', models.CharField(max_length=64)),
+                ('gamemode', models.CharField(max_length=32)),
+                ('platform', models.CharField(max_length=16)),
+                ('fetched_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('payload', models.BinaryField()),
+                ('payload_hash', models.CharField(max_length=64)),
+                ('payload_size', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-fetched_at'],
+                'indexes': [models.Index(fields=['battletag', 'gamemode', 'platform', '-fetched_at'], name='stats_snapshot_lookup_idx'), models.Index(fields=['fetched_at'], name='stats_snapshot_fetched_idx')],
+            },
+        ),
+    ]
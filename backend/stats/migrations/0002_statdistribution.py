@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatDistribution',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hero', models.CharField(max_length=64)),
+                ('stat_key', models.CharField(max_length=128)),
+                ('gamemode', models.CharField(max_length=32)),
+                ('platform', models.CharField(max_length=16)),
+                ('sample_count', models.PositiveIntegerField(default=0)),
+                ('sketch', models.BinaryField()),
+                ('quantiles', models.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['hero', 'stat_key'],
+                'indexes': [models.Index(fields=['hero', 'gamemode', 'platform'], name='stats_distribution_hero_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='statdistribution',
+            constraint=models.UniqueConstraint(fields=('hero', 'stat_key', 'gamemode', 'platform'), name='stats_distribution_unique'),
+        ),
+    ]
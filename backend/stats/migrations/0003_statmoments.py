@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats', '0002_statdistribution'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatMoments',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hero', models.CharField(max_length=64)),
+                ('stat_key', models.CharField(max_length=128)),
+                ('gamemode', models.CharField(max_length=32)),
+                ('platform', models.CharField(max_length=16)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('mean', models.FloatField(default=0.0)),
+                ('m2', models.FloatField(default=0.0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'stat moments',
+                'ordering': ['hero', 'stat_key'],
+                'indexes': [models.Index(fields=['hero', 'gamemode', 'platform'], name='stats_moments_hero_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='statmoments',
+            constraint=models.UniqueConstraint(fields=('hero', 'stat_key', 'gamemode', 'platform'), name='stats_moments_unique'),
+        ),
+    ]
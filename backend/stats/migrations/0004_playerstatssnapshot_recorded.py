@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats', '0003_statmoments'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='playerstatssnapshot',
+            name='recorded',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -1,3 +1,103 @@
+import hashlib
+import json
+import zlib
+
 from django.db import models
+from django.utils import timezone
+
+
+class PlayerStatsSnapshot(models.Model):
+    """A compressed OverFast stats payload fetched for one player."""
+
+    battletag = models.CharField(max_length=64)
+    gamemode = models.CharField(max_length=32)
+    platform = models.CharField(max_length=16)
+    fetched_at = models.DateTimeField(default=timezone.now)
+    payload = models.BinaryField()
+    payload_hash = models.CharField(max_length=64)
+    payload_size = models.PositiveIntegerField(default=0)
+    # Set once the payload's values are flushed into StatMoments; only then may replacing it take them out
+    recorded = models.BooleanField(default=False)
+
+    class Meta:
+        ordering = ['-fetched_at']
+        indexes = [
+            models.Index(fields=['battletag', 'gamemode', 'platform', '-fetched_at'], name='stats_snapshot_lookup_idx'),
+            models.Index(fields=['fetched_at'], name='stats_snapshot_fetched_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.battletag} ({self.gamemode}/{self.platform}) @ {self.fetched_at:%Y-%m-%d %H:%M}"
+
+    @staticmethod
+    def encode_payload(data):
+        """Serialize and compress a stats payload, returning (blob, sha256, raw size)."""
+        raw = json.dumps(data, separators=(',', ':'), sort_keys=True).encode('utf-8')
+        return zlib.compress(raw, 6), hashlib.sha256(raw).hexdigest(), len(raw)
+
+    def get_payload(self):
+        """Return the decompressed stats payload."""
+        return json.loads(zlib.decompress(bytes(self.payload)))
+
+    def set_payload(self, data):
+        self.payload, self.payload_hash, self.payload_size = self.encode_payload(data)
+
+
+class StatDistribution(models.Model):
+    """Population distribution of one stat for a hero, gamemode and platform.
+
+    ``sketch`` holds the compressed, mergeable KLL sketch and ``quantiles`` its
+    value at every whole percentile, so lookups never decode the sketch.
+    """
+
+    hero = models.CharField(max_length=64)
+    stat_key = models.CharField(max_length=128)
+    gamemode = models.CharField(max_length=32)
+    platform = models.CharField(max_length=16)
+    sample_count = models.PositiveIntegerField(default=0)
+    sketch = models.BinaryField()
+    quantiles = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['hero', 'stat_key']
+        constraints = [
+            models.UniqueConstraint(fields=['hero', 'stat_key', 'gamemode', 'platform'], name='stats_distribution_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['hero', 'gamemode', 'platform'], name='stats_distribution_hero_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.hero}.{self.stat_key} ({self.gamemode}/{self.platform}, n={self.sample_count})"
+
+
+class StatMoments(models.Model):
+    """Running count, mean and sum of squared deviations of one stat for a hero.
+
+    Unlike StatDistribution, moments follow each player's latest payload: when a
+    player's stats change, the old values are taken out before the new ones are
+    added.
+    """
+
+    hero = models.CharField(max_length=64)
+    stat_key = models.CharField(max_length=128)
+    gamemode = models.CharField(max_length=32)
+    platform = models.CharField(max_length=16)
+    count = models.PositiveIntegerField(default=0)
+    mean = models.FloatField(default=0.0)
+    m2 = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['hero', 'stat_key']
+        verbose_name_plural = 'stat moments'
+        constraints = [
+            models.UniqueConstraint(fields=['hero', 'stat_key', 'gamemode', 'platform'], name='stats_moments_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['hero', 'gamemode', 'platform'], name='stats_moments_hero_idx'),
+        ]
 
-# Create your models here.
+    def __str__(self):
+        return f"{self.hero}.{self.stat_key} ({self.gamemode}/{self.platform}, n={self.count})"
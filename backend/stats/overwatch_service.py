@@ -1,9 +1,24 @@
+import heapq
 import requests
 import json
 import statistics
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from enum import Enum
+from functools import cached_property
+from typing import Optional
 
+from django.conf import settings
+
+from . import population, snapshots, upstream
+from .cache import FRESH, STALE, get_stats_cache, make_stats_key
 from .enhanced_analysis import EnhancedOverwatchService, STAT_DEFINITIONS
+from .fieldsets import ALL_FIELDS, prune
+from .parsing import ParsedPlayerStats
+from .registry import ABSENT, STAT_REGISTRY
+from .resilience import UpstreamUnavailable
+from .scoring import get_scoring_engine
 from .utils import format_battletag, format_stat_value, calculate_difference
 
 # Enum with all heroes
@@ -50,224 +65,675 @@ class Hero(Enum):
     ZARYA = "zarya"
     ZENYATTA = "zenyatta"
 
+# Pseudo-hero accepted by the compare endpoint to compare every hero at once
+ALL_HEROES = "all"
+
+# Role of every hero, used for role-specific analysis
+HERO_ROLES = {
+    'ana': 'support', 'baptiste': 'support', 'brigitte': 'support', 'kiriko': 'support',
+    'lucio': 'support', 'mercy': 'support', 'moira': 'support', 'zenyatta': 'support',
+    'illari': 'support', 'lifeweaver': 'support', 'juno': 'support',
+    
+    'dva': 'tank', 'junker-queen': 'tank', 'orisa': 'tank', 'ramattra': 'tank',
+    'reinhardt': 'tank', 'roadhog': 'tank', 'sigma': 'tank', 'winston': 'tank',
+    'wrecking-ball': 'tank', 'zarya': 'tank', 'mauga': 'tank',
+    
+    'ashe': 'damage', 'bastion': 'damage', 'cassidy': 'damage', 'echo': 'damage',
+    'genji': 'damage', 'hanzo': 'damage', 'junkrat': 'damage', 'mei': 'damage',
+    'pharah': 'damage', 'reaper': 'damage', 'sojourn': 'damage', 'soldier-76': 'damage',
+    'sombra': 'damage', 'symmetra': 'damage', 'torbjorn': 'damage', 'tracer': 'damage',
+    'venture': 'damage', 'widowmaker': 'damage', 'freja': 'damage'
+}
+
+def get_hero_role(hero_name):
+    """Return the role of a hero, defaulting to damage for unknown heroes."""
+    return HERO_ROLES.get(hero_name, 'damage')
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key onto one in-flight execution.
+
+    The first caller for a key runs the function; callers that arrive while it
+    is running wait for it and share its result or re-raise its error.
+    """
+
+    class _Call:
+        __slots__ = ('event', 'result', 'error')
+
+        def __init__(self):
+            self.event = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = self._Call()
+
+        if not is_leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
+    def in_flight(self):
+        """Return the number of keys currently being fetched."""
+        with self._lock:
+            return len(self._calls)
+
+_player_stats_flight = SingleFlight()
+
+_refreshing_keys = set()
+_refreshing_lock = threading.Lock()
+
+@dataclass
+class PlayerStatsLookup:
+    """Player stats together with how fresh they are.
+
+    ``parsed`` is the cached ParsedPlayerStats and ``stats`` its raw payload.
+    ``freshness`` is ``'fresh'`` for data within its TTL, ``'stale'`` for expired
+    data served while upstream is refreshed or unavailable, and ``'missing'``
+    when no data could be found at all. ``age`` is the number of seconds since
+    the data was fetched from OverFast.
+    """
+    parsed: Optional[ParsedPlayerStats]
+    freshness: str
+    age: Optional[float] = None
+
+    def __post_init__(self):
+        self.parsed = ParsedPlayerStats.of(self.parsed)
+
+    @property
+    def stats(self):
+        return self.parsed.payload if self.parsed is not None else None
+
+MISSING = 'missing'
+
+# Weight of stats without a StatDefinition when ranking top differences
+TOP_K_DEFAULT_WEIGHT = 0.5
+
+def lookup_player_stats(battletag, gamemode='quickplay', platform='pc'):
+    """Return a PlayerStatsLookup using a stale-while-revalidate cache policy.
+
+    Fresh entries are served directly. Entries within the stale grace window are
+    served immediately while a background refresh updates them. Otherwise the
+    stats are fetched upstream (concurrent misses share a single fetch), and an
+    older entry is served as stale only if that fetch fails.
+    """
+    cache = get_stats_cache()
+    key = make_stats_key(battletag, gamemode, platform)
+    entry, state = cache.get_entry(key)
+    if state == FRESH:
+        return _lookup_from_entry(cache, entry, FRESH)
+    if state == STALE:
+        _schedule_refresh(key, battletag, gamemode, platform)
+        return _lookup_from_entry(cache, entry, STALE)
+
+    lookup = _player_stats_flight.do(key, _load_player_stats, key, battletag, gamemode, platform)
+    if lookup.stats is not None:
+        return lookup
+    return _stale_fallback(cache, entry, battletag, gamemode, platform)
+
 def get_player_stats(battletag, gamemode='quickplay', platform='pc'):
+    """Return the player stats, serving from the stats cache when possible."""
+    return lookup_player_stats(battletag, gamemode, platform).stats
+
+def _lookup_from_entry(cache, entry, freshness):
+    return PlayerStatsLookup(entry.value, freshness, cache.clock() - entry.stored_at)
+
+def _stale_fallback(cache, entry, battletag, gamemode, platform):
+    """Serve an expired cache entry or an older DB snapshot after a failed fetch."""
+    if entry is not None:
+        return _lookup_from_entry(cache, entry, STALE)
+    stored = snapshots.load_snapshot(battletag, gamemode, platform, max_age=cache.ttl + cache.stale_if_error)
+    if stored is not None:
+        stats, age, payload_hash = stored
+        return PlayerStatsLookup(ParsedPlayerStats(stats, version=payload_hash), STALE, age)
+    return PlayerStatsLookup(None, MISSING)
+
+def _load_recent_snapshot(key, battletag, gamemode, platform):
+    """Warm the cache from a DB snapshot younger than the TTL, if there is one."""
+    cache = get_stats_cache()
+    stored = snapshots.load_snapshot(battletag, gamemode, platform, max_age=cache.ttl)
+    if stored is None:
+        return None
+    stats, age, payload_hash = stored
+    # The snapshot's hash is the payload version, so ETags match those of the original fetch
+    parsed = ParsedPlayerStats(stats, version=payload_hash)
+    cache.set(key, parsed, ttl=max(cache.ttl - age, 1))
+    return PlayerStatsLookup(parsed, FRESH, age)
+
+def _store_fetched_stats(key, battletag, gamemode, platform, stats):
+    """Cache and persist a payload that was just fetched from OverFast."""
+    if stats is None:
+        return PlayerStatsLookup(None, MISSING)
+    snapshot, created = snapshots.store_snapshot(battletag, gamemode, platform, stats)
+    # Reuse the snapshot's hash as the payload version instead of hashing the payload again
+    parsed = ParsedPlayerStats(stats, version=snapshot.payload_hash if snapshot is not None else None)
+    get_stats_cache().set(key, parsed)
+    if created and population.record_snapshot(snapshot, parsed):
+        _get_fetch_executor().submit(population.flush_population)
+    return PlayerStatsLookup(parsed, FRESH, 0.0)
+
+def _load_player_stats(key, battletag, gamemode, platform, use_snapshots=True):
+    """Load stats from a recent DB snapshot or from OverFast, and cache them."""
+    if use_snapshots:
+        lookup = _load_recent_snapshot(key, battletag, gamemode, platform)
+        if lookup is not None:
+            return lookup
+    stats = fetch_player_stats(battletag, gamemode, platform)
+    return _store_fetched_stats(key, battletag, gamemode, platform, stats)
+
+def _schedule_refresh(key, battletag, gamemode, platform):
+    """Refresh a stale cache entry in the background, at most once at a time per key."""
+    with _refreshing_lock:
+        if key in _refreshing_keys:
+            return
+        _refreshing_keys.add(key)
+
+    def refresh():
+        try:
+            _player_stats_flight.do(key, _load_player_stats, key, battletag, gamemode, platform, use_snapshots=False)
+        finally:
+            with _refreshing_lock:
+                _refreshing_keys.discard(key)
+
+    _get_fetch_executor().submit(refresh)
+
+def fetch_player_stats(battletag, gamemode='quickplay', platform='pc'):
     """Fetch and return the player stats from OverFast API with gamemode and platform parameters."""
     formatted_tag = format_battletag(battletag)
-    url = f"https://overfast-api.tekrop.fr/players/{formatted_tag}/stats?gamemode={gamemode}&platform={platform}"
     try:
-        response = requests.get(url, timeout=30)
+        response = upstream.get(
+            f"players/{formatted_tag}/stats",
+            params={'gamemode': gamemode, 'platform': platform},
+        )
         if response.status_code != 200:
             return None
         return response.json()
-    except requests.RequestException:
+    except (requests.RequestException, UpstreamUnavailable, ValueError):
         return None
 
-def compare_hero_stats(stats1, stats2, hero_name, player1_tag, player2_tag):
-    """Compare stats for a single hero between two players and return structured data."""
-    if not stats1 or hero_name not in stats1:
-        return {"error": f"No stats data available for {player1_tag} on hero: {hero_name}"}
-    
-    if not stats2 or hero_name not in stats2:
-        return {"error": f"No stats data available for {player2_tag} on hero: {hero_name}"}
-    
-    hero_categories1 = stats1[hero_name]
-    hero_categories2 = stats2[hero_name]
-    
-    # Create dictionaries organized by category
-    player1_by_category = {}
-    player2_by_category = {}
-    
-    # Parse player 1 stats by category
-    for category in hero_categories1:
-        if isinstance(category, dict) and 'category' in category and 'stats' in category:
-            category_name = category.get('label', category.get('category', 'Unknown'))
-            player1_by_category[category_name] = {}
-            for stat in category['stats']:
-                key = stat.get('key', '')
-                player1_by_category[category_name][key] = stat
-    
-    # Parse player 2 stats by category
-    for category in hero_categories2:
-        if isinstance(category, dict) and 'category' in category and 'stats' in category:
-            category_name = category.get('label', category.get('category', 'Unknown'))
-            player2_by_category[category_name] = {}
-            for stat in category['stats']:
-                key = stat.get('key', '')
-                player2_by_category[category_name][key] = stat
-    
-    # Get all unique categories
-    all_categories = set(player1_by_category.keys()) | set(player2_by_category.keys())
-    
-    result = {
-        "hero": hero_name,
-        "player1": player1_tag,
-        "player2": player2_tag,
-        "categories": []
+_fetch_executor = None
+_fetch_executor_lock = threading.Lock()
+
+def _get_fetch_executor():
+    """Return the shared thread pool used for concurrent upstream fetches."""
+    global _fetch_executor
+    if _fetch_executor is None:
+        with _fetch_executor_lock:
+            if _fetch_executor is None:
+                _fetch_executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'OVERFAST_FETCH_WORKERS', 8),
+                    thread_name_prefix='overfast-fetch',
+                )
+    return _fetch_executor
+
+def _fetch_concurrently(fetch, battletags, gamemode, platform, deadline, default):
+    """Run ``fetch`` for each distinct battletag in parallel under one deadline."""
+    if deadline is None:
+        deadline = getattr(settings, 'OVERFAST_FETCH_DEADLINE', 30)
+
+    unique_tags = list(dict.fromkeys(battletags))
+    executor = _get_fetch_executor()
+    futures = {
+        tag: executor.submit(fetch, tag, gamemode, platform)
+        for tag in unique_tags
     }
-    
-    # Process each category
-    for category_name in sorted(all_categories):
+    wait(futures.values(), timeout=deadline)
+
+    results = {}
+    for tag, future in futures.items():
+        if future.done() and not future.cancelled() and future.exception() is None:
+            results[tag] = future.result()
+        else:
+            future.cancel()
+            results[tag] = default()
+    return results
+
+def get_many_player_stats(battletags, gamemode='quickplay', platform='pc', deadline=None):
+    """Fetch stats for several players concurrently under one shared deadline.
+
+    Returns a dict mapping each distinct battletag to its stats, or to None when
+    the fetch failed or did not finish before the deadline (in seconds).
+    """
+    return _fetch_concurrently(get_player_stats, battletags, gamemode, platform, deadline, lambda: None)
+
+def lookup_many_player_stats(battletags, gamemode='quickplay', platform='pc', deadline=None):
+    """Like get_many_player_stats, but map each battletag to a PlayerStatsLookup."""
+    return _fetch_concurrently(
+        lookup_player_stats, battletags, gamemode, platform, deadline,
+        lambda: PlayerStatsLookup(None, MISSING),
+    )
+
+class HeroComparison:
+    """One hero compared between two players, with each result section built on first use.
+
+    ``categories`` (every stat with formatted values and differences),
+    ``category_summaries`` (per-category wins and averages) and
+    ``enhanced_analysis`` are computed independently, so callers that only need
+    a summary never format individual stats. A FieldSelection narrows the
+    sections, stat fields, categories and stats that are built at all.
+    ``error`` is set instead when either player has no stats for the hero.
+    """
+
+    def __init__(self, stats1, stats2, hero_name, player1_tag, player2_tag, gamemode=None, platform=None,
+                 selection=None):
+        self.parsed1 = ParsedPlayerStats.of(stats1)
+        self.parsed2 = ParsedPlayerStats.of(stats2)
+        self.hero_name = hero_name
+        self.player1_tag = player1_tag
+        self.player2_tag = player2_tag
+        self.gamemode = gamemode
+        self.platform = platform
+        self.selection = selection or ALL_FIELDS
+
+        self.error = None
+        if not self.parsed1 or hero_name not in self.parsed1:
+            self.error = f"No stats data available for {player1_tag} on hero: {hero_name}"
+        elif not self.parsed2 or hero_name not in self.parsed2:
+            self.error = f"No stats data available for {player2_tag} on hero: {hero_name}"
+
+    def _header(self):
+        return {"hero": self.hero_name, "player1": self.player1_tag, "player2": self.player2_tag}
+
+    @cached_property
+    def _categories_by_name(self):
+        """Both players' stats organized by category, indexed once per payload, and the sorted category names."""
+        player1_by_category = self.parsed1.hero(self.hero_name).categories
+        player2_by_category = self.parsed2.hero(self.hero_name).categories
+        names = sorted(
+            name for name in set(player1_by_category.keys()) | set(player2_by_category.keys())
+            if self.selection.wants_category(name)
+        )
+        return player1_by_category, player2_by_category, names
+
+    def _category_stats(self, category_name):
+        """Yield ``(stat_key, player1_stat, player2_stat)`` for a category, sorted by key."""
+        player1_by_category, player2_by_category, _ = self._categories_by_name
         player1_category = player1_by_category.get(category_name, {})
         player2_category = player2_by_category.get(category_name, {})
-        all_stat_keys = set(player1_category.keys()) | set(player2_category.keys())
+        for stat_key in sorted(set(player1_category.keys()) | set(player2_category.keys())):
+            if self.selection.wants_stat(stat_key):
+                yield stat_key, player1_category.get(stat_key), player2_category.get(stat_key)
+
+    @cached_property
+    def category_summaries(self):
+        """``[{"name", "summary"}]`` per category, from the numeric values only."""
+        summaries = []
+        for category_name in self._categories_by_name[2]:
+            numeric_stats_p1 = []
+            numeric_stats_p2 = []
+            for _, player1_stat, player2_stat in self._category_stats(category_name):
+                value1 = player1_stat.value if player1_stat is not None else None
+                value2 = player2_stat.value if player2_stat is not None else None
+                if isinstance(value1, (int, float)) and isinstance(value2, (int, float)):
+                    numeric_stats_p1.append(value1)
+                    numeric_stats_p2.append(value2)
+
+            summary = {}
+            if numeric_stats_p1 and numeric_stats_p2:
+                wins_p1 = sum(1 for v1, v2 in zip(numeric_stats_p1, numeric_stats_p2) if v1 > v2)
+                wins_p2 = sum(1 for v1, v2 in zip(numeric_stats_p1, numeric_stats_p2) if v2 > v1)
+                ties = len(numeric_stats_p1) - wins_p1 - wins_p2
+
+                avg1 = sum(numeric_stats_p1) / len(numeric_stats_p1)
+                avg2 = sum(numeric_stats_p2) / len(numeric_stats_p2)
+
+                summary = {
+                    "player1_wins": wins_p1,
+                    "player2_wins": wins_p2,
+                    "ties": ties,
+                    "player1_average": round(avg1, 2),
+                    "player2_average": round(avg2, 2),
+                    "average_difference": round(avg1 - avg2, 2)
+                }
+            summaries.append({"name": category_name, "summary": summary})
+        return summaries
+
+    def _stat_row(self, stat_key, player1_stat, player2_stat, fields):
+        """One stat's comparison row with the selected fields (all of them when ``fields`` is None)."""
+        def wanted(name):
+            return fields is None or name in fields
+
+        value1 = player1_stat.value if player1_stat is not None else None
+        value2 = player2_stat.value if player2_stat is not None else None
+        row = {"key": stat_key}
+        if wanted("label"):
+            label = stat_key
+            for stat in (player1_stat, player2_stat):
+                if stat is not None and stat.label_id != ABSENT:
+                    label = stat.label
+                    break
+            row["label"] = label
+        if wanted("player1_value"):
+            row["player1_value"] = value1
+        if wanted("player2_value"):
+            row["player2_value"] = value2
+        if wanted("player1_formatted"):
+            row["player1_formatted"] = format_stat_value(stat_key, value1)
+        if wanted("player2_formatted"):
+            row["player2_formatted"] = format_stat_value(stat_key, value2)
+        if wanted("difference"):
+            row["difference"] = calculate_difference(stat_key, value1, value2)
+        return row
+
+    @cached_property
+    def categories(self):
+        """Every category with each stat's raw and formatted values, difference and the category summary."""
+        stat_fields = self.selection.select("categories", "stats")
+        with_summary = self.selection.wants("categories", "summary")
+        categories = []
+        for category in self.category_summaries:
+            category_data = {"name": category["name"]}
+            if stat_fields is not False:
+                category_data["stats"] = [
+                    self._stat_row(stat_key, player1_stat, player2_stat, stat_fields)
+                    for stat_key, player1_stat, player2_stat in self._category_stats(category["name"])
+                ]
+            if with_summary:
+                category_data["summary"] = category["summary"]
+            categories.append(category_data)
+        return categories
+
+    @cached_property
+    def enhanced_analysis(self):
+        """Weighted scores, role effectiveness, performance patterns, insights and population scores."""
+        # Flat stat dictionaries for enhanced analysis
+        player1_flat_stats = self.parsed1.hero(self.hero_name).flat
+        player2_flat_stats = self.parsed2.hero(self.hero_name).flat
         
-        category_data = {
-            "name": category_name,
-            "stats": [],
-            "summary": {}
-        }
+        enhanced_service = EnhancedOverwatchService()
+        hero_population = _population_lookup(self.hero_name, self.gamemode, self.platform)
+        hero_role = get_hero_role(self.hero_name)
+
+        # Score both players in one vectorized pass
+        engine = get_scoring_engine()
+        matrix = engine.matrix_from_heroes([self.parsed1.hero(self.hero_name), self.parsed2.hero(self.hero_name)])
+        # Both scores place values in the population by z-score, like z_scores below
+        normalized = engine.z_matrix(matrix, [hero_population, hero_population])
+        p1_score, p2_score = engine.weighted_scores(matrix, normalized).tolist()
+        p1_role_effectiveness, p2_role_effectiveness = engine.role_effectiveness(matrix, hero_role, normalized).tolist()
+        performance_analysis = engine.performance_patterns(matrix[:1], matrix[1:])[0]
         
-        numeric_stats_p1 = []
-        numeric_stats_p2 = []
+        # Insights only look at category names and win counts
+        insights = enhanced_service.generate_insights({**self._header(), "categories": self.category_summaries})
         
-        # Process each stat in the category
-        for stat_key in sorted(all_stat_keys):
-            player1_stat = player1_category.get(stat_key, {})
-            player2_stat = player2_category.get(stat_key, {})
-            
-            label = player1_stat.get('label', player2_stat.get('label', stat_key))
-            value1 = player1_stat.get('value', None)
-            value2 = player2_stat.get('value', None)
-            
-            # Format values
-            formatted_value1 = format_stat_value(stat_key, value1)
-            formatted_value2 = format_stat_value(stat_key, value2)
-            
-            # Calculate difference
-            difference = calculate_difference(stat_key, value1, value2)
-            
-            category_data["stats"].append({
+        analysis = {
+            'performance_scores': {
+                'player1_weighted_score': round(p1_score, 3),
+                'player2_weighted_score': round(p2_score, 3),
+                'score_difference': round(p1_score - p2_score, 3)
+            },
+            'role_effectiveness': {
+                'player1_effectiveness': round(p1_role_effectiveness, 3),
+                'player2_effectiveness': round(p2_role_effectiveness, 3),
+                'hero_role': hero_role
+            },
+            'performance_analysis': performance_analysis,
+            'insights': insights,
+            'statistical_summary': {
+                'total_stats_compared': len(set(player1_flat_stats.keys()) | set(player2_flat_stats.keys())),
+                'common_stats': len(set(player1_flat_stats.keys()) & set(player2_flat_stats.keys())),
+                'confidence_level': 'high' if len(player1_flat_stats) > 10 else 'medium' if len(player1_flat_stats) > 5 else 'low'
+            }
+        }
+        if hero_population:
+            analysis['percentiles'] = {
+                'player1': enhanced_service.calculate_population_scores(player1_flat_stats, hero_population.percentile),
+                'player2': enhanced_service.calculate_population_scores(player2_flat_stats, hero_population.percentile)
+            }
+            analysis['z_scores'] = {
+                'player1': enhanced_service.calculate_population_scores(player1_flat_stats, hero_population.z_score),
+                'player2': enhanced_service.calculate_population_scores(player2_flat_stats, hero_population.z_score)
+            }
+        return analysis
+
+    def top_differences(self, top_k):
+        """The ``top_k`` stats with the largest weighted, normalized gap between the players.
+
+        A stat's gap is the difference of the players' population percentiles
+        when both are known, otherwise the relative difference
+        ``|v1 - v2| / max(|v1|, |v2|)``; it is scaled by the stat's definition
+        weight (TOP_K_DEFAULT_WEIGHT for undefined stats). Only stats both players
+        have a numeric value for are ranked, and heapq selects the winners
+        without sorting every stat.
+        """
+        hero_population = _population_lookup(self.hero_name, self.gamemode, self.platform)
+        player2_values = {
+            stat_id: value for stat_id, _, value in self.parsed2.hero(self.hero_name).numeric_items()
+        }
+
+        def candidates():
+            for stat_id, label_id, value1 in self.parsed1.hero(self.hero_name).numeric_items():
+                value2 = player2_values.get(stat_id)
+                if value2 is None or value1 == value2:
+                    continue
+                stat_key = STAT_REGISTRY.value(stat_id)
+                if not self.selection.wants_stat(stat_key):
+                    continue
+                gap = abs(value1 - value2) / max(abs(value1), abs(value2))
+                if hero_population:
+                    percentile1 = hero_population.percentile(stat_key, value1)
+                    percentile2 = hero_population.percentile(stat_key, value2)
+                    if percentile1 is not None and percentile2 is not None:
+                        gap = abs(percentile1 - percentile2) / 100
+                stat_def = STAT_DEFINITIONS.get(stat_key)
+                weight = stat_def.weight if stat_def else TOP_K_DEFAULT_WEIGHT
+                yield weight * gap, gap, weight, stat_key, label_id, value1, value2, stat_def
+
+        differences = []
+        for score, gap, weight, stat_key, label_id, value1, value2, stat_def in heapq.nlargest(
+            top_k, candidates(), key=lambda candidate: candidate[0]
+        ):
+            stat_type = stat_def.stat_type if stat_def else 'neutral'
+            advantage = None
+            if stat_type == 'higher_better':
+                advantage = 'player1' if value1 > value2 else 'player2'
+            elif stat_type == 'lower_better':
+                advantage = 'player1' if value1 < value2 else 'player2'
+            differences.append({
                 "key": stat_key,
-                "label": label,
+                "label": STAT_REGISTRY.value(label_id) if label_id != ABSENT else stat_key,
                 "player1_value": value1,
                 "player2_value": value2,
-                "player1_formatted": formatted_value1,
-                "player2_formatted": formatted_value2,
-                "difference": difference
+                "difference": calculate_difference(stat_key, value1, value2),
+                "normalized_difference": round(gap, 3),
+                "weight": weight,
+                "score": round(score, 3),
+                "advantage": advantage
             })
-            
-            # Collect numeric values for summary
-            if isinstance(value1, (int, float)) and isinstance(value2, (int, float)):
-                numeric_stats_p1.append(value1)
-                numeric_stats_p2.append(value2)
-        
-        # Calculate category summary
-        if numeric_stats_p1 and numeric_stats_p2:
-            wins_p1 = sum(1 for v1, v2 in zip(numeric_stats_p1, numeric_stats_p2) if v1 > v2)
-            wins_p2 = sum(1 for v1, v2 in zip(numeric_stats_p1, numeric_stats_p2) if v2 > v1)
-            ties = len(numeric_stats_p1) - wins_p1 - wins_p2
-            
-            avg1 = sum(numeric_stats_p1) / len(numeric_stats_p1)
-            avg2 = sum(numeric_stats_p2) / len(numeric_stats_p2)
-            
-            category_data["summary"] = {
-                "player1_wins": wins_p1,
-                "player2_wins": wins_p2,
-                "ties": ties,
-                "player1_average": round(avg1, 2),
-                "player2_average": round(avg2, 2),
-                "average_difference": round(avg1 - avg2, 2)
+        return differences
+
+    def top(self, top_k):
+        """Only the ``top_k`` biggest differences, for widgets that show a handful of numbers."""
+        result = self._build([("differences", lambda: self.top_differences(top_k))])
+        if "error" not in result:
+            result["top_k"] = top_k
+        return result
+
+    def _build(self, sections):
+        """The header plus each selected section, computed only if selected."""
+        if self.error:
+            return {"error": self.error}
+        result = self._header()
+        for name, build in sections:
+            subtree = self.selection.select(name)
+            if subtree is not False:
+                result[name] = prune(build(), subtree)
+        return result
+
+    def basic(self):
+        """The per-stat comparison returned by compare_hero_stats."""
+        return self._build([("categories", lambda: self.categories)])
+
+    def enhanced(self):
+        """The full comparison returned by enhanced_compare_hero_stats."""
+        return self._build([
+            ("categories", lambda: self.categories),
+            ("enhanced_analysis", lambda: self.enhanced_analysis),
+        ])
+
+    def summary(self):
+        """The enhanced analysis and category win counts, without any per-stat detail."""
+        return self._build([
+            ("enhanced_analysis", lambda: self.enhanced_analysis),
+            ("quick_summary", self._quick_summary),
+        ])
+
+    def _quick_summary(self):
+        summaries = [category["summary"] for category in self.category_summaries]
+        return {
+            "total_categories": len(summaries),
+            "category_winners": {
+                "player1": sum(1 for summary in summaries
+                               if summary.get("player1_wins", 0) > summary.get("player2_wins", 0)),
+                "player2": sum(1 for summary in summaries
+                               if summary.get("player2_wins", 0) > summary.get("player1_wins", 0))
             }
-        
-        result["categories"].append(category_data)
-    
-    return result
+        }
 
+def compare_hero_stats(stats1, stats2, hero_name, player1_tag, player2_tag):
+    """Compare stats for a single hero between two players and return structured data.
 
+    ``stats1`` and ``stats2`` may be raw payloads or ParsedPlayerStats.
+    """
+    return HeroComparison(stats1, stats2, hero_name, player1_tag, player2_tag).basic()
 
-def enhanced_compare_hero_stats(stats1, stats2, hero_name, player1_tag, player2_tag):
-    """Enhanced comparison with statistical analysis and weighted scoring."""
-    if not stats1 or hero_name not in stats1:
-        return {"error": f"No stats data available for {player1_tag} on hero: {hero_name}"}
-    
-    if not stats2 or hero_name not in stats2:
-        return {"error": f"No stats data available for {player2_tag} on hero: {hero_name}"}
-    
-    # Use existing comparison logic
-    basic_comparison = compare_hero_stats(stats1, stats2, hero_name, player1_tag, player2_tag)
-    
-    if "error" in basic_comparison:
-        return basic_comparison
-    
-    # Extract flat stat dictionaries for enhanced analysis
-    player1_flat_stats = {}
-    player2_flat_stats = {}
-    
-    hero_categories1 = stats1[hero_name]
-    hero_categories2 = stats2[hero_name]
-    
-    # Flatten stats for analysis
-    for category in hero_categories1:
-        if isinstance(category, dict) and 'stats' in category:
-            for stat in category['stats']:
-                key = stat.get('key', '')
-                value = stat.get('value')
-                if isinstance(value, (int, float)):
-                    player1_flat_stats[key] = value
-    
-    for category in hero_categories2:
-        if isinstance(category, dict) and 'stats' in category:
-            for stat in category['stats']:
-                key = stat.get('key', '')
-                value = stat.get('value')
-                if isinstance(value, (int, float)):
-                    player2_flat_stats[key] = value
-    
-    # Enhanced analysis
-    enhanced_service = EnhancedOverwatchService()
-    
-    # Calculate weighted performance scores
-    p1_score = enhanced_service.calculate_weighted_score(player1_flat_stats, STAT_DEFINITIONS)
-    p2_score = enhanced_service.calculate_weighted_score(player2_flat_stats, STAT_DEFINITIONS)
-    
-    # Generate performance analysis
-    performance_analysis = enhanced_service.analyze_performance_pattern(
-        player1_flat_stats, player2_flat_stats
-    )
-    
-    # Generate insights
-    insights = enhanced_service.generate_insights(basic_comparison)
-    
-    # Determine hero role for role-specific analysis
-    hero_roles = {
-        'ana': 'support', 'baptiste': 'support', 'brigitte': 'support', 'kiriko': 'support',
-        'lucio': 'support', 'mercy': 'support', 'moira': 'support', 'zenyatta': 'support',
-        'illari': 'support', 'lifeweaver': 'support', 'juno': 'support',
-        
-        'dva': 'tank', 'junker-queen': 'tank', 'orisa': 'tank', 'ramattra': 'tank',
-        'reinhardt': 'tank', 'roadhog': 'tank', 'sigma': 'tank', 'winston': 'tank',
-        'wrecking-ball': 'tank', 'zarya': 'tank', 'mauga': 'tank',
-        
-        'ashe': 'damage', 'bastion': 'damage', 'cassidy': 'damage', 'echo': 'damage',
-        'genji': 'damage', 'hanzo': 'damage', 'junkrat': 'damage', 'mei': 'damage',
-        'pharah': 'damage', 'reaper': 'damage', 'sojourn': 'damage', 'soldier-76': 'damage',
-        'sombra': 'damage', 'symmetra': 'damage', 'torbjorn': 'damage', 'tracer': 'damage',
-        'venture': 'damage', 'widowmaker': 'damage', 'freja': 'damage'
+def enhanced_compare_hero_stats(stats1, stats2, hero_name, player1_tag, player2_tag, gamemode=None, platform=None,
+                                selection=None):
+    """Enhanced comparison with statistical analysis and weighted scoring.
+
+    ``stats1`` and ``stats2`` may be raw payloads or ParsedPlayerStats. When
+    ``gamemode`` and ``platform`` are given, each player's percentiles and z-scores
+    are reported, and weighted scores and role effectiveness are both normalized
+    by population z-score. ``selection`` is an optional FieldSelection.
+    """
+    return HeroComparison(
+        stats1, stats2, hero_name, player1_tag, player2_tag, gamemode, platform, selection
+    ).enhanced()
+
+def summarize_hero_comparison(stats1, stats2, hero_name, player1_tag, player2_tag, gamemode=None, platform=None,
+                              selection=None):
+    """Enhanced analysis and category win counts only, skipping per-stat formatting."""
+    return HeroComparison(
+        stats1, stats2, hero_name, player1_tag, player2_tag, gamemode, platform, selection
+    ).summary()
+
+def top_hero_differences(stats1, stats2, hero_name, player1_tag, player2_tag, top_k, gamemode=None, platform=None,
+                         selection=None):
+    """The ``top_k`` most significant stat differences for a hero (see HeroComparison.top_differences)."""
+    return HeroComparison(
+        stats1, stats2, hero_name, player1_tag, player2_tag, gamemode, platform, selection
+    ).top(top_k)
+
+def _population_lookup(hero_name, gamemode, platform):
+    """Population stats for a hero, or None without a gamemode/platform or population data."""
+    if gamemode is None or platform is None:
+        return None
+    return population.population_lookup(hero_name, gamemode.strip().lower(), platform.strip().lower())
+
+def compare_all_heroes(stats1, stats2, player1_tag, player2_tag, detail_heroes=(), gamemode=None, platform=None,
+                       selection=None):
+    """Overview of every hero both players have played, from one payload per player.
+
+    Each hero gets its weighted scores and role effectiveness. Heroes listed in
+    ``detail_heroes`` (or all of them when it is ``True``) also get the full
+    enhanced comparison under ``details``. ``gamemode`` and ``platform`` enable
+    population normalization as in enhanced_compare_hero_stats. ``selection``
+    applies to the overview itself (``heroes``, ``summary``) and, below
+    ``details``, to each per-hero comparison.
+    """
+    parsed1 = ParsedPlayerStats.of(stats1)
+    parsed2 = ParsedPlayerStats.of(stats2)
+    selection = selection or ALL_FIELDS
+    common_heroes = [
+        hero.value for hero in Hero
+        if parsed1 and parsed2 and parsed1.has_played(hero.value) and parsed2.has_played(hero.value)
+    ]
+
+    result = {"hero": "all", "player1": player1_tag, "player2": player2_tag}
+    hero_fields = selection.select("heroes")
+    if hero_fields is not False or selection.wants("summary"):
+        heroes = _hero_overview(parsed1, parsed2, common_heroes, gamemode, platform)
+        if hero_fields is not False:
+            result["heroes"] = [{"hero": hero["hero"], **prune(hero, hero_fields)} for hero in heroes]
+        if selection.wants("summary"):
+            result["summary"] = prune({
+                "heroes_compared": len(heroes),
+                "player1_better": sum(1 for hero in heroes if hero["performance_scores"]["score_difference"] > 0),
+                "player2_better": sum(1 for hero in heroes if hero["performance_scores"]["score_difference"] < 0)
+            }, selection.select("summary"))
+
+    detail_selection = selection.within("details")
+    if detail_selection is None:
+        return result
+    if detail_heroes is True:
+        detail_heroes = common_heroes
+    details = {
+        hero_name: enhanced_compare_hero_stats(
+            parsed1, parsed2, hero_name, player1_tag, player2_tag, gamemode, platform, detail_selection
+        )
+        for hero_name in common_heroes if hero_name in detail_heroes
     }
-    
-    hero_role = hero_roles.get(hero_name, 'damage')
-    p1_role_effectiveness = enhanced_service.calculate_role_effectiveness(player1_flat_stats, hero_role)
-    p2_role_effectiveness = enhanced_service.calculate_role_effectiveness(player2_flat_stats, hero_role)
-    
-    # Add enhanced data to the basic comparison
-    basic_comparison['enhanced_analysis'] = {
-        'performance_scores': {
-            'player1_weighted_score': round(p1_score, 3),
-            'player2_weighted_score': round(p2_score, 3),
-            'score_difference': round(p1_score - p2_score, 3)
-        },
-        'role_effectiveness': {
-            'player1_effectiveness': round(p1_role_effectiveness, 3),
-            'player2_effectiveness': round(p2_role_effectiveness, 3),
-            'hero_role': hero_role
-        },
-        'performance_analysis': performance_analysis,
-        'insights': insights,
-        'statistical_summary': {
-            'total_stats_compared': len(set(player1_flat_stats.keys()) | set(player2_flat_stats.keys())),
-            'common_stats': len(set(player1_flat_stats.keys()) & set(player2_flat_stats.keys())),
-            'confidence_level': 'high' if len(player1_flat_stats) > 10 else 'medium' if len(player1_flat_stats) > 5 else 'low'
-        }
+    if details:
+        result["details"] = details
+
+    return result
+
+def _hero_overview(parsed1, parsed2, common_heroes, gamemode, platform):
+    """Weighted scores, role effectiveness and time played per common hero, scored in one vectorized pass."""
+    engine = get_scoring_engine()
+    matrix1 = engine.matrix_from_heroes([parsed1.hero(hero_name) for hero_name in common_heroes])
+    matrix2 = engine.matrix_from_heroes([parsed2.hero(hero_name) for hero_name in common_heroes])
+    hero_populations = [_population_lookup(hero_name, gamemode, platform) for hero_name in common_heroes]
+    normalized1 = engine.z_matrix(matrix1, hero_populations)
+    normalized2 = engine.z_matrix(matrix2, hero_populations)
+    p1_scores = engine.weighted_scores(matrix1, normalized1)
+    p2_scores = engine.weighted_scores(matrix2, normalized2)
+    hero_roles = [get_hero_role(hero_name) for hero_name in common_heroes]
+    p1_role_effectiveness = {
+        role: engine.role_effectiveness(matrix1, role, normalized1) for role in set(hero_roles)
     }
-    
-    return basic_comparison
+    p2_role_effectiveness = {
+        role: engine.role_effectiveness(matrix2, role, normalized2) for role in set(hero_roles)
+    }
+
+    heroes = []
+    for row, (hero_name, hero_role) in enumerate(zip(common_heroes, hero_roles)):
+        p1_score = float(p1_scores[row])
+        p2_score = float(p2_scores[row])
+        heroes.append({
+            "hero": hero_name,
+            "hero_role": hero_role,
+            "performance_scores": {
+                "player1_weighted_score": round(p1_score, 3),
+                "player2_weighted_score": round(p2_score, 3),
+                "score_difference": round(p1_score - p2_score, 3)
+            },
+            "role_effectiveness": {
+                "player1_effectiveness": round(float(p1_role_effectiveness[hero_role][row]), 3),
+                "player2_effectiveness": round(float(p2_role_effectiveness[hero_role][row]), 3)
+            },
+            "time_played": {
+                "player1": parsed1.hero(hero_name).flat.get('time_played'),
+                "player2": parsed2.hero(hero_name).flat.get('time_played')
+            }
+        })
+    return heroes
@@ -0,0 +1,258 @@
+"""
+Parse-once, compact representation of an OverFast player stats payload.
+
+The comparison functions used to walk a hero's raw category list on every
+request, once to index stats by category and again to build a flat numeric
+view. ``ParsedPlayerStats`` does that work once per fetched payload and is
+cached in place of it.
+
+To keep thousands of cached players cheap, a hero's stats are not kept as
+``{'key', 'label', 'value'}`` dicts: stat keys, labels and category names are
+interned in ``stats.registry`` and each hero holds parallel ``array`` buffers of
+ids and values. Malformed category or stat entries are dropped.
+"""
+
+import hashlib
+import json
+import math
+import sys
+from array import array
+
+from .registry import ABSENT, STAT_REGISTRY
+
+# Per-stat value kinds, stored in a bytearray alongside the values array
+KIND_INT = 0
+KIND_FLOAT = 1
+KIND_NONE = 2
+KIND_OTHER = 3
+KIND_MISSING = 4
+
+
+def payload_version(payload):
+    """SHA-256 of a payload's canonical JSON, the same digest snapshots store as payload_hash."""
+    raw = json.dumps(payload, separators=(',', ':'), sort_keys=True).encode('utf-8')
+    return hashlib.sha256(raw).hexdigest()
+
+
+def _intern_optional(entry, field):
+    return STAT_REGISTRY.intern(entry[field]) if field in entry else ABSENT
+
+
+class StatRecord:
+    """One stat of a hero, materialized from the compact arrays on demand."""
+
+    __slots__ = ('stat_id', 'label_id', 'value')
+
+    def __init__(self, stat_id, label_id, value):
+        self.stat_id = stat_id
+        self.label_id = label_id
+        self.value = value
+
+    @property
+    def key(self):
+        return STAT_REGISTRY.value(self.stat_id)
+
+    @property
+    def label(self):
+        """The stat's label, or None if the payload had no label for it."""
+        return STAT_REGISTRY.value(self.label_id) if self.label_id != ABSENT else None
+
+
+class ParsedHeroStats:
+    """Compact, indexed stats for one hero.
+
+    Stats of all categories are laid out back to back; ``category_ends[i]`` is
+    the offset one past the last stat of category ``i``.
+    """
+
+    __slots__ = (
+        'category_key_ids', 'category_label_ids', 'category_ends',
+        'stat_ids', 'label_ids', 'values', 'kinds', 'others',
+    )
+
+    def __init__(self, hero_categories):
+        self.category_key_ids = array('I')
+        self.category_label_ids = array('I')
+        self.category_ends = array('I')
+        self.stat_ids = array('I')
+        self.label_ids = array('I')
+        self.values = array('d')
+        self.kinds = bytearray()
+        self.others = None
+
+        for category in hero_categories or []:
+            if not isinstance(category, dict) or not isinstance(category.get('stats'), list):
+                continue
+            self.category_key_ids.append(_intern_optional(category, 'category'))
+            self.category_label_ids.append(_intern_optional(category, 'label'))
+            for stat in category['stats']:
+                if isinstance(stat, dict):
+                    self._append_stat(stat)
+            self.category_ends.append(len(self.stat_ids))
+
+    def _append_stat(self, stat):
+        self.stat_ids.append(STAT_REGISTRY.intern(stat.get('key', '')))
+        self.label_ids.append(_intern_optional(stat, 'label'))
+        value = stat.get('value')
+        if 'value' not in stat:
+            kind, number = KIND_MISSING, math.nan
+        elif value is None:
+            kind, number = KIND_NONE, math.nan
+        elif isinstance(value, bool) or not isinstance(value, (int, float)):
+            kind, number = KIND_OTHER, math.nan
+            if self.others is None:
+                self.others = {}
+            self.others[len(self.values)] = value
+        elif isinstance(value, int):
+            kind, number = KIND_INT, float(value)
+        else:
+            kind, number = KIND_FLOAT, value
+        self.values.append(number)
+        self.kinds.append(kind)
+
+    def _value(self, index):
+        kind = self.kinds[index]
+        if kind == KIND_INT:
+            return int(self.values[index])
+        if kind == KIND_FLOAT:
+            return self.values[index]
+        if kind == KIND_OTHER:
+            return self.others[index]
+        return None
+
+    def _category_ranges(self):
+        start = 0
+        for position, end in enumerate(self.category_ends):
+            yield position, start, end
+            start = end
+
+    @property
+    def categories(self):
+        """``{category_name: {stat_key: StatRecord}}`` for entries with a category key.
+
+        Built on every access rather than kept on this (cached, shared) object, so
+        callers that read it repeatedly should hold on to the result.
+        """
+        categories = {}
+        for position, start, end in self._category_ranges():
+            key_id = self.category_key_ids[position]
+            if key_id == ABSENT:
+                continue
+            label_id = self.category_label_ids[position]
+            name = STAT_REGISTRY.value(label_id if label_id != ABSENT else key_id)
+            categories[name] = {
+                STAT_REGISTRY.value(self.stat_ids[index]): StatRecord(
+                    self.stat_ids[index], self.label_ids[index], self._value(index)
+                )
+                for index in range(start, end)
+            }
+        return categories
+
+    @property
+    def flat(self):
+        """``{stat_key: value}`` for every numeric stat of the hero; built per access like ``categories``."""
+        return {
+            STAT_REGISTRY.value(self.stat_ids[index]): self._value(index)
+            for index in range(len(self.stat_ids))
+            if self.kinds[index] in (KIND_INT, KIND_FLOAT)
+        }
+
+    def numeric_items(self):
+        """Yield ``(stat_id, label_id, value)`` for every numeric stat, without materializing records."""
+        for index, kind in enumerate(self.kinds):
+            if kind in (KIND_INT, KIND_FLOAT):
+                yield self.stat_ids[index], self.label_ids[index], self._value(index)
+
+    def to_categories(self):
+        """Rebuild the hero's category list in OverFast's payload shape."""
+        categories = []
+        for position, start, end in self._category_ranges():
+            category = {}
+            if self.category_key_ids[position] != ABSENT:
+                category['category'] = STAT_REGISTRY.value(self.category_key_ids[position])
+            if self.category_label_ids[position] != ABSENT:
+                category['label'] = STAT_REGISTRY.value(self.category_label_ids[position])
+            category['stats'] = []
+            for index in range(start, end):
+                stat = {'key': STAT_REGISTRY.value(self.stat_ids[index])}
+                if self.label_ids[index] != ABSENT:
+                    stat['label'] = STAT_REGISTRY.value(self.label_ids[index])
+                if self.kinds[index] != KIND_MISSING:
+                    stat['value'] = self._value(index)
+                category['stats'].append(stat)
+            categories.append(category)
+        return categories
+
+    def approximate_size(self):
+        size = sys.getsizeof(self.kinds) + sys.getsizeof(self.others or ())
+        for buffer in (self.category_key_ids, self.category_label_ids, self.category_ends,
+                       self.stat_ids, self.label_ids, self.values):
+            size += sys.getsizeof(buffer)
+        return size
+
+
+EMPTY_HERO = ParsedHeroStats(None)
+
+
+class ParsedPlayerStats:
+    """A player's stats payload parsed once into compact per-hero records."""
+
+    __slots__ = ('heroes', 'extra', '_version')
+
+    def __init__(self, payload, version=None):
+        self.heroes = {}
+        self.extra = {}
+        self._version = version
+        for name, value in (payload or {}).items():
+            if isinstance(value, list):
+                self.heroes[name] = ParsedHeroStats(value)
+            else:
+                self.extra[name] = value
+
+    @classmethod
+    def of(cls, stats):
+        """Return ``stats`` as a ParsedPlayerStats, parsing raw payloads."""
+        if stats is None or isinstance(stats, cls):
+            return stats
+        return cls(stats)
+
+    def __contains__(self, hero_name):
+        return hero_name in self.heroes or hero_name in self.extra
+
+    def __bool__(self):
+        return bool(self.heroes or self.extra)
+
+    def has_played(self, hero_name):
+        """Return True if the payload has stats for the hero."""
+        hero = self.heroes.get(hero_name)
+        return hero is not None and len(hero.category_ends) > 0
+
+    def hero(self, hero_name):
+        """Return the parsed stats for a hero, or None if the payload lacks it."""
+        hero = self.heroes.get(hero_name)
+        if hero is None and hero_name in self.extra:
+            return EMPTY_HERO
+        return hero
+
+    @property
+    def version(self):
+        """Content hash of the payload, computed on first use unless given at parse time."""
+        if self._version is None:
+            self._version = payload_version(self.payload)
+        return self._version
+
+    @property
+    def payload(self):
+        """Rebuild the raw OverFast payload."""
+        payload = {name: hero.to_categories() for name, hero in self.heroes.items()}
+        payload.update(self.extra)
+        return payload
+
+    def __reduce__(self):
+        # Registry ids are only meaningful inside this process, so pickles (e.g. in a
+        # shared Django cache) carry the rebuilt payload and are re-parsed on load.
+        return (self.__class__, (self.payload, self._version))
+
+    def approximate_size(self):
+        """Approximate memory footprint, used by the stats cache's byte budget."""
+        return sys.getsizeof(self.heroes) + sum(hero.approximate_size() for hero in self.heroes.values())
@@ -0,0 +1,457 @@
+"""
+Population statistics per hero, stat, gamemode and platform.
+
+Every new or changed player payload is folded into in-memory per-stat
+summaries: a KLL sketch for percentiles and running moments (count, mean,
+variance) for z-scores. When a player's payload changes, the previous payload's
+values are taken back out of the moments so each player counts once (snapshots
+flag whether their values were recorded, so only those are); sketches cannot
+forget values and keep every payload seen. Pending summaries are
+periodically merged into the persisted StatDistribution and StatMoments rows,
+so several workers can feed the same population without re-reading stored
+payloads. Reads go through a small in-process index of each hero's
+distributions, which makes percentile and z-score lookups constant time.
+
+Population stats are fed from snapshot writes (that is how unchanged payloads
+are told apart from new ones), so they are off whenever snapshots are.
+"""
+
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import Max
+
+from . import snapshots
+from .models import PlayerStatsSnapshot, StatDistribution, StatMoments
+from .parsing import KIND_FLOAT, KIND_INT, ParsedPlayerStats
+from .registry import STAT_REGISTRY
+from .sketches import KLLSketch, QuantileTable, RunningMoments
+
+logger = logging.getLogger(__name__)
+
+
+def population_enabled():
+    return getattr(settings, 'OVERFAST_POPULATION_ENABLED', True) and snapshots.snapshots_enabled()
+
+
+def _min_samples():
+    return getattr(settings, 'OVERFAST_POPULATION_MIN_SAMPLES', 30)
+
+
+def hero_samples(hero):
+    """Yield ``(stat_key, value)`` for every numeric stat of a ParsedHeroStats."""
+    for index, stat_id in enumerate(hero.stat_ids):
+        if hero.kinds[index] in (KIND_INT, KIND_FLOAT):
+            yield STAT_REGISTRY.value(stat_id), hero.values[index]
+
+
+class PendingStat:
+    """Samples of one stat that have not been flushed to the database yet."""
+
+    __slots__ = ('sketch', 'added', 'removed')
+
+    def __init__(self):
+        self.sketch = None
+        self.added = RunningMoments()
+        self.removed = RunningMoments()
+
+    def merge(self, other):
+        if other.sketch is not None:
+            self.sketch = other.sketch if self.sketch is None else self.sketch.merge(other.sketch)
+        self.added.merge(other.added)
+        self.removed.merge(other.removed)
+        return self
+
+
+class PopulationRecorder:
+    """Accumulates pending summaries in memory and merges them into the database."""
+
+    def __init__(self, flush_samples=2000, flush_interval=60, clock=time.monotonic):
+        self.flush_samples = flush_samples
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self._pending = {}
+        self._pending_samples = 0
+        # {snapshot pk: recorded flag to store} for snapshots whose values are pending or being flushed
+        self._pending_snapshots = {}
+        self._flushing_snapshots = {}
+        self._last_flush = clock()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def _pending_stat(self, key):
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = PendingStat()
+        return pending
+
+    def record(self, parsed, gamemode, platform, previous=None, snapshot_id=None, previous_id=None):
+        """Add every hero's numeric stats, replacing ``previous`` (the player's old payload) in the moments.
+
+        ``snapshot_id`` and ``previous_id`` are the payloads' snapshots, whose
+        ``recorded`` flags are set and cleared when the samples are flushed.
+        Returns True when enough samples or time have accumulated that the
+        caller should schedule a flush.
+        """
+        with self._lock:
+            if snapshot_id is not None:
+                self._pending_snapshots[snapshot_id] = True
+            if previous is not None and previous_id is not None:
+                self._pending_snapshots[previous_id] = False
+            for hero_name, hero in parsed.heroes.items():
+                for stat_key, value in hero_samples(hero):
+                    pending = self._pending_stat((hero_name, stat_key, gamemode, platform))
+                    if pending.sketch is None:
+                        pending.sketch = KLLSketch()
+                    pending.sketch.update(value)
+                    pending.added.add(value)
+                    self._pending_samples += 1
+            if previous is not None:
+                for hero_name, hero in previous.heroes.items():
+                    for stat_key, value in hero_samples(hero):
+                        self._pending_stat((hero_name, stat_key, gamemode, platform)).removed.add(value)
+            return self.flush_due()
+
+    def flush_due(self):
+        return self._pending_samples > 0 and (
+            self._pending_samples >= self.flush_samples
+            or self.clock() - self._last_flush >= self.flush_interval
+        )
+
+    def pending_samples(self):
+        return self._pending_samples
+
+    def is_recording(self, snapshot_id):
+        """Return True if a snapshot's values were recorded but are not flushed to the database yet."""
+        with self._lock:
+            return bool(self._pending_snapshots.get(snapshot_id, self._flushing_snapshots.get(snapshot_id)))
+
+    def flush(self):
+        """Merge pending summaries into the database and return how many stats were written.
+
+        On database errors the pending summaries are put back so the samples are
+        retried on the next flush.
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                pending_samples, self._pending_samples = self._pending_samples, 0
+                snapshot_states = self._flushing_snapshots = self._pending_snapshots
+                self._pending_snapshots = {}
+                self._last_flush = self.clock()
+            if not pending and not snapshot_states:
+                return 0
+            try:
+                with transaction.atomic():
+                    _merge_into_distributions(pending)
+                    _merge_into_moments(pending)
+                    _mark_recorded(snapshot_states)
+            except DatabaseError:
+                logger.exception("Failed to flush %d population samples", pending_samples)
+                with self._lock:
+                    for key, stat in pending.items():
+                        current = self._pending.get(key)
+                        self._pending[key] = stat if current is None else stat.merge(current)
+                    self._pending_samples += pending_samples
+                    self._pending_snapshots = {**snapshot_states, **self._pending_snapshots}
+                    self._flushing_snapshots = {}
+                return 0
+            finally:
+                with self._lock:
+                    if self._flushing_snapshots is snapshot_states:
+                        self._flushing_snapshots = {}
+            get_distribution_index().invalidate({(hero, gamemode, platform) for hero, _, gamemode, platform in pending})
+            return len(pending)
+
+
+def _group_pending(pending):
+    """Group pending stats as ``{(gamemode, platform): {hero: {stat_key: PendingStat}}}``."""
+    groups = {}
+    for (hero, stat_key, gamemode, platform), stat in pending.items():
+        groups.setdefault((gamemode, platform), {}).setdefault(hero, {})[stat_key] = stat
+    return groups
+
+
+def _locked_rows(model, gamemode, platform, heroes):
+    rows = model.objects.select_for_update().filter(gamemode=gamemode, platform=platform, hero__in=list(heroes))
+    return {(row.hero, row.stat_key): row for row in rows}
+
+
+def _merge_into_distributions(pending):
+    for (gamemode, platform), heroes in _group_pending(pending).items():
+        existing = _locked_rows(StatDistribution, gamemode, platform, heroes)
+        to_create, to_update = [], []
+        for hero, stats in heroes.items():
+            for stat_key, stat in stats.items():
+                if stat.sketch is None:
+                    continue
+                sketch = stat.sketch
+                row = existing.get((hero, stat_key))
+                if row is None:
+                    row = StatDistribution(hero=hero, stat_key=stat_key, gamemode=gamemode, platform=platform)
+                    to_create.append(row)
+                else:
+                    sketch = KLLSketch.from_bytes(row.sketch).merge(sketch)
+                    to_update.append(row)
+                row.sketch = sketch.to_bytes()
+                row.sample_count = sketch.count
+                row.quantiles = QuantileTable.from_sketch(sketch).values
+        StatDistribution.objects.bulk_create(to_create)
+        # bulk_update skips auto_now, so rows are saved one by one to keep updated_at current
+        for row in to_update:
+            row.save(update_fields=['sketch', 'sample_count', 'quantiles', 'updated_at'])
+
+
+def _mark_recorded(snapshot_states):
+    """Store which snapshots' values are now part of the moments."""
+    for recorded in (True, False):
+        ids = [snapshot_id for snapshot_id, state in snapshot_states.items() if state is recorded]
+        if ids:
+            PlayerStatsSnapshot.objects.filter(pk__in=ids).update(recorded=recorded)
+
+
+def _merge_into_moments(pending):
+    for (gamemode, platform), heroes in _group_pending(pending).items():
+        existing = _locked_rows(StatMoments, gamemode, platform, heroes)
+        to_create, to_update = [], []
+        for hero, stats in heroes.items():
+            for stat_key, stat in stats.items():
+                row = existing.get((hero, stat_key))
+                if row is None:
+                    row = StatMoments(hero=hero, stat_key=stat_key, gamemode=gamemode, platform=platform)
+                    to_create.append(row)
+                else:
+                    to_update.append(row)
+                moments = RunningMoments(row.count, row.mean, row.m2).merge(stat.added).subtract(stat.removed)
+                row.count, row.mean, row.m2 = moments.count, moments.mean, moments.m2
+        StatMoments.objects.bulk_create(to_create)
+        for row in to_update:
+            row.save(update_fields=['count', 'mean', 'm2', 'updated_at'])
+
+
+class DistributionIndex:
+    """In-process cache of hero populations, loaded per (hero, gamemode, platform).
+
+    Each group maps to ``(tables, moments)``: ``{stat_key: QuantileTable}`` and
+    ``{stat_key: RunningMoments}``.
+    """
+
+    def __init__(self, ttl=300, clock=time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self._groups = {}
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def group(self, hero, gamemode, platform):
+        """Return ``(tables, moments)`` for one hero, loading them if needed."""
+        group = (hero, gamemode, platform)
+        cached = self._groups.get(group)
+        if cached is not None and self.clock() - cached[0] < self.ttl:
+            return cached[1]
+        filters = {'hero': hero, 'gamemode': gamemode, 'platform': platform}
+        tables = {
+            stat_key: QuantileTable(quantiles, sample_count)
+            for stat_key, quantiles, sample_count in StatDistribution.objects.filter(**filters).values_list(
+                'stat_key', 'quantiles', 'sample_count',
+            )
+        }
+        moments = {
+            stat_key: RunningMoments(count, mean, m2)
+            for stat_key, count, mean, m2 in StatMoments.objects.filter(**filters).values_list(
+                'stat_key', 'count', 'mean', 'm2',
+            )
+        }
+        with self._lock:
+            self._groups[group] = (self.clock(), (tables, moments))
+        return tables, moments
+
+    def tables(self, hero, gamemode, platform):
+        """Return ``{stat_key: QuantileTable}`` for one hero."""
+        return self.group(hero, gamemode, platform)[0]
+
+    def version(self, gamemode, platform):
+        """Return a token that changes whenever any distribution for a gamemode and platform does."""
+        cached = self._versions.get((gamemode, platform))
+        if cached is not None and self.clock() - cached[0] < self.ttl:
+            return cached[1]
+        filters = {'gamemode': gamemode, 'platform': platform}
+        updated = [
+            model.objects.filter(**filters).aggregate(updated=Max('updated_at'))['updated']
+            for model in (StatDistribution, StatMoments)
+        ]
+        version = ':'.join(value.isoformat() if value else '' for value in updated)
+        with self._lock:
+            self._versions[(gamemode, platform)] = (self.clock(), version)
+        return version
+
+    def invalidate(self, groups=None):
+        with self._lock:
+            if groups is None:
+                self._groups.clear()
+                self._versions.clear()
+            for group in groups or ():
+                self._groups.pop(group, None)
+                self._versions.pop(group[1:], None)
+
+
+class PopulationLookup:
+    """Percentiles and z-scores of stat values against one hero's population."""
+
+    def __init__(self, tables, moments, min_samples):
+        self.tables = tables
+        self.moments = moments
+        self.min_samples = min_samples
+
+    def percentile(self, stat_key, value):
+        """Return the value's percentile rank (0-100), or None without enough samples."""
+        table = self.tables.get(stat_key)
+        if table is None or table.count < self.min_samples:
+            return None
+        return table.percentile(value)
+
+    def normalize(self, stat_key, value):
+        """Return the value's percentile rank as a 0-1 fraction, or None."""
+        percentile = self.percentile(stat_key, value)
+        return None if percentile is None else percentile / 100
+
+    def z_score(self, stat_key, value):
+        """Return the value's standard score, or None without enough samples or spread."""
+        moments = self.moments.get(stat_key)
+        if moments is None or moments.count < self.min_samples:
+            return None
+        z_score = moments.z_score(value)
+        return None if z_score is None else round(z_score, 3)
+
+    def normalize_z(self, stat_key, value):
+        """Return the value's z-score mapped onto 0-1 through the normal CDF, or None."""
+        z_score = self.z_score(stat_key, value)
+        return None if z_score is None else 0.5 * (1 + math.erf(z_score / math.sqrt(2)))
+
+
+def population_lookup(hero, gamemode, platform):
+    """Return a PopulationLookup for a hero, or None if population stats are unavailable."""
+    if not population_enabled():
+        return None
+    try:
+        tables, moments = get_distribution_index().group(hero, gamemode, platform)
+    except DatabaseError:
+        logger.exception("Failed to load population distributions for %s", hero)
+        return None
+    return PopulationLookup(tables, moments, _min_samples())
+
+
+def population_version(gamemode, platform):
+    """Version token of the population used to normalize comparisons ('' when unavailable)."""
+    if not population_enabled():
+        return ''
+    try:
+        return get_distribution_index().version(gamemode, platform)
+    except DatabaseError:
+        logger.exception("Failed to load population version")
+        return ''
+
+
+_recorder = None
+_index = None
+_state_lock = threading.Lock()
+
+
+def get_population_recorder():
+    global _recorder
+    if _recorder is None:
+        with _state_lock:
+            if _recorder is None:
+                _recorder = PopulationRecorder(
+                    flush_samples=getattr(settings, 'OVERFAST_POPULATION_FLUSH_SAMPLES', 2000),
+                    flush_interval=getattr(settings, 'OVERFAST_POPULATION_FLUSH_INTERVAL', 60),
+                )
+    return _recorder
+
+
+def get_distribution_index():
+    global _index
+    if _index is None:
+        with _state_lock:
+            if _index is None:
+                _index = DistributionIndex(ttl=getattr(settings, 'OVERFAST_POPULATION_REFRESH', 300))
+    return _index
+
+
+def reset_population():
+    """Drop pending samples and cached distributions (used by tests and after settings changes)."""
+    global _recorder, _index
+    with _state_lock:
+        _recorder = None
+        _index = None
+
+
+def record_payload(parsed, gamemode, platform, previous=None):
+    """Feed a new or changed payload into the population, returning True if a flush is due."""
+    if not population_enabled():
+        return False
+    return get_population_recorder().record(parsed, gamemode, platform, previous)
+
+
+def record_snapshot(snapshot, parsed):
+    """Feed a newly stored snapshot, replacing the player's previous snapshot in the moments.
+
+    The previous payload is only taken out if its values were recorded (its
+    ``recorded`` flag, or still pending here); snapshots stored before the
+    moments existed never were.
+    """
+    if not population_enabled():
+        return False
+    recorder = get_population_recorder()
+    try:
+        previous = snapshots.get_previous_snapshot(snapshot)
+    except DatabaseError:
+        logger.exception("Failed to load previous snapshot for %s", snapshot.battletag)
+        previous = None
+    previous_id = None
+    if previous is not None and (previous.recorded or recorder.is_recording(previous.pk)):
+        previous_id = previous.pk
+        previous = ParsedPlayerStats(previous.get_payload())
+    else:
+        previous = None
+    return recorder.record(
+        parsed, snapshot.gamemode, snapshot.platform, previous, snapshot_id=snapshot.pk, previous_id=previous_id
+    )
+
+
+def flush_population():
+    """Flush pending samples to the database, logging rather than raising."""
+    try:
+        return get_population_recorder().flush()
+    except Exception:
+        logger.exception("Population flush failed")
+        return 0
+
+
+def rebuild_population(batch_size=500):
+    """Recompute every distribution and moment from the latest snapshot of each player.
+
+    Only those snapshots are flagged as recorded afterwards. Returns the number
+    of snapshots read.
+    """
+    recorder = PopulationRecorder(flush_samples=math.inf, flush_interval=math.inf)
+    with transaction.atomic():
+        StatDistribution.objects.all().delete()
+        StatMoments.objects.all().delete()
+        PlayerStatsSnapshot.objects.filter(recorded=True).update(recorded=False)
+        players = 0
+        for snapshot in snapshots.iter_latest_snapshots(chunk_size=batch_size):
+            recorder.record(
+                ParsedPlayerStats(snapshot.get_payload()), snapshot.gamemode, snapshot.platform,
+                snapshot_id=snapshot.pk,
+            )
+            players += 1
+            if players % batch_size == 0:
+                recorder.flush()
+        recorder.flush()
+    get_distribution_index().invalidate()
+    return players
@@ -0,0 +1,52 @@
+"""
+Process-wide interning of stat keys, labels and category names.
+
+Every distinct string seen in an OverFast payload is stored once and referred
+to by a small integer id, so cached player stats can be held as compact numeric
+arrays instead of trees of dicts and strings. Id 0 is reserved to mean
+"absent".
+"""
+
+import threading
+
+ABSENT = 0
+
+
+class StatRegistry:
+    """Thread-safe two-way mapping between interned values and integer ids."""
+
+    def __init__(self):
+        self._ids = {}
+        self._values = [None]
+        self._lock = threading.Lock()
+
+    def intern(self, value):
+        """Return the id for a value, registering it on first sight."""
+        value_id = self._ids.get(value)
+        if value_id is None:
+            with self._lock:
+                value_id = self._ids.get(value)
+                if value_id is None:
+                    value_id = len(self._values)
+                    self._values.append(value)
+                    self._ids[value] = value_id
+        return value_id
+
+    def lookup(self, value):
+        """Return the id for a value without registering it (ABSENT if unknown)."""
+        return self._ids.get(value, ABSENT)
+
+    def value(self, value_id):
+        """Return the value for an id."""
+        return self._values[value_id]
+
+    def __len__(self):
+        return len(self._values) - 1
+
+
+STAT_REGISTRY = StatRegistry()
+
+
+def intern_stat_key(key):
+    """Return the registry id for a stat key."""
+    return STAT_REGISTRY.intern(key)
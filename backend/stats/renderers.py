@@ -0,0 +1,50 @@
+"""
+Fast JSON rendering for the stats API.
+
+Responses are encoded with orjson when it is installed and with the standard
+library otherwise; either way the output is compact UTF-8 bytes and types the
+stdlib cannot encode (dates, decimals, NumPy scalars, ...) are handled by DRF's
+encoder. Comparison results are encoded once with ``dumps`` and the bytes are
+both cached and sent, so cache hits are served without re-encoding.
+"""
+
+import json
+
+from django.http import HttpResponse
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+JSON_CONTENT_TYPE = 'application/json'
+
+_encoder = JSONEncoder()
+
+
+def dumps(data):
+    """Encode ``data`` as compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(data, default=_encoder.default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def json_response(body, status=200):
+    """Wrap already-encoded JSON bytes in a response without touching them."""
+    return HttpResponse(body, status=status, content_type=JSON_CONTENT_TYPE)
+
+
+class FastJSONRenderer(BaseRenderer):
+    """DRF renderer using ``dumps`` instead of the stdlib-based JSONRenderer."""
+
+    media_type = JSON_CONTENT_TYPE
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return dumps(data)
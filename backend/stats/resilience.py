@@ -0,0 +1,193 @@
+"""
+Rate limiting and circuit breaking for outbound OverFast calls.
+
+``TokenBucket`` spaces requests out to a steady rate with a burst allowance
+and can be paused, e.g. for the duration of a 429's ``Retry-After``.
+``CircuitBreaker`` stops calling an upstream that keeps failing: after
+``failure_threshold`` consecutive failures it opens and rejects calls
+immediately, and after ``recovery_timeout`` seconds lets a single trial call
+through (half-open) to decide whether to close again.
+
+Both are thread-safe and keep counters for monitoring; the sync and async
+clients in ``stats.upstream`` and ``stats.async_upstream`` share one of each
+per worker process.
+"""
+
+import asyncio
+import threading
+import time
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class UpstreamUnavailable(Exception):
+    """Raised instead of calling upstream when the breaker is open or no rate-limit token is available in time."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at ``rate`` tokens per second up to ``capacity``."""
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = float(capacity)
+        self.updated = clock()
+        self.paused_until = 0.0
+        self.granted = 0
+        self.delayed = 0
+        self.rejected = 0
+        self.pauses = 0
+        self._lock = threading.Lock()
+
+    def _take(self, max_wait):
+        """Take a token if one is available now; otherwise return the seconds to wait, or None if too long."""
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if now < self.paused_until:
+                wait = self.paused_until - now
+            elif self.tokens >= 1:
+                self.tokens -= 1
+                self.granted += 1
+                return 0.0
+            else:
+                wait = (1 - self.tokens) / self.rate
+            if wait > max_wait:
+                self.rejected += 1
+                return None
+            return wait
+
+    def acquire(self, max_wait=0.0):
+        """Block until a token is taken and return True, or return False if that takes over ``max_wait`` seconds."""
+        deadline = self.clock() + max_wait
+        waited = False
+        while True:
+            wait = self._take(max(deadline - self.clock(), 0.0))
+            if wait is None:
+                return False
+            if wait == 0.0:
+                if waited:
+                    self._count_delayed()
+                return True
+            waited = True
+            time.sleep(wait)
+
+    async def aacquire(self, max_wait=0.0):
+        """Async version of ``acquire`` that sleeps on the event loop."""
+        deadline = self.clock() + max_wait
+        waited = False
+        while True:
+            wait = self._take(max(deadline - self.clock(), 0.0))
+            if wait is None:
+                return False
+            if wait == 0.0:
+                if waited:
+                    self._count_delayed()
+                return True
+            waited = True
+            await asyncio.sleep(wait)
+
+    def _count_delayed(self):
+        with self._lock:
+            self.delayed += 1
+
+    def pause(self, seconds):
+        """Hand out no tokens for ``seconds`` (and start empty afterwards)."""
+        with self._lock:
+            now = self.clock()
+            self.paused_until = max(self.paused_until, now + seconds)
+            self.tokens = 0.0
+            self.updated = self.paused_until
+            self.pauses += 1
+
+    def stats(self):
+        with self._lock:
+            now = self.clock()
+            return {
+                "rate": self.rate,
+                "capacity": self.capacity,
+                "tokens": round(min(self.capacity, self.tokens + max(now - self.updated, 0) * self.rate), 2),
+                "paused_for": round(max(self.paused_until - now, 0.0), 2),
+                "granted": self.granted,
+                "delayed": self.delayed,
+                "rejected": self.rejected,
+                "pauses": self.pauses,
+            }
+
+
+class CircuitBreaker:
+    """Thread-safe closed/open/half-open circuit breaker counting consecutive failures."""
+
+    def __init__(self, failure_threshold, recovery_timeout, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.clock = clock
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+        self.times_opened = 0
+        self._lock = threading.Lock()
+
+    def _refresh_state(self, now):
+        if self.state == OPEN and now - self.opened_at >= self.recovery_timeout:
+            self.state = HALF_OPEN
+            self.trial_in_flight = False
+
+    def available(self):
+        """Return True if a call could currently be allowed, without claiming the half-open trial."""
+        with self._lock:
+            self._refresh_state(self.clock())
+            return self.state == CLOSED or (self.state == HALF_OPEN and not self.trial_in_flight)
+
+    def allow(self):
+        """Return True if a call may go upstream; in half-open state only one trial call is let through."""
+        with self._lock:
+            self._refresh_state(self.clock())
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.successes += 1
+            self.consecutive_failures = 0
+            self.state = CLOSED
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.times_opened += 1
+                self.state = OPEN
+                self.opened_at = self.clock()
+                self.trial_in_flight = False
+
+    def stats(self):
+        with self._lock:
+            now = self.clock()
+            self._refresh_state(now)
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "retry_in": round(max(self.opened_at + self.recovery_timeout - now, 0.0), 2)
+                if self.state == OPEN else 0.0,
+                "successes": self.successes,
+                "failures": self.failures,
+                "rejected": self.rejected,
+                "times_opened": self.times_opened,
+            }
@@ -0,0 +1,87 @@
+"""
+Cache of computed comparison results, addressed by strong ETags.
+
+A comparison is a pure function of its request parameters, the two players'
+payload versions, how fresh each payload was and the population version used
+for normalization. The ETag is a hash of exactly those inputs, so it can be
+computed before any comparison work: a matching ``If-None-Match`` is answered
+with 304 straight away, and otherwise the result cached under the ETag is
+reused when present. Results are cached as the encoded JSON bytes that were
+sent, so a cache hit is served without encoding anything.
+"""
+
+import hashlib
+import json
+import threading
+
+from django.conf import settings
+
+from .cache import FRESH, MemoryStatsCache, make_stats_key
+from .population import population_version
+from .renderers import dumps
+
+
+def comparison_etag(view, lookups, player1_tag, player2_tag, hero_name, gamemode, platform, **options):
+    """Return the strong ETag for a comparison of two looked-up players.
+
+    The tags are hashed as given rather than as cache keys, because the body
+    echoes them: ``Alpha#1`` and ``Alpha-1`` share stats but not a response.
+    """
+    key1 = make_stats_key(player1_tag, gamemode, platform)
+    lookup1, lookup2 = lookups[player1_tag], lookups[player2_tag]
+    inputs = [
+        view, player1_tag, player2_tag, hero_name, key1[1], key1[2],
+        lookup1.parsed.version, lookup1.freshness, lookup2.parsed.version, lookup2.freshness,
+        population_version(key1[1], key1[2]), options,
+    ]
+    digest = hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+    return f'"{digest[:40]}"'
+
+
+def etag_matches(request, etag):
+    """Return True if the request's If-None-Match lists the ETag (or ``*``).
+
+    If-None-Match uses weak comparison, so ``W/`` tags added by response
+    compression still match.
+    """
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    candidates = [candidate.strip().removeprefix('W/') for candidate in header.split(',')]
+    return '*' in candidates or etag in candidates
+
+
+def get_cached_result(etag):
+    """Return the encoded result stored under an ETag, or None."""
+    entry, state = get_result_cache().get_entry(etag)
+    return entry.value if state == FRESH else None
+
+
+def store_result(etag, result):
+    """Encode a result, cache the bytes under its ETag and return them for the response."""
+    body = dumps(result)
+    get_result_cache().set(etag, body)
+    return body
+
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    global _result_cache
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                _result_cache = MemoryStatsCache(
+                    ttl=getattr(settings, 'OVERFAST_RESULT_CACHE_TTL', 300),
+                    max_entries=getattr(settings, 'OVERFAST_RESULT_CACHE_MAX_ENTRIES', 512),
+                    max_bytes=getattr(settings, 'OVERFAST_RESULT_CACHE_MAX_BYTES', 32 * 1024 * 1024),
+                )
+    return _result_cache
+
+
+def reset_result_cache():
+    global _result_cache
+    with _result_cache_lock:
+        _result_cache = None
@@ -0,0 +1,245 @@
+"""
+Vectorized scoring engine for the enhanced analysis.
+
+``EnhancedOverwatchService`` scores one player at a time by looping over stat
+dicts and looking up ``STAT_DEFINITIONS`` per stat. ``ScoringEngine`` compiles
+the definitions once into weight, direction and category-mask arrays and scores
+a whole players x stats matrix in a single NumPy pass, returning the same
+numbers as the per-dict functions. Population normalization is vectorized the
+same way, from per-column population moments.
+"""
+
+import math
+
+import numpy as np
+
+from .enhanced_analysis import PATTERN_CATEGORIES, ROLE_STATS, STAT_DEFINITIONS
+from .parsing import KIND_FLOAT, KIND_INT
+from .registry import intern_stat_key
+
+HIGHER_BETTER = 1.0
+LOWER_BETTER = -1.0
+NEUTRAL = 0.0
+
+_DIRECTIONS = {
+    'higher_better': HIGHER_BETTER,
+    'lower_better': LOWER_BETTER,
+}
+
+# Z-scores in thousandths covered by the CDF table; beyond +-8 the CDF is 0 or 1 to double precision
+Z_TABLE_LIMIT = 8000
+_cdf_table = None
+
+
+def _normal_cdf_table():
+    """Normal CDF at every z-score step of 0.001 in [-8, 8]."""
+    global _cdf_table
+    if _cdf_table is None:
+        _cdf_table = np.array([
+            0.5 * (1 + math.erf(step / 1000 / math.sqrt(2)))
+            for step in range(-Z_TABLE_LIMIT, Z_TABLE_LIMIT + 1)
+        ])
+    return _cdf_table
+
+
+class ScoringEngine:
+    """Scores matrices of players x stats against compiled stat definitions.
+
+    Columns are the defined stats followed by any extra role stats; a matrix
+    holds NaN where a player has no numeric value for a stat.
+    """
+
+    def __init__(self, stat_definitions=None, role_stats=None, pattern_categories=None):
+        stat_definitions = STAT_DEFINITIONS if stat_definitions is None else stat_definitions
+        role_stats = ROLE_STATS if role_stats is None else role_stats
+        pattern_categories = PATTERN_CATEGORIES if pattern_categories is None else pattern_categories
+
+        self.keys = list(stat_definitions)
+        for keys in role_stats.values():
+            self.keys.extend(key for key in keys if key not in self.keys)
+        self.columns = {key: position for position, key in enumerate(self.keys)}
+        self.columns_by_stat_id = {intern_stat_key(key): position for key, position in self.columns.items()}
+        # Registry ids in sorted order with their columns, for searchsorted lookups
+        stat_ids = np.fromiter(self.columns_by_stat_id, dtype=np.uintc)
+        order = np.argsort(stat_ids)
+        self.sorted_stat_ids = stat_ids[order]
+        self.sorted_positions = np.fromiter(self.columns_by_stat_id.values(), dtype=np.intp)[order]
+
+        width = len(self.keys)
+        self.defined = np.zeros(width, dtype=bool)
+        self.weights = np.zeros(width)
+        self.directions = np.zeros(width)
+        for key, stat_def in stat_definitions.items():
+            position = self.columns[key]
+            self.defined[position] = True
+            self.weights[position] = stat_def.weight
+            self.directions[position] = _DIRECTIONS.get(stat_def.stat_type, NEUTRAL)
+
+        self.category_masks = {
+            category: np.array([
+                key in stat_definitions and stat_definitions[key].category == category
+                for key in self.keys
+            ])
+            for category in pattern_categories
+        }
+        self.role_masks = {
+            role: np.isin(np.arange(width), [self.columns[key] for key in keys])
+            for role, keys in role_stats.items()
+        }
+
+    def empty_matrix(self, rows):
+        return np.full((rows, len(self.keys)), np.nan)
+
+    def matrix_from_heroes(self, heroes):
+        """Build a players x stats matrix from ParsedHeroStats, straight from their arrays."""
+        matrix = self.empty_matrix(len(heroes))
+        known_ids, known_positions = self.sorted_stat_ids, self.sorted_positions
+        for row, hero in enumerate(heroes):
+            if hero is None or not len(hero.stat_ids):
+                continue
+            stat_ids = np.frombuffer(hero.stat_ids, dtype=np.uintc)
+            kinds = np.frombuffer(hero.kinds, dtype=np.uint8)
+            found = np.minimum(np.searchsorted(known_ids, stat_ids), len(known_ids) - 1)
+            wanted = (known_ids[found] == stat_ids) & ((kinds == KIND_INT) | (kinds == KIND_FLOAT))
+            matrix[row, known_positions[found[wanted]]] = np.frombuffer(hero.values, dtype=np.float64)[wanted]
+        return matrix
+
+    def _compile_population(self, lookup):
+        """Per-column means and standard deviations of a PopulationLookup's moments.
+
+        Stats without enough samples or spread are NaN.
+        """
+        mean = np.full(len(self.keys), np.nan)
+        std_dev = np.full(len(self.keys), np.nan)
+        for key, moments in (lookup.moments.items() if lookup is not None else ()):
+            position = self.columns.get(key)
+            if position is None or moments.count < lookup.min_samples or moments.std_dev <= 0:
+                continue
+            mean[position] = moments.mean
+            std_dev[position] = moments.std_dev
+        return mean, std_dev
+
+    def _compile_populations(self, lookups):
+        """Stack the compiled populations of each row, compiling a shared lookup once."""
+        compiled = {}
+        rows = []
+        for lookup in lookups:
+            if id(lookup) not in compiled:
+                compiled[id(lookup)] = self._compile_population(lookup)
+            rows.append(compiled[id(lookup)])
+        return [np.stack(parts) for parts in zip(*rows)]
+
+    def z_matrix(self, matrix, lookups):
+        """Population z-scores of every cell mapped onto 0-1 (PopulationLookup.normalize_z).
+
+        ``lookups`` holds one PopulationLookup or None per row; cells without a
+        z-score are NaN. Z-scores are rounded to three decimals as in
+        PopulationLookup.z_score, so the normal CDF is read from a table of those steps.
+        """
+        normalized = self.empty_matrix(len(matrix))
+        if not len(matrix):
+            return normalized
+        mean, std_dev = self._compile_populations(lookups)
+        known = ~np.isnan(matrix) & ~np.isnan(mean)
+        steps = np.rint((matrix[known] - mean[known]) / std_dev[known] * 1000)
+        normalized[known] = _normal_cdf_table()[np.clip(steps, -Z_TABLE_LIMIT, Z_TABLE_LIMIT).astype(np.intp) + Z_TABLE_LIMIT]
+        return normalized
+
+    def weighted_scores(self, matrix, normalized=None):
+        """Vectorized ``EnhancedOverwatchService.calculate_weighted_score`` for every row.
+
+        ``normalized`` is an optional matrix from z_matrix; its NaN cells fall back
+        to the fixed scaling.
+        """
+        present = ~np.isnan(matrix) & self.defined
+        fixed = np.minimum(np.nan_to_num(matrix) / 1000, 1.0)
+        normalized = fixed if normalized is None else np.where(np.isnan(normalized), fixed, normalized)
+        components = np.where(
+            self.directions == HIGHER_BETTER, normalized,
+            np.where(self.directions == LOWER_BETTER, 1 - normalized, 0.5),
+        ) * self.weights
+        total_score = np.where(present, components, 0.0).sum(axis=1)
+        total_weight = np.where(present, self.weights, 0.0).sum(axis=1)
+        return np.divide(total_score, total_weight, out=np.zeros(len(matrix)), where=total_weight > 0)
+
+    def role_effectiveness(self, matrix, hero_role, normalized=None):
+        """Vectorized ``EnhancedOverwatchService.calculate_role_effectiveness`` for every row.
+
+        ``normalized`` works as in weighted_scores, falling back to the fixed /100 scaling.
+        """
+        mask = self.role_masks.get(hero_role)
+        if mask is None:
+            return np.zeros(len(matrix))
+        present = ~np.isnan(matrix) & mask
+        fixed = np.minimum(np.nan_to_num(matrix) / 100, 1.0)
+        normalized = fixed if normalized is None else np.where(np.isnan(normalized), fixed, normalized)
+        components = np.where(present, normalized, 0.0)
+        counts = present.sum(axis=1)
+        return np.divide(components.sum(axis=1), counts, out=np.zeros(len(matrix)), where=counts > 0)
+
+    def category_scores(self, matrix1, matrix2):
+        """Per-category weighted win totals and stat counts for row-aligned pairs.
+
+        Returns ``{category: (player1_scores, player2_scores, stat_counts)}``.
+        """
+        present = ~np.isnan(matrix1)
+        values1 = np.nan_to_num(matrix1)
+        # A stat missing for player 2 counts as 0, matching stats2.get(key, 0)
+        values2 = np.nan_to_num(matrix2)
+        higher = self.directions == HIGHER_BETTER
+        lower = self.directions == LOWER_BETTER
+        p1_wins = (higher & (values1 > values2)) | (lower & (values1 < values2))
+        p2_wins = (higher & (values2 > values1)) | (lower & (values2 < values1))
+
+        scores = {}
+        for category, mask in self.category_masks.items():
+            counted = present & mask
+            scores[category] = (
+                np.where(counted & p1_wins, self.weights, 0.0).sum(axis=1),
+                np.where(counted & p2_wins, self.weights, 0.0).sum(axis=1),
+                counted.sum(axis=1),
+            )
+        return scores
+
+    def performance_patterns(self, matrix1, matrix2):
+        """Vectorized ``EnhancedOverwatchService.analyze_performance_pattern`` for every pair."""
+        scores = self.category_scores(matrix1, matrix2)
+        patterns = []
+        for row in range(len(matrix1)):
+            analysis = {
+                'dominant_categories': [],
+                'close_categories': [],
+                'improvement_areas': [],
+                'overall_assessment': ''
+            }
+            for category, (p1_scores, p2_scores, counts) in scores.items():
+                total_possible = int(counts[row])
+                if total_possible == 0:
+                    continue
+                p1_score = float(p1_scores[row])
+                p2_score = float(p2_scores[row])
+                margin = abs(p1_score - p2_score) / total_possible
+                if margin > 0.3:
+                    analysis['dominant_categories'].append({
+                        'category': category,
+                        'winner': 'player1' if p1_score > p2_score else 'player2',
+                        'margin': margin
+                    })
+                else:
+                    analysis['close_categories'].append({
+                        'category': category,
+                        'margin': margin
+                    })
+            patterns.append(analysis)
+        return patterns
+
+
+_engine = None
+
+
+def get_scoring_engine():
+    """Return the shared engine compiled from STAT_DEFINITIONS."""
+    global _engine
+    if _engine is None:
+        _engine = ScoringEngine()
+    return _engine
@@ -0,0 +1,225 @@
+"""
+Mergeable streaming summaries of stat distributions.
+
+``KLLSketch`` is a compact KLL sketch (Karnin, Lang & Liberty, 2016): it keeps
+a bounded number of samples per level regardless of how many values it has
+seen, and two sketches built on different workers can be merged into one that
+summarizes both streams. ``QuantileTable`` freezes a sketch into a fixed grid of
+percentiles so percentile lookups take constant time. ``RunningMoments`` keeps
+a count, mean and sum of squared deviations that can be merged, and unlike a
+sketch can also have values taken back out.
+"""
+
+import bisect
+import json
+import math
+import random
+import zlib
+
+
+class KLLSketch:
+    """Streaming quantile sketch with bounded memory and mergeable state."""
+
+    def __init__(self, k=200, c=2 / 3):
+        self.k = k
+        self.c = c
+        self.compactors = []
+        self.count = 0
+        self.min = None
+        self.max = None
+        self._size = 0
+        self._max_size = 0
+        self._grow()
+
+    def _grow(self):
+        self.compactors.append([])
+        self._max_size = sum(self._capacity(height) for height in range(len(self.compactors)))
+
+    def _capacity(self, height):
+        depth = len(self.compactors) - height - 1
+        return int(math.ceil((self.c ** depth) * self.k)) + 1
+
+    def update(self, value):
+        """Add one value to the sketch."""
+        value = float(value)
+        self.compactors[0].append(value)
+        self.count += 1
+        self._size += 1
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        if self._size >= self._max_size:
+            self._compress()
+
+    def _compact(self, height):
+        items = sorted(self.compactors[height])
+        self.compactors[height] = []
+        if len(items) % 2:
+            # Keep one item back so the number of compacted items is even.
+            self.compactors[height].append(items.pop())
+        offset = random.randint(0, 1)
+        return items[offset::2]
+
+    def _compress(self):
+        for height in range(len(self.compactors)):
+            if len(self.compactors[height]) >= self._capacity(height):
+                if height + 1 >= len(self.compactors):
+                    self._grow()
+                self.compactors[height + 1].extend(self._compact(height))
+                self._size = sum(len(compactor) for compactor in self.compactors)
+                if self._size < self._max_size:
+                    break
+
+    def merge(self, other):
+        """Fold another sketch into this one."""
+        while len(self.compactors) < len(other.compactors):
+            self._grow()
+        for height, items in enumerate(other.compactors):
+            self.compactors[height].extend(items)
+        self.count += other.count
+        for bound in (other.min, other.max):
+            if bound is not None:
+                self.min = bound if self.min is None else min(self.min, bound)
+                self.max = bound if self.max is None else max(self.max, bound)
+        self._size = sum(len(compactor) for compactor in self.compactors)
+        while self._size >= self._max_size:
+            self._compress()
+        return self
+
+    def _weighted_items(self):
+        items = sorted(
+            (value, 2 ** height)
+            for height, compactor in enumerate(self.compactors)
+            for value in compactor
+        )
+        return items, sum(weight for _, weight in items)
+
+    def quantiles(self, fractions):
+        """Return the estimated value at each fraction in ``fractions`` (0..1, ascending)."""
+        items, total_weight = self._weighted_items()
+        if not items:
+            return [None for _ in fractions]
+        results = []
+        cumulative = 0
+        position = 0
+        for fraction in fractions:
+            if fraction <= 0:
+                results.append(self.min)
+                continue
+            if fraction >= 1:
+                results.append(self.max)
+                continue
+            target = fraction * total_weight
+            while position < len(items) - 1 and cumulative + items[position][1] < target:
+                cumulative += items[position][1]
+                position += 1
+            results.append(items[position][0])
+        return results
+
+    def to_dict(self):
+        return {'k': self.k, 'c': self.c, 'count': self.count, 'min': self.min, 'max': self.max,
+                'compactors': self.compactors}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(k=data['k'], c=data['c'])
+        while len(sketch.compactors) < len(data['compactors']):
+            sketch._grow()
+        sketch.compactors = [list(items) for items in data['compactors']]
+        sketch.count = data['count']
+        sketch.min = data['min']
+        sketch.max = data['max']
+        sketch._size = sum(len(compactor) for compactor in sketch.compactors)
+        return sketch
+
+    def to_bytes(self):
+        return zlib.compress(json.dumps(self.to_dict(), separators=(',', ':')).encode('utf-8'))
+
+    @classmethod
+    def from_bytes(cls, blob):
+        return cls.from_dict(json.loads(zlib.decompress(bytes(blob))))
+
+
+PERCENTILE_GRID = [step / 100 for step in range(101)]
+
+
+class QuantileTable:
+    """Frozen percentile grid of a distribution for constant-time lookups."""
+
+    __slots__ = ('values', 'count')
+
+    def __init__(self, values, count):
+        self.values = values
+        self.count = count
+
+    @classmethod
+    def from_sketch(cls, sketch):
+        return cls(sketch.quantiles(PERCENTILE_GRID), sketch.count)
+
+    def percentile(self, value):
+        """Return the percentile rank (0-100) of a value within the distribution."""
+        if not self.values or self.values[0] is None:
+            return None
+        lower = bisect.bisect_left(self.values, value)
+        upper = bisect.bisect_right(self.values, value)
+        rank = (lower + upper) / 2
+        return round(min(max(rank - 0.5, 0), 100), 1)
+
+    def value_at(self, percentile):
+        """Return the value at a whole percentile (0-100)."""
+        return self.values[int(percentile)]
+
+
+class RunningMoments:
+    """Count, mean and variance maintained with Welford's update and Chan's parallel merge."""
+
+    __slots__ = ('count', 'mean', 'm2')
+
+    def __init__(self, count=0, mean=0.0, m2=0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def add(self, value):
+        """Add one value."""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def merge(self, other):
+        """Fold another set of moments into this one."""
+        if other.count == 0:
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        return self
+
+    def subtract(self, other):
+        """Take out moments previously merged into this one (the inverse of merge)."""
+        remaining = self.count - other.count
+        if remaining <= 0:
+            self.count, self.mean, self.m2 = 0, 0.0, 0.0
+            return self
+        mean = (self.count * self.mean - other.count * other.mean) / remaining
+        delta = other.mean - mean
+        self.m2 = max(self.m2 - other.m2 - delta * delta * remaining * other.count / self.count, 0.0)
+        self.mean = mean
+        self.count = remaining
+        return self
+
+    @property
+    def variance(self):
+        """Sample variance, or 0 with fewer than two values."""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std_dev(self):
+        return math.sqrt(self.variance)
+
+    def z_score(self, value):
+        """Standard score of a value, or None when the spread is zero."""
+        std_dev = self.std_dev
+        return (value - self.mean) / std_dev if std_dev > 0 else None
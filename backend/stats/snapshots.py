@@ -0,0 +1,155 @@
+"""
+Repository for persisted OverFast player-stats snapshots.
+
+Snapshots let restarted or newly started workers serve recent stats from the
+database before going back to OverFast. All reads and writes of
+PlayerStatsSnapshot go through the functions in this module.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .cache import make_stats_key
+from .models import PlayerStatsSnapshot
+
+logger = logging.getLogger(__name__)
+
+
+def snapshots_enabled():
+    return getattr(settings, 'OVERFAST_SNAPSHOTS_ENABLED', True)
+
+
+def get_latest_snapshot(battletag, gamemode='quickplay', platform='pc', max_age=None):
+    """Return the newest snapshot for a player, optionally no older than max_age seconds."""
+    formatted_tag, gamemode, platform = make_stats_key(battletag, gamemode, platform)
+    snapshots = PlayerStatsSnapshot.objects.filter(
+        battletag=formatted_tag, gamemode=gamemode, platform=platform,
+    )
+    if max_age is not None:
+        snapshots = snapshots.filter(fetched_at__gte=timezone.now() - timedelta(seconds=max_age))
+    return snapshots.order_by('-fetched_at').first()
+
+
+def save_snapshot(battletag, gamemode, platform, data):
+    """Store a freshly fetched payload and return ``(snapshot, created)``.
+
+    If the payload is identical to the player's latest snapshot, that row's
+    fetch time is bumped instead of storing a duplicate blob and ``created`` is
+    False.
+    """
+    formatted_tag, gamemode, platform = make_stats_key(battletag, gamemode, platform)
+    blob, payload_hash, payload_size = PlayerStatsSnapshot.encode_payload(data)
+    now = timezone.now()
+    with transaction.atomic():
+        latest = get_latest_snapshot(formatted_tag, gamemode, platform)
+        if latest is not None and latest.payload_hash == payload_hash:
+            latest.fetched_at = now
+            latest.save(update_fields=['fetched_at'])
+            return latest, False
+        snapshot = PlayerStatsSnapshot.objects.create(
+            battletag=formatted_tag,
+            gamemode=gamemode,
+            platform=platform,
+            fetched_at=now,
+            payload=blob,
+            payload_hash=payload_hash,
+            payload_size=payload_size,
+        )
+        return snapshot, True
+
+
+def snapshot_age(snapshot):
+    """Return how many seconds ago a snapshot was fetched."""
+    return (timezone.now() - snapshot.fetched_at).total_seconds()
+
+
+def load_snapshot(battletag, gamemode='quickplay', platform='pc', max_age=None):
+    """Return ``(payload, age, payload_hash)`` from the newest usable snapshot, or None.
+
+    Database errors are logged and treated as a miss so that a broken store never
+    prevents stats from being fetched upstream.
+    """
+    if not snapshots_enabled():
+        return None
+    try:
+        snapshot = get_latest_snapshot(battletag, gamemode, platform, max_age=max_age)
+        if snapshot is None:
+            return None
+        return snapshot.get_payload(), snapshot_age(snapshot), snapshot.payload_hash
+    except DatabaseError:
+        logger.exception("Failed to load stats snapshot for %s", battletag)
+        return None
+
+
+def store_snapshot(battletag, gamemode, platform, data):
+    """Persist a payload if snapshots are enabled, logging rather than raising on DB errors.
+
+    Returns ``(snapshot, created)`` like save_snapshot, or ``(None, False)`` when
+    nothing was stored.
+    """
+    if not snapshots_enabled():
+        return None, False
+    try:
+        return save_snapshot(battletag, gamemode, platform, data)
+    except DatabaseError:
+        logger.exception("Failed to store stats snapshot for %s", battletag)
+        return None, False
+
+
+def prune_snapshots(older_than_days=None, keep_latest=True):
+    """Delete snapshots older than the retention window and return how many were removed.
+
+    With keep_latest, the newest snapshot of each player is kept regardless of age
+    so stale-if-error fallbacks still have something to serve.
+    """
+    if older_than_days is None:
+        older_than_days = getattr(settings, 'OVERFAST_SNAPSHOT_RETENTION_DAYS', 30)
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    expired = PlayerStatsSnapshot.objects.filter(fetched_at__lt=cutoff)
+    if keep_latest:
+        stale_players = (
+            PlayerStatsSnapshot.objects
+            .values('battletag', 'gamemode', 'platform')
+            .annotate(latest_fetch=Max('fetched_at'))
+            .filter(latest_fetch__lt=cutoff)
+        )
+        keep = set()
+        for row in stale_players:
+            keep.update(
+                PlayerStatsSnapshot.objects.filter(
+                    battletag=row['battletag'], gamemode=row['gamemode'],
+                    platform=row['platform'], fetched_at=row['latest_fetch'],
+                ).values_list('pk', flat=True)
+            )
+        expired = expired.exclude(pk__in=keep)
+    deleted, _ = expired.delete()
+    return deleted
+
+
+def get_previous_snapshot(snapshot):
+    """Return the player's snapshot stored before the given one, or None."""
+    return (
+        PlayerStatsSnapshot.objects
+        .filter(
+            battletag=snapshot.battletag, gamemode=snapshot.gamemode, platform=snapshot.platform,
+            fetched_at__lt=snapshot.fetched_at,
+        )
+        .order_by('-fetched_at')
+        .first()
+    )
+
+
+def iter_latest_snapshots(chunk_size=500):
+    """Yield the newest snapshot of every player, streaming through the table once."""
+    snapshots = PlayerStatsSnapshot.objects.order_by('battletag', 'gamemode', 'platform', '-fetched_at')
+    previous_key = None
+    for snapshot in snapshots.iterator(chunk_size=chunk_size):
+        key = (snapshot.battletag, snapshot.gamemode, snapshot.platform)
+        if key != previous_key:
+            previous_key = key
+            yield snapshot
@@ -0,0 +1,125 @@
+"""
+In-memory shell for the React single-page app.
+
+Every non-API route serves the same ``index.html``. It is rendered once, when
+the WSGI/ASGI application starts, and kept as bytes together with its ETag,
+response headers and precompressed gzip/brotli variants, so a client-side
+route load only copies memory. With DEBUG on, the source file's mtime is
+checked on each request and the shell is reloaded when a new frontend build
+lands.
+"""
+
+import gzip
+import hashlib
+import os
+import threading
+
+from django.conf import settings
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template
+
+from . import middleware
+
+CONTENT_SECURITY_POLICY = (
+    "default-src 'self' 'unsafe-inline' 'unsafe-eval'; script-src 'self' 'unsafe-inline' 'unsafe-eval'; "
+    "style-src 'self' 'unsafe-inline';"
+)
+
+
+def fallback_paths():
+    """Build locations checked when index.html is not found as a template."""
+    return [
+        os.path.join(settings.BASE_DIR, 'frontend/build/index.html'),
+        os.path.join(settings.BASE_DIR, '../frontend/build/index.html'),
+    ]
+
+
+class SPAShell:
+    """The rendered shell and its precompressed variants, keyed by content coding (None is identity)."""
+
+    def __init__(self, body, source=None):
+        self.source = source
+        self.mtime = _mtime(source)
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self.bodies = {None: body, 'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+        if middleware.brotli is not None:
+            self.bodies['br'] = middleware.brotli.compress(body, quality=11)
+        base_headers = {
+            'Content-Type': 'text/html; charset=utf-8',
+            'X-Content-Type-Options': 'nosniff',
+            'Content-Security-Policy': CONTENT_SECURITY_POLICY,
+            # The shell references hashed assets, so it must be revalidated to pick up new builds
+            'Cache-Control': 'no-cache',
+            'Vary': 'Accept-Encoding',
+        }
+        self.headers = {}
+        for coding, variant in self.bodies.items():
+            headers = {**base_headers, 'Content-Length': str(len(variant))}
+            if coding is None:
+                headers['ETag'] = self.etag
+            else:
+                headers['ETag'] = f'W/{self.etag}'
+                headers['Content-Encoding'] = coding
+            self.headers[coding] = headers
+
+    def variant(self, accept_encoding):
+        """Return ``(body, headers)`` for the best encoding the client accepts."""
+        coding = middleware.negotiate_encoding(accept_encoding)
+        if coding not in self.bodies:
+            coding = 'gzip' if coding and 'gzip' in self.bodies else None
+        return self.bodies[coding], self.headers[coding]
+
+    def is_current(self):
+        """Return False if the source file changed since the shell was loaded."""
+        return self.source is None or _mtime(self.source) == self.mtime
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns if path else None
+    except OSError:
+        return None
+
+
+def load_spa_shell():
+    """Render index.html (as a template, or read from the build directory) into an SPAShell, or None."""
+    try:
+        template = get_template('index.html')
+    except TemplateDoesNotExist:
+        for path in fallback_paths():
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    return SPAShell(f.read(), path)
+        return None
+    origin = getattr(getattr(template, 'template', None), 'origin', None)
+    return SPAShell(template.render().encode('utf-8'), getattr(origin, 'name', None))
+
+
+_shell = None
+_shell_loaded = False
+_shell_lock = threading.Lock()
+
+
+def get_spa_shell():
+    """Return the cached shell (None if there is no frontend build), reloading it in DEBUG when it changed."""
+    global _shell, _shell_loaded
+    shell = _shell
+    if _shell_loaded and not (settings.DEBUG and (shell is None or not shell.is_current())):
+        return shell
+    with _shell_lock:
+        if _shell is shell:
+            _shell = load_spa_shell()
+            _shell_loaded = True
+        return _shell
+
+
+def preload_spa_shell():
+    """Load the shell while the application starts, so the first page view does not pay for it."""
+    get_spa_shell()
+
+
+def reset_spa_shell():
+    global _shell, _shell_loaded
+    with _shell_lock:
+        _shell = None
+        _shell_loaded = False
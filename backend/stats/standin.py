@@ -0,0 +1,247 @@
+"""
+Local stand-in for the OverFast ``/players/{player_id}/stats`` endpoint.
+
+Benchmarks, load tests and CI cannot depend on the live OverFast API, so this
+server answers the same requests from local data:
+
+* payloads recorded earlier (``recordings`` directory, one JSON file per
+  player, gamemode and platform), optionally recording misses from a real
+  upstream (``record_from``);
+* otherwise, deterministic synthetic payloads derived from the player id and a
+  seed, so every run sees the same data.
+
+Latency, a 5xx error rate, a 429 rate and an optional request-rate limit (also
+answered with 429 and ``Retry-After``, or with ``throttle_status`` such as 503)
+are configurable and seeded, which makes failure behavior reproducible too. Point the app at it with
+``OVERFAST_BASE_URL=http://127.0.0.1:<port>``; ``GET /__standin__/stats``
+returns the server's request counters.
+"""
+
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+from .overwatch_service import Hero
+from .resilience import TokenBucket
+
+STATS_PATH = re.compile(r'^/players/(?P<player_id>[^/]+)/stats/?$')
+COUNTERS_PATH = '/__standin__/stats'
+
+# (category, label, [(stat key, label, low, high)]) per synthetic hero; values are drawn per 10 minutes played
+SYNTHETIC_CATEGORIES = (
+    ('combat', 'Combat', [
+        ('eliminations', 'Eliminations', 8, 30),
+        ('deaths', 'Deaths', 3, 12),
+        ('final_blows', 'Final Blows', 3, 15),
+        ('damage_dealt', 'Damage Dealt', 3000, 12000),
+        ('objective_kills', 'Objective Kills', 2, 12),
+        ('objective_time', 'Objective Time', 40, 160),
+    ]),
+    ('assists', 'Assists', [
+        ('healing_done', 'Healing Done', 0, 12000),
+        ('damage_blocked', 'Damage Blocked', 0, 9000),
+    ]),
+)
+
+
+@dataclass
+class StandinConfig:
+    """Behavior of a stand-in server; rates are fractions of requests between 0 and 1."""
+
+    latency: float = 0.0  # Seconds added to every response
+    jitter: float = 0.0  # Up to this many extra seconds, uniformly drawn
+    error_rate: float = 0.0  # Answer 500
+    throttle_rate: float = 0.0  # Answer throttle_status with Retry-After
+    throttle_status: int = 429  # e.g. 503 for a maintenance window
+    rate_limit: Optional[float] = None  # Requests per second before answering 429
+    retry_after: int = 1
+    recordings: Optional[str] = None
+    record_from: Optional[str] = None
+    synthetic: bool = True
+    seed: int = 0
+
+
+def synthetic_payload(player_id, gamemode='quickplay', platform='pc', seed=0):
+    """Build a deterministic OverFast-shaped stats payload for a player."""
+    digest = hashlib.sha256(f'{seed}:{player_id}:{gamemode}:{platform}'.encode('utf-8')).digest()
+    rng = random.Random(digest)
+    heroes = rng.sample([hero.value for hero in Hero], k=rng.randint(3, 12))
+    payload = {}
+    for hero in sorted(heroes):
+        minutes = rng.randint(10, 3000)
+        tens = minutes / 10
+        games_played = max(minutes // 12, 1)
+        games_won = rng.randint(0, games_played)
+        categories = []
+        for category, label, stats in SYNTHETIC_CATEGORIES:
+            categories.append({
+                'category': category,
+                'label': label,
+                'stats': [
+                    {'key': key, 'label': stat_label, 'value': round(rng.uniform(low, high) * tens)}
+                    for key, stat_label, low, high in stats
+                ],
+            })
+        categories.append({
+            'category': 'best',
+            'label': 'Best',
+            'stats': [
+                {'key': 'eliminations_most_in_game', 'label': 'Eliminations - Most in Game', 'value': rng.randint(15, 60)},
+                {'key': 'weapon_accuracy', 'label': 'Weapon Accuracy', 'value': rng.randint(20, 60)},
+                {'key': 'critical_hit_accuracy', 'label': 'Critical Hit Accuracy', 'value': rng.randint(2, 30)},
+            ],
+        })
+        categories.append({
+            'category': 'game',
+            'label': 'Game',
+            'stats': [
+                {'key': 'time_played', 'label': 'Time Played', 'value': minutes * 60},
+                {'key': 'games_played', 'label': 'Games Played', 'value': games_played},
+                {'key': 'games_won', 'label': 'Games Won', 'value': games_won},
+                {'key': 'games_lost', 'label': 'Games Lost', 'value': games_played - games_won},
+                {'key': 'win_percentage', 'label': 'Win Percentage', 'value': round(100 * games_won / games_played)},
+            ],
+        })
+        payload[hero] = categories
+    return payload
+
+
+def _slug(value):
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', value)
+
+
+def recording_path(recordings, player_id, gamemode, platform):
+    """Recording file for a request; every part is slugged, so query-string values cannot leave the directory."""
+    name = '__'.join(_slug(part) for part in (player_id, gamemode, platform))
+    return os.path.join(recordings, f'{name}.json')
+
+
+class StandinServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the stand-in's configuration, RNG and counters."""
+
+    daemon_threads = True
+
+    def __init__(self, address, config):
+        super().__init__(address, StandinHandler)
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.limiter = TokenBucket(config.rate_limit, max(config.rate_limit, 1)) if config.rate_limit else None
+        self.counters = {'requests': 0, 'ok': 0, 'not_found': 0, 'errors': 0, 'throttled': 0, 'recorded': 0}
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def draw(self):
+        """Return ``(delay, outcome)`` for the next request, with outcome None, 'error' or 'throttled'."""
+        config = self.config
+        with self._lock:
+            delay = config.latency + (self.rng.uniform(0, config.jitter) if config.jitter else 0.0)
+            roll = self.rng.random()
+        if roll < config.error_rate:
+            return delay, 'error'
+        if roll < config.error_rate + config.throttle_rate:
+            return delay, 'throttled'
+        if self.limiter is not None and not self.limiter.acquire():
+            return delay, 'throttled'
+        return delay, None
+
+    def load_payload(self, player_id, gamemode, platform):
+        """Return the recorded, freshly recorded or synthetic payload for a player, or None."""
+        config = self.config
+        path = recording_path(config.recordings, player_id, gamemode, platform) if config.recordings else None
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        if path and config.record_from:
+            try:
+                response = requests.get(
+                    f"{config.record_from.rstrip('/')}/players/{player_id}/stats",
+                    params={'gamemode': gamemode, 'platform': platform},
+                    timeout=30,
+                )
+            except requests.RequestException:
+                response = None
+            if response is not None and response.status_code == 200:
+                payload = response.json()
+                os.makedirs(config.recordings, exist_ok=True)
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump(payload, f)
+                self.count('recorded')
+                return payload
+        if config.synthetic:
+            return synthetic_payload(player_id, gamemode, platform, config.seed)
+        return None
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    server_version = 'OverFastStandin/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == COUNTERS_PATH:
+            with self.server._lock:
+                return self.send_json(200, dict(self.server.counters))
+        match = STATS_PATH.match(url.path)
+        if match is None:
+            return self.send_json(404, {'error': 'Not found'})
+
+        self.server.count('requests')
+        delay, outcome = self.server.draw()
+        if delay:
+            time.sleep(delay)
+        if outcome == 'error':
+            self.server.count('errors')
+            return self.send_json(500, {'error': 'Injected upstream error'})
+        if outcome == 'throttled':
+            self.server.count('throttled')
+            return self.send_json(
+                self.server.config.throttle_status, {'error': 'Rate limited'},
+                headers={'Retry-After': str(self.server.config.retry_after)},
+            )
+
+        query = parse_qs(url.query)
+        gamemode = query.get('gamemode', ['quickplay'])[0]
+        platform = query.get('platform', ['pc'])[0]
+        payload = self.server.load_payload(match['player_id'], gamemode, platform)
+        if payload is None:
+            self.server.count('not_found')
+            return self.send_json(404, {'error': 'Player not found'})
+        self.server.count('ok')
+        return self.send_json(200, payload)
+
+    def send_json(self, status, body, headers=None):
+        content = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        # Keep benchmark output clean; counters are available at COUNTERS_PATH
+        pass
+
+
+def make_server(host='127.0.0.1', port=0, config=None):
+    """Create (but do not start) a stand-in server; port 0 picks a free port."""
+    return StandinServer((host, port), config or StandinConfig())
@@ -0,0 +1,96 @@
+"""
+Pre-start steps for a server boot: collect static files and apply migrations,
+each skipped when there is nothing to do.
+
+Static files are fingerprinted by the content of everything the staticfiles
+finders return plus the storage backend; collectstatic only runs when the
+fingerprint differs from the one recorded in STATIC_ROOT by the last run, so a
+container whose image already ran it at build time skips it. Pending
+migrations are detected in-process from the migration plan, without spawning
+``manage.py migrate``. Both steps run in the calling process, so the server
+that starts afterwards reuses the already-imported Django.
+"""
+
+import hashlib
+import os
+import time
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+
+FINGERPRINT_FILE = '.static-fingerprint'
+IGNORE_PATTERNS = ['CVS', '.*', '*~']
+
+
+def static_fingerprint():
+    """Hash the path and content of every static source file and the staticfiles storage backend."""
+    digest = hashlib.sha256(settings.STORAGES['staticfiles']['BACKEND'].encode('utf-8'))
+    sources = {}
+    for finder in finders.get_finders():
+        for path, storage in finder.list(IGNORE_PATTERNS):
+            # Like collectstatic, the first finder to provide a path wins
+            sources.setdefault(path, storage)
+    for path in sorted(sources):
+        digest.update(path.encode('utf-8') + b'\0')
+        with sources[path].open(path) as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _fingerprint_path():
+    return os.path.join(settings.STATIC_ROOT, FINGERPRINT_FILE)
+
+
+def collect_static_if_changed():
+    """Run collectstatic unless the static sources are unchanged since the last run; returns True if it ran."""
+    fingerprint = static_fingerprint()
+    try:
+        with open(_fingerprint_path(), encoding='utf-8') as f:
+            if f.read().strip() == fingerprint:
+                return False
+    except OSError:
+        pass
+    call_command('collectstatic', interactive=False, verbosity=0)
+    with open(_fingerprint_path(), 'w', encoding='utf-8') as f:
+        f.write(fingerprint)
+    return True
+
+
+def pending_migrations(database=DEFAULT_DB_ALIAS):
+    """Return the unapplied migrations for a database, in the order migrate would apply them."""
+    executor = MigrationExecutor(connections[database])
+    return [migration for migration, backwards in executor.migration_plan(executor.loader.graph.leaf_nodes())]
+
+
+def migrate_if_needed(database=DEFAULT_DB_ALIAS):
+    """Apply pending migrations in-process; returns how many were applied."""
+    pending = pending_migrations(database)
+    if pending:
+        call_command('migrate', database=database, interactive=False, verbosity=0)
+    return len(pending)
+
+
+def prepare(static=True, migrate=True, log=print):
+    """Run the enabled pre-start steps, logging how long each took; returns ``{phase: seconds}``."""
+    timings = {}
+    started = time.perf_counter()
+    if static:
+        phase_started = time.perf_counter()
+        outcome = 'collected' if collect_static_if_changed() else 'unchanged, skipped'
+        timings['collectstatic'] = time.perf_counter() - phase_started
+        log(f"collectstatic: {outcome} ({timings['collectstatic'] * 1000:.0f} ms)")
+    if migrate:
+        phase_started = time.perf_counter()
+        applied = migrate_if_needed()
+        outcome = f'applied {applied} migration(s)' if applied else 'up to date'
+        timings['migrate'] = time.perf_counter() - phase_started
+        log(f"migrate: {outcome} ({timings['migrate'] * 1000:.0f} ms)")
+        # The server process (or the workers it forks) opens its own connections
+        connections.close_all()
+    timings['total'] = time.perf_counter() - started
+    log(f"pre-start total: {timings['total'] * 1000:.0f} ms")
+    return timings
@@ -0,0 +1,34 @@
+"""Sample OverFast payloads shared by the stats tests."""
+
+
+def make_payload(eliminations=20, deaths=5, damage_dealt=8000, healing_done=6000, weapon_accuracy=35):
+    """Build a minimal OverFast /stats payload for ana and mercy."""
+    def categories():
+        return [
+            {
+                'category': 'combat',
+                'label': 'Combat',
+                'stats': [
+                    {'key': 'eliminations', 'label': 'Eliminations', 'value': eliminations},
+                    {'key': 'deaths', 'label': 'Deaths', 'value': deaths},
+                    {'key': 'damage_dealt', 'label': 'Damage Dealt', 'value': damage_dealt},
+                    {'key': 'weapon_accuracy', 'label': 'Weapon Accuracy', 'value': weapon_accuracy},
+                ],
+            },
+            {
+                'category': 'assists',
+                'label': 'Assists',
+                'stats': [
+                    {'key': 'healing_done', 'label': 'Healing Done', 'value': healing_done},
+                ],
+            },
+            {
+                'category': 'game',
+                'label': 'Game',
+                'stats': [
+                    {'key': 'time_played', 'label': 'Time Played', 'value': 3661},
+                    {'key': 'games_won', 'label': 'Games Won', 'value': 12},
+                ],
+            },
+        ]
+    return {'ana': categories(), 'mercy': categories()}
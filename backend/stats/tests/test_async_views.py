@@ -0,0 +1,143 @@
+import asyncio
+import json
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from stats import async_service, async_upstream
+from stats import cache as stats_cache
+from stats import results
+
+from .fixtures import make_payload
+
+
+@override_settings(OVERFAST_SNAPSHOTS_ENABLED=False)
+class AsyncViewsTestCase(SimpleTestCase):
+    def setUp(self):
+        stats_cache.reset_stats_cache()
+        results.reset_result_cache()
+        payloads = {'Alpha#1': make_payload(), 'Beta#2': make_payload(eliminations=10)}
+
+        async def fake_fetch(battletag, gamemode='quickplay', platform='pc'):
+            return payloads.get(battletag)
+
+        patcher = mock.patch.object(async_service, 'afetch_player_stats', side_effect=fake_fetch)
+        self.fetch = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        stats_cache.reset_stats_cache()
+        results.reset_result_cache()
+
+    async def post(self, url, body):
+        return await self.async_client.post(url, data=json.dumps(body), content_type='application/json')
+
+    async def test_heroes(self):
+        response = await self.async_client.get('/api/async/heroes/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn({'value': 'ana', 'label': 'Ana'}, response.json())
+
+    async def test_compare_players(self):
+        response = await self.post('/api/async/compare/', {'player1': 'Alpha#1', 'player2': 'Beta#2', 'hero': 'ana'})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['hero'], 'ana')
+        self.assertIn('enhanced_analysis', body)
+        self.assertEqual(body['data_freshness']['player1'], 'fresh')
+
+    async def test_matching_etag_returns_304(self):
+        body = {'player1': 'Alpha#1', 'player2': 'Beta#2', 'hero': 'ana'}
+        etag = (await self.post('/api/async/compare/', body))['ETag']
+        response = await self.async_client.post(
+            '/api/async/compare/', data=json.dumps(body), content_type='application/json', headers={'If-None-Match': etag},
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    async def test_summary(self):
+        response = await self.post('/api/async/summary/', {'player1': 'Alpha#1', 'player2': 'Beta#2', 'hero': 'ana'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('quick_summary', response.json())
+        self.assertNotIn('categories', response.json())
+
+    async def test_unknown_player_returns_404(self):
+        response = await self.post('/api/async/compare/', {'player1': 'Alpha#1', 'player2': 'Nobody#3', 'hero': 'ana'})
+        self.assertEqual(response.status_code, 404)
+
+    async def test_invalid_hero_returns_400(self):
+        response = await self.post('/api/async/compare/', {'player1': 'Alpha#1', 'player2': 'Beta#2', 'hero': 'nope'})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_get_not_allowed_on_compare(self):
+        response = await self.async_client.get('/api/async/compare/')
+        self.assertEqual(response.status_code, 405)
+
+    async def test_all_heroes_with_fields(self):
+        response = await self.post('/api/async/compare/', {
+            'player1': 'Alpha#1', 'player2': 'Beta#2', 'hero': 'all', 'detail': ['mercy'],
+            'fields': 'heroes.performance_scores,details.enhanced_analysis',
+        })
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual([hero['hero'] for hero in body['heroes']], ['ana', 'mercy'])
+        self.assertEqual(set(body['heroes'][0]), {'hero', 'performance_scores'})
+        self.assertEqual(set(body['details']['mercy']), {'hero', 'player1', 'player2', 'enhanced_analysis'})
+
+    async def test_top_k(self):
+        response = await self.post('/api/async/compare/', {
+            'player1': 'Alpha#1', 'player2': 'Beta#2', 'hero': 'ana', 'top_k': 2,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['top_k'], 2)
+        self.assertNotIn('categories', response.json())
+        response = await self.post('/api/async/compare/', {
+            'player1': 'Alpha#1', 'player2': 'Beta#2', 'hero': 'all', 'top_k': 2,
+        })
+        self.assertEqual(response.status_code, 400)
+
+    async def test_batch(self):
+        response = await self.post('/api/async/compare/batch/', {'jobs': [
+            {'player1': 'Alpha#1', 'player2': 'Beta#2', 'hero': 'ana'},
+            {'player1': 'Alpha#1', 'player2': 'Nobody#3', 'hero': 'ana'},
+            {'player1': 'Alpha#1', 'hero': 'ana'},
+        ]})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual([result['status'] for result in body['results']], [200, 404, 400])
+        self.assertEqual(body['players_fetched'], 3)
+        response = await self.post('/api/async/compare/batch/', {'jobs': 'nope'})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_client_kept_under_asgi(self):
+        with mock.patch.object(async_upstream, 'close_client') as close_client:
+            await self.async_client.get('/api/async/heroes/')
+        close_client.assert_not_called()
+
+    def test_client_closed_after_wsgi_request(self):
+        with mock.patch.object(async_upstream, 'close_client') as close_client:
+            response = self.client.post(
+                '/api/async/compare/', data=json.dumps({'player1': 'Alpha#1', 'player2': 'Beta#2', 'hero': 'ana'}),
+                content_type='application/json',
+            )
+        self.assertEqual(response.status_code, 200)
+        close_client.assert_awaited_once()
+
+    async def test_lifespan_shutdown_closes_client(self):
+        messages = iter([{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}])
+        sent = []
+
+        async def receive():
+            return next(messages)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        application = mock.AsyncMock()
+        with mock.patch.object(async_upstream, 'close_client') as close_client:
+            await async_upstream.with_client_lifespan(application)({'type': 'lifespan'}, receive, send)
+        self.assertEqual(sent, ['lifespan.startup.complete', 'lifespan.shutdown.complete'])
+        close_client.assert_awaited_once()
+        application.assert_not_called()
+
+    async def test_concurrent_lookups_share_one_fetch(self):
+        await asyncio.gather(*(async_service.alookup_player_stats('Alpha#1') for _ in range(5)))
+        self.assertEqual(self.fetch.call_count, 1)
@@ -0,0 +1,139 @@
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from stats import cache as stats_cache
+from stats import overwatch_service
+from stats.cache import DjangoStatsCache, MemoryStatsCache, make_stats_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class MakeStatsKeyTestCase(SimpleTestCase):
+    def test_key_is_normalized(self):
+        self.assertEqual(make_stats_key(' Player#1234 ', 'Competitive', 'PC'), ('Player-1234', 'competitive', 'pc'))
+        self.assertEqual(make_stats_key('Player#1234'), make_stats_key('Player-1234', 'quickplay', 'pc'))
+
+
+class MemoryStatsCacheTestCase(SimpleTestCase):
+    def test_entries_expire_after_ttl(self):
+        clock = FakeClock()
+        cache = MemoryStatsCache(ttl=10, clock=clock)
+        cache.set('key', {'a': 1})
+        clock.now = 9
+        self.assertEqual(cache.get('key'), {'a': 1})
+        clock.now = 10
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+        self.assertEqual(cache.stats()['expirations'], 1)
+
+    def test_expired_entries_are_reported_stale_within_grace(self):
+        clock = FakeClock()
+        cache = MemoryStatsCache(ttl=10, stale_grace=5, stale_if_error=20, clock=clock)
+        cache.set('key', {'a': 1})
+        clock.now = 12
+        self.assertEqual(cache.get_entry('key')[1], stats_cache.STALE)
+        self.assertIsNone(cache.get('key'))
+        clock.now = 25
+        entry, state = cache.get_entry('key')
+        self.assertEqual(state, stats_cache.EXPIRED)
+        self.assertEqual(entry.value, {'a': 1})
+        clock.now = 30
+        self.assertEqual(cache.get_entry('key'), (None, None))
+
+    def test_least_recently_used_entry_is_evicted_by_count(self):
+        cache = MemoryStatsCache(max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_entries_are_evicted_by_size(self):
+        cache = MemoryStatsCache(max_bytes=20)
+        cache.set('a', 'x' * 10)
+        cache.set('b', 'y' * 10)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.get('b'), 'y' * 10)
+        self.assertLessEqual(cache.current_bytes, 20)
+
+
+class DjangoStatsCacheTestCase(SimpleTestCase):
+    def test_round_trip_through_django_cache(self):
+        cache = DjangoStatsCache(ttl=60)
+        key = make_stats_key('Player#1')
+        self.assertIsNone(cache.get(key))
+        cache.set(key, {'ana': []})
+        self.assertEqual(cache.get(key), {'ana': []})
+        self.assertEqual(cache.stats()['hits'], 1)
+
+
+@override_settings(OVERFAST_SNAPSHOTS_ENABLED=False)
+class CachedGetPlayerStatsTestCase(SimpleTestCase):
+    def setUp(self):
+        stats_cache.reset_stats_cache()
+
+    def tearDown(self):
+        stats_cache.reset_stats_cache()
+
+    @override_settings(OVERFAST_CACHE_BACKEND='memory')
+    def test_second_lookup_is_served_from_cache(self):
+        with mock.patch.object(overwatch_service, 'fetch_player_stats', return_value={'ana': []}) as fetch:
+            overwatch_service.get_player_stats('Player#1')
+            overwatch_service.get_player_stats('Player-1', 'QuickPlay')
+        self.assertEqual(fetch.call_count, 1)
+
+    def test_failed_fetches_are_not_cached(self):
+        with mock.patch.object(overwatch_service, 'fetch_player_stats', return_value=None) as fetch:
+            overwatch_service.get_player_stats('Player#1')
+            overwatch_service.get_player_stats('Player#1')
+        self.assertEqual(fetch.call_count, 2)
+
+
+@override_settings(OVERFAST_SNAPSHOTS_ENABLED=False)
+class StaleWhileRevalidateTestCase(SimpleTestCase):
+    def setUp(self):
+        stats_cache.reset_stats_cache()
+        self.clock = FakeClock()
+        self.cache = MemoryStatsCache(ttl=10, stale_grace=5, stale_if_error=100, clock=self.clock)
+        patcher = mock.patch.object(overwatch_service, 'get_stats_cache', return_value=self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_stale_entry_is_served_and_refreshed_in_background(self):
+        key = make_stats_key('Player#1')
+        self.cache.set(key, {'version': 1})
+        self.clock.now = 12
+        with mock.patch.object(overwatch_service, 'fetch_player_stats', return_value={'version': 2}) as fetch:
+            lookup = overwatch_service.lookup_player_stats('Player#1')
+            deadline = time.monotonic() + 2
+            while overwatch_service._refreshing_keys and time.monotonic() < deadline:
+                time.sleep(0.01)
+        self.assertEqual(lookup.freshness, 'stale')
+        self.assertEqual(lookup.stats, {'version': 1})
+        fetch.assert_called_once()
+        self.assertEqual(self.cache.get(key).payload, {'version': 2})
+
+    def test_expired_entry_is_served_when_upstream_fails(self):
+        key = make_stats_key('Player#1')
+        self.cache.set(key, {'version': 1})
+        self.clock.now = 50
+        with mock.patch.object(overwatch_service, 'fetch_player_stats', return_value=None):
+            lookup = overwatch_service.lookup_player_stats('Player#1')
+        self.assertEqual(lookup.freshness, 'stale')
+        self.assertEqual(lookup.stats, {'version': 1})
+
+    def test_missing_when_nothing_cached_and_upstream_fails(self):
+        with mock.patch.object(overwatch_service, 'fetch_player_stats', return_value=None):
+            lookup = overwatch_service.lookup_player_stats('Player#1')
+        self.assertEqual(lookup.freshness, 'missing')
+        self.assertIsNone(lookup.stats)
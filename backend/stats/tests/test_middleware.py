@@ -0,0 +1,64 @@
+import gzip
+import json
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from stats import cache as stats_cache
+from stats import middleware, overwatch_service, results
+
+from .fixtures import make_payload
+
+
+class NegotiationTestCase(SimpleTestCase):
+    def test_prefers_brotli_when_available(self):
+        with mock.patch.object(middleware, 'brotli', object()):
+            self.assertEqual(middleware.negotiate_encoding('gzip, deflate, br'), 'br')
+            self.assertEqual(middleware.negotiate_encoding('gzip, br;q=0'), 'gzip')
+        with mock.patch.object(middleware, 'brotli', None):
+            self.assertEqual(middleware.negotiate_encoding('br, gzip;q=0.5'), 'gzip')
+        self.assertEqual(middleware.negotiate_encoding('*'), 'gzip' if middleware.brotli is None else 'br')
+        self.assertIsNone(middleware.negotiate_encoding('identity'))
+        self.assertIsNone(middleware.negotiate_encoding(None))
+
+
+@override_settings(OVERFAST_SNAPSHOTS_ENABLED=False)
+class APICompressionTestCase(SimpleTestCase):
+    body = {'player1': 'Alpha#1', 'player2': 'Beta#2', 'hero': 'ana'}
+
+    def setUp(self):
+        stats_cache.reset_stats_cache()
+        results.reset_result_cache()
+        patcher = mock.patch.object(
+            overwatch_service, 'fetch_player_stats',
+            side_effect=lambda battletag, gamemode='quickplay', platform='pc': make_payload(),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(results.reset_result_cache)
+        self.addCleanup(stats_cache.reset_stats_cache)
+
+    def post(self, **headers):
+        return self.client.post(
+            '/api/compare/', data=json.dumps(self.body), content_type='application/json', headers=headers
+        )
+
+    @mock.patch.object(middleware, 'brotli', None)
+    def test_gzip_json_with_weak_etag(self):
+        plain = self.post()
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        compressed = self.post(**{'Accept-Encoding': 'gzip, br'})
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertEqual(compressed['ETag'], f"W/{plain['ETag']}")
+        self.assertLess(len(compressed.content), len(plain.content))
+
+        not_modified = self.post(**{'Accept-Encoding': 'gzip', 'If-None-Match': compressed['ETag']})
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_small_responses_are_sent_as_is(self):
+        with override_settings(OVERFAST_COMPRESS_MIN_SIZE=10 ** 6):
+            response = self.post(**{'Accept-Encoding': 'gzip'})
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertTrue(response['ETag'].startswith('"'))
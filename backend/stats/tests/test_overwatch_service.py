@@ -0,0 +1,110 @@
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from stats import cache as stats_cache
+from stats import overwatch_service
+from stats.overwatch_service import SingleFlight, get_many_player_stats
+
+
+class GetManyPlayerStatsTestCase(SimpleTestCase):
+    def test_fetches_players_concurrently(self):
+        started = []
+        barrier = threading.Barrier(2, timeout=2)
+
+        def fake_get_player_stats(battletag, gamemode, platform):
+            started.append(battletag)
+            barrier.wait()
+            return {'player': battletag}
+
+        with mock.patch.object(overwatch_service, 'get_player_stats', side_effect=fake_get_player_stats):
+            results = get_many_player_stats(['A#1', 'B#2'])
+
+        self.assertEqual(sorted(started), ['A#1', 'B#2'])
+        self.assertEqual(results, {'A#1': {'player': 'A#1'}, 'B#2': {'player': 'B#2'}})
+
+    def test_duplicate_battletags_are_fetched_once(self):
+        with mock.patch.object(overwatch_service, 'get_player_stats', return_value={}) as fetch:
+            results = get_many_player_stats(['A#1', 'A#1'])
+
+        self.assertEqual(fetch.call_count, 1)
+        self.assertEqual(list(results), ['A#1'])
+
+    def test_deadline_returns_none_for_slow_fetches(self):
+        def fake_get_player_stats(battletag, gamemode, platform):
+            if battletag == 'Slow#1':
+                time.sleep(0.5)
+            return {'player': battletag}
+
+        with mock.patch.object(overwatch_service, 'get_player_stats', side_effect=fake_get_player_stats):
+            results = get_many_player_stats(['Fast#1', 'Slow#1'], deadline=0.1)
+
+        self.assertEqual(results['Fast#1'], {'player': 'Fast#1'})
+        self.assertIsNone(results['Slow#1'])
+
+
+@override_settings(OVERFAST_SNAPSHOTS_ENABLED=False)
+class SingleFlightTestCase(SimpleTestCase):
+    def setUp(self):
+        stats_cache.reset_stats_cache()
+
+    def tearDown(self):
+        stats_cache.reset_stats_cache()
+
+    def test_concurrent_misses_share_one_fetch(self):
+        release = threading.Event()
+        calls = []
+
+        def slow_fetch(battletag, gamemode, platform):
+            calls.append(battletag)
+            release.wait(2)
+            return {'ana': []}
+
+        results = []
+        with mock.patch.object(overwatch_service, 'fetch_player_stats', side_effect=slow_fetch):
+            threads = [
+                threading.Thread(target=lambda: results.append(overwatch_service.get_player_stats('Player#1')))
+                for _ in range(5)
+            ]
+            for thread in threads:
+                thread.start()
+            while overwatch_service._player_stats_flight.in_flight() == 0:
+                time.sleep(0.01)
+            time.sleep(0.05)
+            release.set()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'ana': []}] * 5)
+
+    def test_errors_are_shared_with_waiters(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        errors = []
+
+        def failing():
+            started.set()
+            release.wait(2)
+            raise RuntimeError('upstream down')
+
+        def call():
+            try:
+                flight.do('key', failing)
+            except RuntimeError as exc:
+                errors.append(exc)
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait(2)
+        follower = threading.Thread(target=call)
+        follower.start()
+        time.sleep(0.05)
+        release.set()
+        leader.join()
+        follower.join()
+
+        self.assertEqual(len(errors), 2)
+        self.assertIs(errors[0], errors[1])
@@ -0,0 +1,74 @@
+import pickle
+import sys
+
+from django.test import SimpleTestCase
+from stats.overwatch_service import compare_hero_stats, enhanced_compare_hero_stats
+from stats.enhanced_analysis import STAT_DEFINITIONS
+from stats.parsing import ParsedPlayerStats
+from stats.registry import STAT_REGISTRY
+
+from .fixtures import make_payload
+
+
+def deep_size(value):
+    """Rough in-memory size of a JSON-like tree of dicts, lists and scalars."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_size(key) + deep_size(item) for key, item in value.items())
+    elif isinstance(value, list):
+        size += sum(deep_size(item) for item in value)
+    return size
+
+
+class ParsedPlayerStatsTestCase(SimpleTestCase):
+    def test_hero_index_and_flat_view(self):
+        parsed = ParsedPlayerStats(make_payload())
+        ana = parsed.hero('ana')
+        self.assertEqual(sorted(ana.categories), ['Assists', 'Combat', 'Game'])
+        self.assertEqual(ana.categories['Combat']['deaths'].value, 5)
+        self.assertEqual(ana.categories['Combat']['deaths'].label, 'Deaths')
+        self.assertEqual(ana.flat['healing_done'], 6000)
+        self.assertIsNone(parsed.hero('tracer'))
+
+    def test_views_do_not_grow_the_cached_object(self):
+        parsed = ParsedPlayerStats(make_payload())
+        size = parsed.approximate_size()
+        ana = parsed.hero('ana')
+        self.assertIsNot(ana.categories, ana.categories)
+        self.assertIsNot(ana.flat, ana.flat)
+        self.assertEqual(parsed.approximate_size(), size)
+
+    def test_payload_round_trips(self):
+        payload = make_payload()
+        payload['ana'][0]['stats'].append({'key': 'rank', 'value': 'gold'})
+        payload['ana'][0]['stats'].append({'key': 'unranked', 'label': 'Unranked', 'value': None})
+        payload['ana'][1]['stats'][0]['value'] = 12.5
+        self.assertEqual(ParsedPlayerStats(payload).payload, payload)
+
+    def test_stat_keys_are_interned(self):
+        first = ParsedPlayerStats(make_payload()).hero('ana')
+        second = ParsedPlayerStats(make_payload(eliminations=1)).hero('ana')
+        self.assertEqual(first.stat_ids, second.stat_ids)
+        self.assertEqual(STAT_DEFINITIONS['eliminations'].stat_id, STAT_REGISTRY.lookup('eliminations'))
+
+    def test_compact_form_is_much_smaller_than_raw_payload(self):
+        payload = make_payload()
+        self.assertLess(ParsedPlayerStats(payload).approximate_size(), deep_size(payload) / 5)
+
+    def test_pickles_through_payload(self):
+        parsed = ParsedPlayerStats(make_payload())
+        restored = pickle.loads(pickle.dumps(parsed))
+        self.assertEqual(restored.payload, parsed.payload)
+        self.assertEqual(restored.hero('ana').flat, parsed.hero('ana').flat)
+
+    def test_comparisons_accept_raw_or_parsed_payloads(self):
+        raw1, raw2 = make_payload(), make_payload(eliminations=3)
+        parsed1, parsed2 = ParsedPlayerStats(raw1), ParsedPlayerStats(raw2)
+        self.assertEqual(
+            compare_hero_stats(raw1, raw2, 'ana', 'A', 'B'),
+            compare_hero_stats(parsed1, parsed2, 'ana', 'A', 'B'),
+        )
+        self.assertEqual(
+            enhanced_compare_hero_stats(raw1, raw2, 'mercy', 'A', 'B'),
+            enhanced_compare_hero_stats(parsed1, parsed2, 'mercy', 'A', 'B'),
+        )
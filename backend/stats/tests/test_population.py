@@ -0,0 +1,167 @@
+import random
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from stats import cache as stats_cache
+from stats import overwatch_service, population
+from stats.models import PlayerStatsSnapshot, StatDistribution, StatMoments
+from stats.parsing import ParsedPlayerStats
+from stats.snapshots import save_snapshot
+from stats.sketches import KLLSketch, QuantileTable, RunningMoments
+
+from .fixtures import make_payload
+
+
+class KLLSketchTestCase(SimpleTestCase):
+    def test_quantiles_track_exact_values_after_merge(self):
+        rng = random.Random(7)
+        values = [rng.uniform(0, 1000) for _ in range(20000)]
+        left, right = KLLSketch(), KLLSketch()
+        for index, value in enumerate(values):
+            (left if index % 2 else right).update(value)
+        merged = KLLSketch.from_bytes(left.merge(right).to_bytes())
+
+        ordered = sorted(values)
+        self.assertEqual(merged.count, len(values))
+        self.assertLess(sum(len(compactor) for compactor in merged.compactors), 1000)
+        for fraction in (0.1, 0.5, 0.9):
+            estimate = merged.quantiles([fraction])[0]
+            self.assertAlmostEqual(estimate, ordered[int(fraction * len(values))], delta=25)
+
+    def test_running_moments_merge_and_subtract(self):
+        values = [3.0, 7.0, 8.0, 15.0, 21.0]
+        first, second = RunningMoments(), RunningMoments()
+        for value in values[:3]:
+            first.add(value)
+        for value in values[3:]:
+            second.add(value)
+        total = RunningMoments().merge(first).merge(second)
+        self.assertEqual(total.count, 5)
+        self.assertAlmostEqual(total.mean, 10.8)
+        self.assertAlmostEqual(total.variance, 51.2)
+        total.subtract(second)
+        self.assertAlmostEqual(total.mean, 6.0)
+        self.assertAlmostEqual(total.variance, 7.0)
+
+    def test_table_percentile_rank(self):
+        table = QuantileTable([float(value) for value in range(101)], 101)
+        self.assertEqual(table.percentile(50), 50.0)
+        self.assertEqual(table.percentile(-1), 0)
+        self.assertEqual(table.percentile(500), 100)
+
+
+@override_settings(OVERFAST_CACHE_BACKEND='memory', OVERFAST_POPULATION_MIN_SAMPLES=3)
+class PopulationTestCase(TestCase):
+    def setUp(self):
+        stats_cache.reset_stats_cache()
+        population.reset_population()
+
+    def tearDown(self):
+        stats_cache.reset_stats_cache()
+        population.reset_population()
+
+    def record_players(self, eliminations_values):
+        recorder = population.get_population_recorder()
+        for eliminations in eliminations_values:
+            recorder.record(ParsedPlayerStats(make_payload(eliminations=eliminations)), 'quickplay', 'pc')
+        return recorder.flush()
+
+    def test_flush_persists_and_merges_distributions(self):
+        self.record_players([10, 20])
+        self.record_players([30, 40])
+        row = StatDistribution.objects.get(hero='ana', stat_key='eliminations', gamemode='quickplay', platform='pc')
+        self.assertEqual(row.sample_count, 4)
+        self.assertEqual(row.quantiles[0], 10)
+        self.assertEqual(row.quantiles[-1], 40)
+
+    def test_percentile_lookup_needs_enough_samples(self):
+        self.record_players([10, 20])
+        self.assertIsNone(population.population_lookup('ana', 'quickplay', 'pc').percentile('eliminations', 15))
+        self.record_players([30, 40])
+        lookup = population.population_lookup('ana', 'quickplay', 'pc')
+        self.assertLess(lookup.percentile('eliminations', 15), lookup.percentile('eliminations', 35))
+
+    def test_comparison_reports_percentiles_and_normalizes_scores(self):
+        self.record_players([10, 20, 30, 40])
+        stats1 = make_payload(eliminations=40)
+        stats2 = make_payload(eliminations=10)
+
+        result = overwatch_service.enhanced_compare_hero_stats(stats1, stats2, 'ana', 'A', 'B', 'quickplay', 'pc')
+        percentiles = result['enhanced_analysis']['percentiles']
+        self.assertGreater(percentiles['player1']['eliminations'], percentiles['player2']['eliminations'])
+        fixed = overwatch_service.enhanced_compare_hero_stats(stats1, stats2, 'ana', 'A', 'B')
+        self.assertNotIn('percentiles', fixed['enhanced_analysis'])
+        self.assertNotEqual(
+            result['enhanced_analysis']['performance_scores'], fixed['enhanced_analysis']['performance_scores']
+        )
+
+        z_scores = result['enhanced_analysis']['z_scores']
+        self.assertGreater(z_scores['player1']['eliminations'], 0)
+        self.assertLess(z_scores['player2']['eliminations'], 0)
+        self.assertNotEqual(
+            result['enhanced_analysis']['role_effectiveness'], fixed['enhanced_analysis']['role_effectiveness']
+        )
+
+        overview = overwatch_service.compare_all_heroes(stats1, stats2, 'A', 'B', gamemode='quickplay', platform='pc')
+        ana = next(hero for hero in overview['heroes'] if hero['hero'] == 'ana')
+        self.assertEqual(ana['performance_scores'], result['enhanced_analysis']['performance_scores'])
+        self.assertEqual(
+            ana['role_effectiveness']['player1_effectiveness'],
+            result['enhanced_analysis']['role_effectiveness']['player1_effectiveness'],
+        )
+
+    def fetch_payloads(self, battletag, payloads):
+        with mock.patch.object(overwatch_service, 'fetch_player_stats', side_effect=payloads):
+            for _ in payloads:
+                stats_cache.reset_stats_cache()
+                overwatch_service._load_player_stats(
+                    ('x', 'quickplay', 'pc'), battletag, 'quickplay', 'pc', use_snapshots=False
+                )
+
+    def test_only_new_or_changed_payloads_are_recorded(self):
+        payloads = [make_payload(eliminations=10), make_payload(eliminations=10), make_payload(eliminations=11)]
+        self.fetch_payloads('Player#1', payloads)
+        per_payload = sum(len(hero.stat_ids) for hero in ParsedPlayerStats(payloads[0]).heroes.values())
+        self.assertEqual(population.get_population_recorder().pending_samples(), 2 * per_payload)
+
+    def test_changed_payload_replaces_old_values_in_moments(self):
+        self.fetch_payloads('Player#1', [make_payload(eliminations=10), make_payload(eliminations=30)])
+        self.fetch_payloads('Player#2', [make_payload(eliminations=20)])
+        population.flush_population()
+        moments = StatMoments.objects.get(hero='ana', stat_key='eliminations')
+        self.assertEqual(moments.count, 2)
+        self.assertAlmostEqual(moments.mean, 25.0)
+        self.assertEqual(StatDistribution.objects.get(hero='ana', stat_key='eliminations').sample_count, 3)
+        recorded = PlayerStatsSnapshot.objects.filter(battletag='Player-1').order_by('fetched_at')
+        self.assertEqual([snapshot.recorded for snapshot in recorded], [False, True])
+
+    def test_unrecorded_previous_snapshot_is_not_subtracted(self):
+        # Stored before its values were recorded, e.g. by an older release
+        save_snapshot('Player#1', 'quickplay', 'pc', make_payload(eliminations=10))
+        self.fetch_payloads('Player#1', [make_payload(eliminations=30)])
+        population.flush_population()
+        moments = StatMoments.objects.get(hero='ana', stat_key='eliminations')
+        self.assertEqual(moments.count, 1)
+        self.assertAlmostEqual(moments.mean, 30.0)
+
+    def test_rebuild_command_uses_latest_snapshot_per_player(self):
+        self.fetch_payloads('Player#1', [make_payload(eliminations=10), make_payload(eliminations=30)])
+        self.fetch_payloads('Player#2', [make_payload(eliminations=20)])
+        population.reset_population()
+        self.assertEqual(PlayerStatsSnapshot.objects.count(), 3)
+
+        out = StringIO()
+        call_command('rebuild_population', stdout=out)
+        self.assertIn('2 snapshot(s)', out.getvalue())
+        moments = StatMoments.objects.get(hero='ana', stat_key='eliminations')
+        self.assertEqual(moments.count, 2)
+        self.assertAlmostEqual(moments.mean, 25.0)
+        self.assertEqual(StatDistribution.objects.get(hero='ana', stat_key='eliminations').sample_count, 2)
+        self.assertEqual(PlayerStatsSnapshot.objects.filter(recorded=True).count(), 2)
+
+    @override_settings(OVERFAST_SNAPSHOTS_ENABLED=False)
+    def test_disabled_with_snapshots(self):
+        self.assertIsNone(population.population_lookup('ana', 'quickplay', 'pc'))
+        self.assertFalse(population.record_payload(ParsedPlayerStats(make_payload()), 'quickplay', 'pc'))
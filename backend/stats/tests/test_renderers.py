@@ -0,0 +1,26 @@
+import json
+from unittest import mock
+
+from django.test import SimpleTestCase
+from stats import renderers
+from stats.renderers import FastJSONRenderer
+
+
+class RenderersTestCase(SimpleTestCase):
+    data = {'hero': 'lúcio', 'scores': [1, 2.5, None], 'nested': {'stale': False}}
+
+    def test_dumps_is_compact_utf8(self):
+        body = renderers.dumps(self.data)
+        self.assertIsInstance(body, bytes)
+        self.assertEqual(json.loads(body), self.data)
+        self.assertNotIn(b' ', body)
+
+    def test_stdlib_fallback_matches_orjson(self):
+        with mock.patch.object(renderers, 'orjson', None):
+            fallback = renderers.dumps(self.data)
+        self.assertEqual(fallback, renderers.dumps(self.data))
+
+    def test_renderer(self):
+        renderer = FastJSONRenderer()
+        self.assertEqual(renderer.render(None), b'')
+        self.assertEqual(json.loads(renderer.render(self.data)), self.data)
@@ -0,0 +1,165 @@
+import threading
+import time
+from unittest import mock
+
+import requests
+from django.test import SimpleTestCase, override_settings
+from stats import overwatch_service, upstream
+from stats.standin import StandinConfig, make_server
+from stats.resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, TokenBucket, UpstreamUnavailable
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TokenBucketTestCase(SimpleTestCase):
+    def test_burst_then_refill(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, capacity=3, clock=clock)
+        self.assertTrue(all(bucket.acquire() for _ in range(3)))
+        self.assertFalse(bucket.acquire())
+        clock.now += 0.5
+        self.assertTrue(bucket.acquire())
+        self.assertEqual(bucket.stats()['granted'], 4)
+        self.assertEqual(bucket.stats()['rejected'], 1)
+
+    def test_pause_blocks_tokens(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10, capacity=10, clock=clock)
+        bucket.pause(30)
+        self.assertFalse(bucket.acquire(max_wait=5))
+        self.assertEqual(bucket.stats()['paused_for'], 30)
+        clock.now += 31
+        self.assertTrue(bucket.acquire())
+
+
+class CircuitBreakerTestCase(SimpleTestCase):
+    def test_opens_after_threshold_and_recovers_through_one_trial(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=10, clock=clock)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+        self.assertFalse(breaker.allow())
+
+        clock.now += 10
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertFalse(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+
+        clock.now += 10
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertEqual(breaker.stats()['times_opened'], 2)
+        self.assertEqual(breaker.stats()['rejected'], 2)
+
+
+@override_settings(OVERFAST_BREAKER_FAILURE_THRESHOLD=2, OVERFAST_RATE_LIMIT_MAX_WAIT=0, OVERFAST_MAX_RETRIES=0)
+class GuardedUpstreamTestCase(SimpleTestCase):
+    def setUp(self):
+        upstream.reset_guards()
+        self.addCleanup(upstream.reset_guards)
+
+    def response(self, status_code, headers=None):
+        response = requests.Response()
+        response.status_code = status_code
+        response.headers.update(headers or {})
+        return response
+
+    def test_breaker_fails_fast_after_upstream_errors(self):
+        session = mock.Mock()
+        session.get.side_effect = [requests.ConnectTimeout(), self.response(503)]
+        with mock.patch.object(upstream, 'get_session', return_value=session):
+            with self.assertRaises(requests.ConnectTimeout):
+                upstream.get('players/A-1/stats')
+            self.assertEqual(upstream.get('players/A-1/stats').status_code, 503)
+            with self.assertRaises(UpstreamUnavailable):
+                upstream.get('players/A-1/stats')
+            # Callers see a failed fetch and fall back to cached or snapshot data
+            self.assertIsNone(overwatch_service.fetch_player_stats('A#1'))
+        self.assertEqual(session.get.call_count, 2)
+        self.assertEqual(upstream.guard_stats()['circuit_breaker']['state'], OPEN)
+
+    def test_429_pauses_the_rate_limiter_for_retry_after(self):
+        session = mock.Mock()
+        session.get.return_value = self.response(429, {'Retry-After': '120'})
+        with mock.patch.object(upstream, 'get_session', return_value=session):
+            self.assertEqual(upstream.get('players/A-1/stats').status_code, 429)
+            with self.assertRaises(UpstreamUnavailable):
+                upstream.get('players/A-1/stats')
+        limiter = upstream.guard_stats()['rate_limiter']
+        self.assertGreater(limiter['paused_for'], 100)
+        self.assertEqual(limiter['rejected'], 1)
+        self.assertEqual(upstream.guard_stats()['circuit_breaker']['state'], CLOSED)
+
+
+@override_settings(
+    OVERFAST_MAX_RETRIES=2, OVERFAST_RETRY_BACKOFF=0, OVERFAST_RETRY_JITTER=0,
+    OVERFAST_RATE_LIMIT_MAX_WAIT=0, OVERFAST_BREAKER_FAILURE_THRESHOLD=100,
+)
+class RetriedUpstreamTestCase(SimpleTestCase):
+    """Retries through the real session and its adapter, against a stand-in server."""
+
+    def start(self, settings=None, **options):
+        server = make_server(config=StandinConfig(**options))
+        thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        overrides = override_settings(OVERFAST_BASE_URL=server.base_url, **(settings or {}))
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        for reset in (upstream.reset_session, upstream.reset_guards):
+            reset()
+            self.addCleanup(reset)
+        return server
+
+    def test_every_retry_takes_a_token_and_reports_to_the_breaker(self):
+        server = self.start(error_rate=1.0)
+        self.assertEqual(upstream.get('players/A-1/stats').status_code, 500)
+        self.assertEqual(server.counters['requests'], 3)
+        stats = upstream.guard_stats()
+        self.assertEqual(stats['rate_limiter']['granted'], 3)
+        self.assertEqual(stats['circuit_breaker']['failures'], 3)
+
+    def test_breaker_opening_stops_retries(self):
+        server = self.start(settings={'OVERFAST_BREAKER_FAILURE_THRESHOLD': 2}, error_rate=1.0)
+        with self.assertRaises(UpstreamUnavailable):
+            upstream.get('players/A-1/stats')
+        self.assertEqual(server.counters['requests'], 2)
+
+    def test_throttled_response_is_not_retried_or_slept_on(self):
+        server = self.start(throttle_rate=1.0, retry_after=3)
+        started = time.monotonic()
+        self.assertEqual(upstream.get('players/A-1/stats').status_code, 429)
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(server.counters['requests'], 1)
+        limiter = upstream.guard_stats()['rate_limiter']
+        self.assertEqual((limiter['granted'], limiter['pauses']), (1, 1))
+        self.assertGreater(limiter['paused_for'], 2)
+
+    def test_unavailable_with_long_retry_after_pauses_instead_of_retrying(self):
+        server = self.start(throttle_rate=1.0, throttle_status=503, retry_after=3)
+        started = time.monotonic()
+        self.assertEqual(upstream.get('players/A-1/stats').status_code, 503)
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(server.counters['requests'], 1)
+        self.assertEqual(upstream.guard_stats()['rate_limiter']['pauses'], 1)
+
+    def test_unavailable_with_short_retry_after_is_retried_through_the_limiter(self):
+        server = self.start(
+            settings={'OVERFAST_RATE_LIMIT_MAX_WAIT': 1}, throttle_rate=1.0, throttle_status=503, retry_after=0,
+        )
+        self.assertEqual(upstream.get('players/A-1/stats').status_code, 503)
+        self.assertEqual(server.counters['requests'], 3)
+        limiter = upstream.guard_stats()['rate_limiter']
+        self.assertEqual((limiter['granted'], limiter['pauses']), (3, 3))
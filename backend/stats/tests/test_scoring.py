@@ -0,0 +1,93 @@
+import random
+
+import numpy as np
+from django.test import SimpleTestCase
+from stats.enhanced_analysis import STAT_DEFINITIONS, EnhancedOverwatchService
+from stats.parsing import ParsedHeroStats, ParsedPlayerStats
+from stats.population import PopulationLookup
+from stats.scoring import ScoringEngine
+from stats.sketches import RunningMoments
+
+from .fixtures import make_payload
+
+
+def random_flat_stats(rng):
+    keys = list(STAT_DEFINITIONS) + ['unknown_stat']
+    return {key: rng.choice([rng.randint(0, 3000), rng.uniform(0, 150)]) for key in keys if rng.random() < 0.7}
+
+
+def hero_from_flat(flat_stats):
+    return ParsedHeroStats([{'category': 'combat', 'stats': [{'key': key, 'value': value} for key, value in flat_stats.items()]}])
+
+
+def random_population(rng, min_samples=10):
+    moments = {}
+    for key in STAT_DEFINITIONS:
+        # Some stats lack samples, spread or data entirely, to exercise the fallbacks
+        if rng.random() < 0.2:
+            continue
+        count = rng.choice([min_samples - 1, min_samples, 500])
+        moments[key] = RunningMoments(count, rng.uniform(0, 1500), rng.choice([0.0, rng.uniform(1, 1e9)]))
+    return PopulationLookup({}, moments, min_samples)
+
+
+class ScoringEngineTestCase(SimpleTestCase):
+    def setUp(self):
+        self.engine = ScoringEngine()
+        rng = random.Random(42)
+        self.players = [random_flat_stats(rng) for _ in range(200)] + [{}]
+        self.opponents = [random_flat_stats(rng) for _ in range(200)] + [{}]
+        self.populations = [random_population(rng) for _ in range(len(self.players) - 1)] + [None]
+
+    def matrix(self, flat_stats_list):
+        return self.engine.matrix_from_heroes([hero_from_flat(flat_stats) for flat_stats in flat_stats_list])
+
+    def test_weighted_scores_match_reference(self):
+        expected = [EnhancedOverwatchService.calculate_weighted_score(stats, STAT_DEFINITIONS) for stats in self.players]
+        actual = self.engine.weighted_scores(self.matrix(self.players))
+        np.testing.assert_allclose(actual, expected, rtol=1e-12, atol=1e-12)
+
+    def test_role_effectiveness_matches_reference(self):
+        matrix = self.matrix(self.players)
+        for role in ('tank', 'damage', 'support', 'unknown'):
+            expected = [EnhancedOverwatchService.calculate_role_effectiveness(stats, role) for stats in self.players]
+            np.testing.assert_allclose(self.engine.role_effectiveness(matrix, role), expected, rtol=1e-12, atol=1e-12)
+
+    def test_performance_patterns_match_reference(self):
+        expected = [
+            EnhancedOverwatchService.analyze_performance_pattern(stats1, stats2)
+            for stats1, stats2 in zip(self.players, self.opponents)
+        ]
+        actual = self.engine.performance_patterns(
+            self.matrix(self.players), self.matrix(self.opponents)
+        )
+        self.assertEqual(actual, expected)
+
+    def test_matrix_from_heroes_matches_flat_view(self):
+        hero = ParsedPlayerStats(make_payload()).hero('ana')
+        matrix = self.engine.matrix_from_heroes([hero, None])
+        np.testing.assert_array_equal(matrix[0], [hero.flat.get(key, np.nan) for key in self.engine.keys])
+        self.assertTrue(np.isnan(matrix[1]).all())
+
+    def test_population_normalization_matches_lookup(self):
+        matrix = self.matrix(self.players)
+        normalized = self.engine.z_matrix(matrix, self.populations)
+        for row, (stats, lookup) in enumerate(zip(self.players, self.populations)):
+            for key, value in stats.items():
+                position = self.engine.columns.get(key)
+                if position is None:
+                    continue
+                expected = lookup.normalize_z(key, value) if lookup else None
+                if expected is None:
+                    self.assertTrue(np.isnan(normalized[row, position]))
+                else:
+                    self.assertAlmostEqual(normalized[row, position], expected, places=12)
+
+    def test_normalized_scores_match_reference(self):
+        matrix = self.matrix(self.players)
+        expected = [
+            EnhancedOverwatchService.calculate_weighted_score(stats, STAT_DEFINITIONS, lookup and lookup.normalize_z)
+            for stats, lookup in zip(self.players, self.populations)
+        ]
+        actual = self.engine.weighted_scores(matrix, self.engine.z_matrix(matrix, self.populations))
+        np.testing.assert_allclose(actual, expected, rtol=1e-12, atol=1e-12)
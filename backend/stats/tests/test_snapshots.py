@@ -0,0 +1,87 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from stats import cache as stats_cache
+from stats import overwatch_service
+from stats.models import PlayerStatsSnapshot
+from stats.snapshots import get_latest_snapshot, load_snapshot, prune_snapshots, save_snapshot
+
+PAYLOAD = {'ana': [{'category': 'combat', 'label': 'Combat', 'stats': [{'key': 'eliminations', 'value': 10}]}]}
+
+
+class SnapshotRepositoryTestCase(TestCase):
+    def test_payload_round_trips_compressed(self):
+        snapshot, _ = save_snapshot('Player#1', 'quickplay', 'pc', PAYLOAD)
+        self.assertEqual(snapshot.battletag, 'Player-1')
+        self.assertEqual(get_latest_snapshot('Player#1').get_payload(), PAYLOAD)
+        self.assertEqual(snapshot.payload_hash, PlayerStatsSnapshot.encode_payload(PAYLOAD)[1])
+
+    def test_identical_payload_bumps_fetch_time(self):
+        first, created = save_snapshot('Player#1', 'quickplay', 'pc', PAYLOAD)
+        PlayerStatsSnapshot.objects.filter(pk=first.pk).update(fetched_at=timezone.now() - timedelta(hours=1))
+        second, bumped = save_snapshot('Player#1', 'quickplay', 'pc', PAYLOAD)
+        self.assertEqual(first.pk, second.pk)
+        self.assertTrue(created)
+        self.assertFalse(bumped)
+        self.assertEqual(PlayerStatsSnapshot.objects.count(), 1)
+
+    def test_load_snapshot_respects_max_age(self):
+        snapshot, _ = save_snapshot('Player#1', 'quickplay', 'pc', PAYLOAD)
+        PlayerStatsSnapshot.objects.filter(pk=snapshot.pk).update(fetched_at=timezone.now() - timedelta(seconds=600))
+        self.assertIsNone(load_snapshot('Player#1', max_age=300))
+        payload, age, payload_hash = load_snapshot('Player#1', max_age=900)
+        self.assertEqual(payload, PAYLOAD)
+        self.assertGreaterEqual(age, 600)
+        self.assertEqual(payload_hash, snapshot.payload_hash)
+
+    def test_prune_keeps_latest_snapshot_per_player(self):
+        old = timezone.now() - timedelta(days=60)
+        for value in (1, 2):
+            snapshot, _ = save_snapshot('Player#1', 'quickplay', 'pc', {'ana': value})
+            PlayerStatsSnapshot.objects.filter(pk=snapshot.pk).update(fetched_at=old + timedelta(minutes=value))
+        save_snapshot('Player#2', 'quickplay', 'pc', PAYLOAD)
+
+        self.assertEqual(prune_snapshots(older_than_days=30), 1)
+        self.assertEqual(get_latest_snapshot('Player#1').get_payload(), {'ana': 2})
+        self.assertEqual(PlayerStatsSnapshot.objects.count(), 2)
+
+    def test_prune_command(self):
+        snapshot, _ = save_snapshot('Player#1', 'quickplay', 'pc', PAYLOAD)
+        PlayerStatsSnapshot.objects.filter(pk=snapshot.pk).update(fetched_at=timezone.now() - timedelta(days=60))
+        out = StringIO()
+        call_command('prune_snapshots', '--days', '30', '--all', stdout=out)
+        self.assertIn('Deleted 1 snapshot', out.getvalue())
+        self.assertFalse(PlayerStatsSnapshot.objects.exists())
+
+
+@override_settings(OVERFAST_CACHE_BACKEND='memory')
+class SnapshotBackedLookupTestCase(TestCase):
+    def setUp(self):
+        stats_cache.reset_stats_cache()
+
+    def tearDown(self):
+        stats_cache.reset_stats_cache()
+
+    def test_upstream_payload_is_persisted_and_reused(self):
+        with mock.patch.object(overwatch_service, 'fetch_player_stats', return_value=PAYLOAD) as fetch:
+            overwatch_service.get_player_stats('Player#1')
+            stats_cache.reset_stats_cache()
+            lookup = overwatch_service.lookup_player_stats('Player#1')
+        fetch.assert_called_once()
+        self.assertEqual(lookup.stats, PAYLOAD)
+        self.assertEqual(lookup.freshness, 'fresh')
+        # The version comes from the snapshot instead of re-hashing the payload
+        self.assertEqual(lookup.parsed._version, PlayerStatsSnapshot.encode_payload(PAYLOAD)[1])
+
+    def test_old_snapshot_is_served_stale_when_upstream_fails(self):
+        snapshot, _ = save_snapshot('Player#1', 'quickplay', 'pc', PAYLOAD)
+        PlayerStatsSnapshot.objects.filter(pk=snapshot.pk).update(fetched_at=timezone.now() - timedelta(hours=2))
+        with mock.patch.object(overwatch_service, 'fetch_player_stats', return_value=None):
+            lookup = overwatch_service.lookup_player_stats('Player#1')
+        self.assertEqual(lookup.stats, PAYLOAD)
+        self.assertEqual(lookup.freshness, 'stale')
+        self.assertEqual(lookup.parsed._version, snapshot.payload_hash)
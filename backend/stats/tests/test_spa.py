@@ -0,0 +1,59 @@
+import gzip
+import os
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from stats import spa
+
+
+class SPAShellTestCase(SimpleTestCase):
+    def setUp(self):
+        self.build_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.build_dir.cleanup)
+        self.index = os.path.join(self.build_dir.name, 'index.html')
+        self.write_index('<html><body><div id="root"></div></body></html>')
+        templates = override_settings(TEMPLATES=[{
+            'BACKEND': 'django.template.backends.django.DjangoTemplates',
+            'DIRS': [self.build_dir.name],
+        }])
+        templates.enable()
+        self.addCleanup(templates.disable)
+        spa.reset_spa_shell()
+        self.addCleanup(spa.reset_spa_shell)
+
+    def write_index(self, html, mtime=None):
+        with open(self.index, 'w', encoding='utf-8') as f:
+            f.write(html)
+        if mtime is not None:
+            os.utime(self.index, (mtime, mtime))
+
+    def test_shell_is_served_from_memory(self):
+        first = self.client.get('/compare/ana')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first['Content-Type'], 'text/html; charset=utf-8')
+        self.assertIn(b'id="root"', first.content)
+
+        with mock.patch.object(spa, 'get_template') as get_template:
+            again = self.client.get('/another/route')
+            compressed = self.client.get('/', headers={'Accept-Encoding': 'gzip'})
+            not_modified = self.client.get('/', headers={'If-None-Match': first['ETag']})
+        get_template.assert_not_called()
+        self.assertEqual(again.content, first.content)
+        self.assertEqual(gzip.decompress(compressed.content), first.content)
+        self.assertEqual(compressed['ETag'], f"W/{first['ETag']}")
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_shell_reloads_on_change_only_in_debug(self):
+        etag = self.client.get('/')['ETag']
+        self.write_index('<html><body>new build</body></html>', mtime=1)
+        self.assertEqual(self.client.get('/')['ETag'], etag)
+        with override_settings(DEBUG=True):
+            response = self.client.get('/')
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn(b'new build', response.content)
+
+    def test_missing_build_returns_404(self):
+        os.remove(self.index)
+        with mock.patch.object(spa, 'fallback_paths', return_value=[]):
+            self.assertEqual(self.client.get('/').status_code, 404)
@@ -0,0 +1,64 @@
+import os
+import tempfile
+import threading
+
+import requests
+from django.test import SimpleTestCase, override_settings
+from stats import overwatch_service, upstream
+from stats.parsing import ParsedPlayerStats
+from stats.standin import StandinConfig, make_server, recording_path, synthetic_payload
+
+
+@override_settings(OVERFAST_MAX_RETRIES=0, OVERFAST_BREAKER_FAILURE_THRESHOLD=100)
+class StandinServerTestCase(SimpleTestCase):
+    def start(self, **options):
+        server = make_server(config=StandinConfig(**options))
+        thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        settings = override_settings(OVERFAST_BASE_URL=server.base_url)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        upstream.reset_session()
+        upstream.reset_guards()
+        self.addCleanup(upstream.reset_session)
+        self.addCleanup(upstream.reset_guards)
+        return server
+
+    def test_synthetic_payloads_are_deterministic(self):
+        self.start(seed=3)
+        stats = overwatch_service.fetch_player_stats('Alpha#1234', 'competitive', 'pc')
+        self.assertEqual(stats, synthetic_payload('Alpha-1234', 'competitive', 'pc', seed=3))
+        self.assertNotEqual(stats, synthetic_payload('Alpha-1234', 'quickplay', 'pc', seed=3))
+        hero = next(iter(stats))
+        self.assertIn('eliminations', ParsedPlayerStats(stats).hero(hero).flat)
+
+    def test_injected_errors_and_throttling(self):
+        server = self.start(error_rate=1.0)
+        self.assertIsNone(overwatch_service.fetch_player_stats('Alpha#1234'))
+        server.config.error_rate, server.config.throttle_rate = 0.0, 1.0
+        response = requests.get(f'{server.base_url}/players/Alpha-1234/stats')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers['Retry-After'], '1')
+        counters = requests.get(f'{server.base_url}/__standin__/stats').json()
+        self.assertEqual((counters['errors'], counters['throttled']), (1, 1))
+
+    def test_records_then_replays(self):
+        recordings = tempfile.TemporaryDirectory()
+        self.addCleanup(recordings.cleanup)
+        live = self.start(seed=9)
+        replay = self.start(recordings=recordings.name, record_from=live.base_url, synthetic=False)
+
+        recorded = overwatch_service.fetch_player_stats('Beta#1')
+        self.assertTrue(os.path.exists(recording_path(recordings.name, 'Beta-1', 'quickplay', 'pc')))
+        live.shutdown()
+        live.server_close()
+        self.assertEqual(overwatch_service.fetch_player_stats('Beta#1'), recorded)
+        self.assertIsNone(overwatch_service.fetch_player_stats('Unknown#2'))
+        self.assertEqual(replay.counters['recorded'], 1)
+
+    def test_recording_path_stays_in_directory(self):
+        path = recording_path('/recordings', 'A-1', '../../etc/passwd', 'pc/..')
+        self.assertEqual(os.path.dirname(path), '/recordings')
+        self.assertNotIn('/', os.path.basename(path))
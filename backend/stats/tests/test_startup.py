@@ -0,0 +1,51 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from stats import startup
+
+
+class StartupTestCase(TestCase):
+    def setUp(self):
+        source = tempfile.TemporaryDirectory()
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(source.cleanup)
+        self.addCleanup(root.cleanup)
+        self.asset = os.path.join(source.name, 'main.js')
+        with open(self.asset, 'w') as f:
+            f.write('console.log(1);')
+        settings = override_settings(
+            STATICFILES_DIRS=[source.name], STATIC_ROOT=root.name, INSTALLED_APPS=['django.contrib.staticfiles', 'stats'],
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.static_root = root.name
+
+    def test_collectstatic_runs_only_when_sources_change(self):
+        self.assertTrue(startup.collect_static_if_changed())
+        self.assertTrue(os.path.exists(os.path.join(self.static_root, 'main.js')))
+        with mock.patch.object(startup, 'call_command') as collect:
+            self.assertFalse(startup.collect_static_if_changed())
+        collect.assert_not_called()
+
+        with open(self.asset, 'w') as f:
+            f.write('console.log(2);')
+        self.assertTrue(startup.collect_static_if_changed())
+
+    def test_migrations_are_checked_in_process(self):
+        self.assertEqual(startup.pending_migrations(), [])
+        with mock.patch.object(startup, 'call_command') as migrate:
+            self.assertEqual(startup.migrate_if_needed(), 0)
+        migrate.assert_not_called()
+
+    def test_prestart_reports_phase_timings(self):
+        out = StringIO()
+        with mock.patch.object(startup.connections, 'close_all'):
+            call_command('prestart', stdout=out)
+        output = out.getvalue()
+        self.assertIn('collectstatic: collected', output)
+        self.assertIn('migrate: up to date', output)
+        self.assertIn('pre-start total', output)
@@ -0,0 +1,23 @@
+from django.test import SimpleTestCase, override_settings
+from stats import upstream
+
+
+class UpstreamClientTestCase(SimpleTestCase):
+    def tearDown(self):
+        upstream.reset_session()
+
+    def test_session_is_shared(self):
+        self.assertIs(upstream.get_session(), upstream.get_session())
+
+    @override_settings(OVERFAST_POOL_SIZE=3, OVERFAST_MAX_RETRIES=4)
+    def test_session_uses_configured_pool_without_retries(self):
+        upstream.reset_session()
+        adapter = upstream.get_session().get_adapter('https://overfast-api.tekrop.fr')
+        self.assertEqual(adapter._pool_maxsize, 3)
+        # get() retries above the rate limiter and breaker, so the pool itself never does
+        self.assertEqual(adapter.max_retries.total, 0)
+        self.assertFalse(adapter.max_retries.respect_retry_after_header)
+
+    @override_settings(OVERFAST_BASE_URL='http://localhost:9000/')
+    def test_build_url_uses_configured_base_url(self):
+        self.assertEqual(upstream.build_url('/players/A-1/stats'), 'http://localhost:9000/players/A-1/stats')
@@ -0,0 +1,207 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from stats import cache as stats_cache
+from stats import overwatch_service, results
+
+from .fixtures import make_payload
+
+
+@override_settings(OVERFAST_SNAPSHOTS_ENABLED=False)
+class ComparisonViewsTestCase(SimpleTestCase):
+    def setUp(self):
+        stats_cache.reset_stats_cache()
+        results.reset_result_cache()
+        payloads = {'Alpha#1': make_payload(), 'Beta#2': make_payload(eliminations=10)}
+        patcher = mock.patch.object(
+            overwatch_service, 'fetch_player_stats',
+            side_effect=lambda battletag, gamemode='quickplay', platform='pc': payloads.get(battletag),
+        )
+        self.fetch = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        stats_cache.reset_stats_cache()
+        results.reset_result_cache()
+
+    def post(self, url, body):
+        return self.client.post(url, data=body, content_type='application/json')
+
+    def test_compare_players(self):
+        response = self.post('/api/compare/', {'player1': 'Alpha#1', 'player2': 'Beta#2', 'hero': 'ana'})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual([category['name'] for category in body['categories']], ['Assists', 'Combat', 'Game'])
+        self.assertIn('enhanced_analysis', body)
+        self.assertEqual(body['data_freshness'], {'player1': 'fresh', 'player2': 'fresh', 'stale': False})
+
+    def test_unchanged_comparison_is_served_by_etag(self):
+        body = {'player1': 'Alpha#1', 'player2': 'Beta#2', 'hero': 'ana'}
+        first = self.post('/api/compare/', body)
+        etag = first['ETag']
+        self.assertTrue(etag.startswith('"'))
+
+        with mock.patch('stats.views.enhanced_compare_hero_stats') as compare:
+            cached = self.post('/api/compare/', body)
+            not_modified = self.client.post(
+                '/api/compare/', data=body, content_type='application/json', HTTP_IF_NONE_MATCH=etag
+            )
+        compare.assert_not_called()
+        self.assertEqual(results.get_cached_result(etag), first.content)
+        self.assertEqual(cached.content, first.content)
+        self.assertEqual(cached['ETag'], etag)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b'')
+
+        other_hero = self.post('/api/compare/', {**body, 'hero': 'mercy'})
+        self.assertNotEqual(other_hero['ETag'], etag)
+        self.assertNotEqual(self.post('/api/summary/', body)['ETag'], etag)
+
+    def test_etag_follows_the_tags_as_typed(self):
+        body = {'player1': 'Alpha#1', 'player2': 'Beta#2', 'hero': 'ana'}
+        first = self.post('/api/compare/', body)
+        spelled_differently = self.post('/api/compare/', {**body, 'player1': 'Alpha-1'})
+        self.assertEqual(spelled_differently.status_code, 200)
+        self.assertEqual(spelled_differently.json()['player1'], 'Alpha-1')
+        self.assertNotEqual(spelled_differently['ETag'], first['ETag'])
+        self.assertEqual(self.fetch.call_count, 2)
+
+    def test_sparse_fieldsets_skip_unselected_work(self):
+        body = {
+            'player1': 'Alpha#1', 'player2': 'Beta#2', 'hero': 'ana',
+            'fields': 'categories.stats.difference', 'categories': ['combat'],
+        }
+        with mock.patch.object(overwatch_service, 'format_stat_value') as format_stat_value:
+            response = self.client.post(
+                '/api/compare/?stats=eliminations,deaths', data=body, content_type='application/json'
+            )
+        format_stat_value.assert_not_called()
+        result = response.json()
+        self.assertNotIn('enhanced_analysis', result)
+        self.assertEqual(result['categories'], [{'name': 'Combat', 'stats': [
+            {'key': 'deaths', 'difference': '+0'},
+            {'key': 'eliminations', 'difference': '+10'},
+        ]}])
+
+        full = self.post('/api/compare/', {'player1': 'Alpha#1', 'player2': 'Beta#2', 'hero': 'ana'})
+        self.assertNotEqual(full['ETag'], response['ETag'])
+        self.assertIn('enhanced_analysis', full.json())
+
+        scores = self.post('/api/summary/', {
+            'player1': 'Alpha#1', 'player2': 'Beta#2', 'hero': 'ana', 'fields': 'enhanced_analysis.performance_scores',
+        }).json()
+        self.assertEqual(list(scores['enhanced_analysis']), ['performance_scores'])
+        self.assertNotIn('quick_summary', scores)
+
+    def test_top_k_returns_largest_weighted_differences(self):
+        response = self.post('/api/compare/?top_k=3', {'player1': 'Alpha#1', 'player2': 'Beta#2', 'hero': 'ana'})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['top_k'], 3)
+        self.assertNotIn('categories', body)
+        self.assertNotIn('enhanced_analysis', body)
+        self.assertEqual(body['differences'], [{
+            'key': 'eliminations', 'label': 'Eliminations', 'player1_value': 20, 'player2_value': 10,
+            'difference': '+10', 'normalized_difference': 0.5, 'weight': 0.9, 'score': 0.45, 'advantage': 'player1',
+        }])
+
+        stats1 = make_payload(deaths=10, damage_dealt=4000, weapon_accuracy=70)
+        top = overwatch_service.top_hero_differences(stats1, make_payload(), 'ana', 'A', 'B', 2)
+        self.assertEqual(
+            [(row['key'], row['advantage']) for row in top['differences']],
+            [('damage_dealt', 'player2'), ('deaths', 'player2')],
+        )
+
+        for body in ({'top_k': 0}, {'top_k': 'many'}, {'top_k': 3, 'hero': 'all'}):
+            response = self.post('/api/compare/', {'player1': 'Alpha#1', 'player2': 'Beta#2', 'hero': 'ana', **body})
+            self.assertEqual(response.status_code, 400)
+
+    def test_cache_stats_require_staff_outside_debug(self):
+        self.assertEqual(self.client.get('/api/cache/stats/').status_code, 403)
+        with override_settings(DEBUG=True):
+            response = self.client.get('/api/cache/stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('circuit_breaker', response.json()['upstream'])
+
+    def test_summary(self):
+        with mock.patch.object(overwatch_service, 'format_stat_value') as format_stat_value:
+            response = self.post('/api/summary/', {'player1': 'Alpha#1', 'player2': 'Beta#2', 'hero': 'ana'})
+        self.assertEqual(response.status_code, 200)
+        format_stat_value.assert_not_called()
+        body = response.json()
+        self.assertNotIn('categories', body)
+        self.assertEqual(body['quick_summary']['total_categories'], 3)
+        self.assertEqual(body['quick_summary']['category_winners'], {'player1': 1, 'player2': 0})
+
+        full = self.post('/api/compare/', {'player1': 'Alpha#1', 'player2': 'Beta#2', 'hero': 'ana'}).json()
+        self.assertEqual(body['enhanced_analysis'], full['enhanced_analysis'])
+
+    def test_missing_fields_return_400(self):
+        response = self.post('/api/compare/', {'player1': 'Alpha#1'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_player_returns_404(self):
+        response = self.post('/api/compare/', {'player1': 'Alpha#1', 'player2': 'Nobody#3', 'hero': 'ana'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_batch_fetches_each_player_once(self):
+        response = self.post('/api/compare/batch/', {'jobs': [
+            {'player1': 'Alpha#1', 'player2': 'Beta#2', 'hero': 'ana'},
+            {'player1': 'Alpha#1', 'player2': 'Beta#2', 'hero': 'mercy'},
+            {'player1': 'Beta#2', 'player2': 'Nobody#3', 'hero': 'ana'},
+            {'player1': 'Alpha#1', 'player2': 'Beta#2', 'hero': 'nope'},
+        ]})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(self.fetch.call_count, 3)
+        self.assertEqual([result['status'] for result in body['results']], [200, 200, 404, 400])
+        self.assertEqual(body['results'][1]['result']['hero'], 'mercy')
+
+    def test_malformed_bodies_return_400(self):
+        self.assertEqual(self.post('/api/compare/batch/', [{'player1': 'Alpha#1'}]).status_code, 400)
+        self.assertEqual(self.post('/api/compare/', ['Alpha#1', 'Beta#2']).status_code, 400)
+        self.assertEqual(self.post('/api/compare/batch/', {'jobs': [{}], 'platform': 3}).status_code, 400)
+        self.assertEqual(
+            self.post('/api/compare/', {'player1': ['Alpha#1'], 'player2': 'Beta#2', 'hero': 'ana'}).status_code, 400
+        )
+        response = self.post('/api/compare/batch/', {'jobs': [{'player1': 7, 'player2': 'Beta#2', 'hero': 'ana'}]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['status'], 400)
+
+    @override_settings(OVERFAST_BATCH_MAX_JOBS=1)
+    def test_batch_rejects_too_many_jobs(self):
+        job = {'player1': 'Alpha#1', 'player2': 'Beta#2', 'hero': 'ana'}
+        response = self.post('/api/compare/batch/', {'jobs': [job, job]})
+        self.assertEqual(response.status_code, 400)
+
+    def test_all_heroes_overview(self):
+        response = self.post('/api/compare/', {'player1': 'Alpha#1', 'player2': 'Beta#2', 'hero': 'all'})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual([hero['hero'] for hero in body['heroes']], ['ana', 'mercy'])
+        self.assertEqual(body['heroes'][0]['hero_role'], 'support')
+        self.assertNotIn('details', body)
+        self.assertEqual(self.fetch.call_count, 2)
+
+    def test_all_heroes_drill_down(self):
+        response = self.post('/api/compare/', {
+            'player1': 'Alpha#1', 'player2': 'Beta#2', 'hero': 'all', 'detail': ['mercy'],
+        })
+        body = response.json()
+        self.assertEqual(list(body['details']), ['mercy'])
+        self.assertIn('categories', body['details']['mercy'])
+
+    def test_all_heroes_fields_apply_to_overview_and_details(self):
+        response = self.post('/api/compare/', {
+            'player1': 'Alpha#1', 'player2': 'Beta#2', 'hero': 'all', 'detail': ['mercy'],
+            'fields': 'heroes.performance_scores,details.enhanced_analysis',
+        })
+        body = response.json()
+        self.assertEqual(set(body['heroes'][0]), {'hero', 'performance_scores'})
+        self.assertNotIn('summary', body)
+        self.assertIn('enhanced_analysis', body['details']['mercy'])
+        self.assertNotIn('categories', body['details']['mercy'])
+
+    def test_all_heroes_not_accepted_by_summary(self):
+        response = self.post('/api/summary/', {'player1': 'Alpha#1', 'player2': 'Beta#2', 'hero': 'all'})
+        self.assertEqual(response.status_code, 400)
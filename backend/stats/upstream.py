@@ -0,0 +1,260 @@
+"""
+Shared HTTP client for the OverFast API.
+
+Every upstream call goes through a single pooled, keep-alive session per worker
+process so TCP/TLS connections are reused across requests. Pool size, timeouts
+and the retry policy are read from Django settings. Retries happen in ``get()``
+rather than in the connection pool, so each attempt is rate limited and
+reported to the circuit breaker like a first call.
+
+Calls are also gated by a per-process token bucket, paused when OverFast
+answers 429 (or a 5xx with ``Retry-After``) for as long as it asks, and by a circuit breaker
+that fails fast with UpstreamUnavailable once OverFast keeps failing, so
+callers fall back to cached data instead of tying up worker threads.
+"""
+
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .resilience import CircuitBreaker, TokenBucket, UpstreamUnavailable
+
+DEFAULT_BASE_URL = 'https://overfast-api.tekrop.fr'
+RETRY_STATUSES = (500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+_rate_limiter = None
+_circuit_breaker = None
+_guards_lock = threading.Lock()
+
+
+def get_setting(name, default):
+    """Return an OverFast client setting, falling back to the given default."""
+    return getattr(settings, name, default)
+
+
+def build_retry():
+    """Build the connection pool's retry policy: none at all, since ``get()`` retries above the guards."""
+    return Retry(total=0, read=False, raise_on_status=False, respect_retry_after_header=False)
+
+
+def backoff_delay(attempt):
+    """Return the jittered delay before retry number ``attempt`` (starting at 0)."""
+    backoff = get_setting('OVERFAST_RETRY_BACKOFF', 0.3) * (2 ** attempt)
+    return backoff + random.uniform(0, get_setting('OVERFAST_RETRY_JITTER', 0.3))
+
+
+def build_session():
+    """Create a new pooled session configured from settings."""
+    session = requests.Session()
+    pool_size = get_setting('OVERFAST_POOL_SIZE', 10)
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        pool_block=get_setting('OVERFAST_POOL_BLOCK', False),
+        max_retries=build_retry(),
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({
+        'Accept': 'application/json',
+        'Connection': 'keep-alive',
+    })
+    return session
+
+
+def get_session():
+    """Return this worker's shared session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session()
+    return _session
+
+
+def reset_session():
+    """Drop the shared session so the next call builds a fresh pool."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def get_rate_limiter():
+    """Return this worker's token bucket for OverFast calls."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _guards_lock:
+            if _rate_limiter is None:
+                _rate_limiter = TokenBucket(
+                    rate=get_setting('OVERFAST_RATE_LIMIT', 10),
+                    capacity=get_setting('OVERFAST_RATE_LIMIT_BURST', 20),
+                )
+    return _rate_limiter
+
+
+def get_circuit_breaker():
+    """Return this worker's circuit breaker for OverFast calls."""
+    global _circuit_breaker
+    if _circuit_breaker is None:
+        with _guards_lock:
+            if _circuit_breaker is None:
+                _circuit_breaker = CircuitBreaker(
+                    failure_threshold=get_setting('OVERFAST_BREAKER_FAILURE_THRESHOLD', 5),
+                    recovery_timeout=get_setting('OVERFAST_BREAKER_RECOVERY_TIMEOUT', 30),
+                )
+    return _circuit_breaker
+
+
+def reset_guards():
+    """Drop the rate limiter and circuit breaker so the next call rebuilds them from settings."""
+    global _rate_limiter, _circuit_breaker
+    with _guards_lock:
+        _rate_limiter = None
+        _circuit_breaker = None
+
+
+def guard_stats():
+    """Counters and current state of the rate limiter and circuit breaker."""
+    return {
+        "rate_limiter": get_rate_limiter().stats(),
+        "circuit_breaker": get_circuit_breaker().stats(),
+    }
+
+
+def _forget_session_after_fork():
+    # Connections inherited from a preloaded parent must not be shared, and
+    # locks held by other threads at fork time would never be released.
+    global _session, _session_lock, _rate_limiter, _circuit_breaker, _guards_lock
+    _session = None
+    _session_lock = threading.Lock()
+    _rate_limiter = None
+    _circuit_breaker = None
+    _guards_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_session_after_fork)
+
+
+def build_url(path):
+    """Join an API path onto the configured OverFast base URL."""
+    base_url = get_setting('OVERFAST_BASE_URL', DEFAULT_BASE_URL).rstrip('/')
+    return f"{base_url}/{path.lstrip('/')}"
+
+
+def retry_after_seconds(response):
+    """Seconds to back off after a 429, from Retry-After (delta or HTTP date) or the configured default."""
+    value = response.headers.get('Retry-After')
+    if value:
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            try:
+                return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+            except (TypeError, ValueError):
+                pass
+    return get_setting('OVERFAST_RATE_LIMIT_DEFAULT_RETRY_AFTER', 5)
+
+
+def ensure_available():
+    """Raise UpstreamUnavailable while the breaker is open, before waiting for a rate-limit token."""
+    if not get_circuit_breaker().available():
+        raise UpstreamUnavailable("OverFast circuit breaker is open")
+
+
+def start_call():
+    """Claim the breaker for a call about to go out (the single trial call when half-open)."""
+    if not get_circuit_breaker().allow():
+        raise UpstreamUnavailable("OverFast circuit breaker is open")
+
+
+def asks_to_wait(response):
+    """True for responses that tell us to back off: any 429, or a 5xx carrying Retry-After."""
+    return response.status_code == 429 or (response.status_code >= 500 and 'Retry-After' in response.headers)
+
+
+def should_retry(response, attempt, retries):
+    """Whether ``get()`` should retry after ``response`` on the given attempt.
+
+    429 is never retried. A 5xx carrying Retry-After has already paused the
+    limiter, so it is only retried when that pause fits in
+    OVERFAST_RATE_LIMIT_MAX_WAIT; otherwise the response is returned as is.
+    """
+    if response.status_code not in RETRY_STATUSES or attempt == retries:
+        return False
+    if asks_to_wait(response):
+        return retry_after_seconds(response) <= get_setting('OVERFAST_RATE_LIMIT_MAX_WAIT', 2)
+    return True
+
+
+def retry_delay(response, attempt):
+    """Seconds to sleep before the next attempt; none when the paused limiter does the waiting."""
+    if response is not None and asks_to_wait(response):
+        return 0.0
+    return backoff_delay(attempt)
+
+
+def record_response(response):
+    """Feed a response into the breaker and pause the limiter for Retry-After on 429 and 5xx."""
+    if asks_to_wait(response):
+        get_rate_limiter().pause(retry_after_seconds(response))
+    if response.status_code >= 500:
+        get_circuit_breaker().record_failure()
+    else:
+        # 4xx (including 429) means OverFast is up and answering
+        get_circuit_breaker().record_success()
+
+
+def get(path, params=None, timeout=None):
+    """Issue a GET request against the OverFast API through the shared session.
+
+    5xx responses and connection errors are retried up to OVERFAST_MAX_RETRIES
+    times with jittered backoff, or after the Retry-After pause when the 5xx
+    carries one (see ``should_retry``). Each attempt takes its own rate-limit token and
+    reports to the breaker, and UpstreamUnavailable is raised without calling
+    OverFast when the breaker is open or no token frees up within
+    OVERFAST_RATE_LIMIT_MAX_WAIT.
+    """
+    if timeout is None:
+        timeout = (
+            get_setting('OVERFAST_CONNECT_TIMEOUT', 5),
+            get_setting('OVERFAST_READ_TIMEOUT', 30),
+        )
+    retries = get_setting('OVERFAST_MAX_RETRIES', 2)
+    for attempt in range(retries + 1):
+        response = None
+        try:
+            response = _guarded_get(path, params, timeout)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == retries:
+                raise
+        else:
+            if not should_retry(response, attempt, retries):
+                return response
+        time.sleep(retry_delay(response, attempt))
+
+
+def _guarded_get(path, params, timeout):
+    """One attempt: wait for the breaker and a token, call OverFast and record the outcome."""
+    ensure_available()
+    if not get_rate_limiter().acquire(get_setting('OVERFAST_RATE_LIMIT_MAX_WAIT', 2)):
+        raise UpstreamUnavailable("OverFast rate limit reached")
+    start_call()
+    try:
+        response = get_session().get(build_url(path), params=params, timeout=timeout)
+    except Exception:
+        get_circuit_breaker().record_failure()
+        raise
+    record_response(response)
+    return response
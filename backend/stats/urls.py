@@ -1,8 +1,15 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     path('heroes/', views.get_heroes, name='get_heroes'),
     path('compare/', views.compare_players, name='compare_players'),
+    path('compare/batch/', views.compare_players_batch, name='compare_players_batch'),
+    path('cache/stats/', views.get_cache_stats, name='get_cache_stats'),
     path('summary/', views.get_enhanced_summary, name='get_enhanced_summary'),
+    # Native async variants for the ASGI entry point
+    path('async/heroes/', async_views.get_heroes, name='async_get_heroes'),
+    path('async/compare/', async_views.compare_players, name='async_compare_players'),
+    path('async/compare/batch/', async_views.compare_players_batch, name='async_compare_players_batch'),
+    path('async/summary/', async_views.get_enhanced_summary, name='async_get_enhanced_summary'),
 ]
@@ -1,103 +1,323 @@
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import BasePermission
 from rest_framework.response import Response
 from rest_framework import status
-from django.http import HttpResponse, Http404
-from django.template.loader import get_template
-from django.template import TemplateDoesNotExist
+from django.http import HttpResponse, HttpResponseNotModified
 from django.conf import settings
-import os
-from .overwatch_service import get_player_stats, compare_hero_stats, enhanced_compare_hero_stats, Hero
-import json
+from .cache import get_stats_cache
+from .fieldsets import FieldSelection
+from .overwatch_service import lookup_many_player_stats, compare_hero_stats, enhanced_compare_hero_stats, summarize_hero_comparison, top_hero_differences, compare_all_heroes, Hero, ALL_HEROES
+from .renderers import json_response
+from .spa import get_spa_shell
+from .upstream import guard_stats
+from .results import comparison_etag, etag_matches, get_cached_result, get_result_cache, store_result
 
 def favicon_view(request):
     """Return a 204 No Content for missing favicon and Apple touch icons."""
     return HttpResponse(status=204)
 
 def react_app_view(request):
-    """Serve the React app with proper MIME types and headers."""
-    try:
-        # Try to get the template
-        template = get_template('index.html')
-        response = HttpResponse(template.render(request=request))
-        response['Content-Type'] = 'text/html; charset=utf-8'
-        response['X-Content-Type-Options'] = 'nosniff'
-        # Add permissive CSP for now to allow React to load
-        response['Content-Security-Policy'] = "default-src 'self' 'unsafe-inline' 'unsafe-eval'; script-src 'self' 'unsafe-inline' 'unsafe-eval'; style-src 'self' 'unsafe-inline';"
-        return response
-    except TemplateDoesNotExist:
-        # Fallback: try to serve the file directly
-        possible_paths = [
-            os.path.join(settings.BASE_DIR, 'frontend/build/index.html'),
-            os.path.join(settings.BASE_DIR, '../frontend/build/index.html'),
-        ]
-        
-        for path in possible_paths:
-            if os.path.exists(path):
-                with open(path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                response = HttpResponse(content, content_type='text/html; charset=utf-8')
-                response['X-Content-Type-Options'] = 'nosniff'
-                response['Content-Security-Policy'] = "default-src 'self' 'unsafe-inline' 'unsafe-eval'; script-src 'self' 'unsafe-inline' 'unsafe-eval'; style-src 'self' 'unsafe-inline';"
-                return response
-        
+    """Serve the React app shell from memory, honoring If-None-Match and Accept-Encoding."""
+    shell = get_spa_shell()
+    if shell is None:
         return HttpResponse("React app not found", status=404)
+    if etag_matches(request, shell.etag):
+        response = HttpResponseNotModified()
+        response['ETag'] = shell.etag
+        return response
+    body, headers = shell.variant(request.headers.get('Accept-Encoding'))
+    return HttpResponse(body, headers=headers)
+
+def get_hero_choices():
+    """Return the hero options exposed by the heroes endpoint."""
+    return [{"value": hero.value, "label": hero.value.replace('-', ' ').title()} for hero in Hero]
+
+def parse_comparison_request(data, allow_all_heroes=False):
+    """Validate a comparison request body.
+
+    Returns ``((player1, player2, hero, gamemode, platform), None)`` on success or
+    ``(None, error_message)`` when the request is invalid. With
+    ``allow_all_heroes``, ``hero`` may also be ``"all"``.
+    """
+    if not isinstance(data, dict):
+        return None, "Request body must be a JSON object"
+    player1_tag = data.get('player1')
+    player2_tag = data.get('player2')
+    hero_name = data.get('hero')
+    gamemode = data.get('gamemode', 'quickplay')
+    platform = data.get('platform', 'pc')
+
+    if not all([player1_tag, player2_tag, hero_name]):
+        return None, "Missing required fields: player1, player2, hero"
+    if not all(isinstance(value, str) for value in (player1_tag, player2_tag, hero_name, gamemode, platform)):
+        return None, "Fields player1, player2, hero, gamemode and platform must be strings"
+
+    # Validate hero
+    valid_heroes = [hero.value for hero in Hero]
+    if allow_all_heroes:
+        valid_heroes.append(ALL_HEROES)
+    if hero_name not in valid_heroes:
+        return None, f"Invalid hero: {hero_name}"
+
+    return (player1_tag, player2_tag, hero_name, gamemode, platform), None
+
+def parse_detail_heroes(detail):
+    """Interpret the ``detail`` option of an all-heroes comparison.
+
+    Accepts ``true`` for every hero, a list of hero names, or a comma-separated string.
+    """
+    if detail is True or (isinstance(detail, str) and detail.lower() in ('true', 'all')):
+        return True
+    if isinstance(detail, str):
+        return [hero.strip() for hero in detail.split(',') if hero.strip()]
+    if isinstance(detail, list):
+        return [hero for hero in detail if isinstance(hero, str)]
+    return ()
+
+def parse_top_k(value):
+    """Validate the ``top_k`` option: ``(None, None)`` when absent, ``(k, None)`` or ``(None, error_message)``."""
+    if value in (None, ''):
+        return None, None
+    max_top_k = getattr(settings, 'OVERFAST_TOP_K_MAX', 50)
+    try:
+        top_k = int(value)
+    except (TypeError, ValueError):
+        top_k = 0
+    if isinstance(value, bool) or not 1 <= top_k <= max_top_k:
+        return None, f"Invalid top_k: {value} (expected an integer from 1 to {max_top_k})"
+    return top_k, None
+
+def data_freshness(lookups, player1_tag, player2_tag):
+    """Describe whether each player's stats were fresh or served stale from cache."""
+    return {
+        "player1": lookups[player1_tag].freshness,
+        "player2": lookups[player2_tag].freshness,
+        "stale": any(lookups[tag].freshness == 'stale' for tag in (player1_tag, player2_tag)),
+    }
+
+def tag_response(response, etag):
+    """Mark a comparison response (DRF or plain Django) with its ETag and ask clients to revalidate."""
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+def cached_comparison(request, etag):
+    """Return a 304 or a cached result response for the ETag, or None if it must be computed."""
+    if etag_matches(request, etag):
+        return tag_response(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+    cached = get_cached_result(etag)
+    if cached is not None:
+        return tag_response(json_response(cached), etag)
+    return None
+
+class ComparisonPlan:
+    """A validated comparison request, shared by the sync and async views.
+
+    Views fetch ``battletags`` their own way and hand the lookups to
+    ``missing_player``, ``etag`` and ``run``, which never touch the request.
+    """
+
+    def __init__(self, view, params, selection, top_k=None, detail_heroes=()):
+        self.view = view
+        self.player1_tag, self.player2_tag, self.hero_name, self.gamemode, self.platform = params
+        self.selection = selection
+        self.top_k = top_k
+        self.detail_heroes = detail_heroes
+
+    @property
+    def battletags(self):
+        return [self.player1_tag, self.player2_tag]
+
+    def missing_player(self, lookups):
+        """Return the error for a player whose stats could not be fetched, or None."""
+        for tag in self.battletags:
+            if not lookups[tag].parsed:
+                return f"Unable to fetch stats for player: {tag}"
+        return None
+
+    def etag(self, lookups):
+        return comparison_etag(
+            self.view, lookups, self.player1_tag, self.player2_tag, self.hero_name, self.gamemode, self.platform,
+            detail=self.detail_heroes, selection=self.selection.cache_key(), top_k=self.top_k
+        )
+
+    def run(self, lookups):
+        """Build the comparison (with its data freshness), or an ``{"error"}`` dict for a 404."""
+        player1_stats = lookups[self.player1_tag].parsed
+        player2_stats = lookups[self.player2_tag].parsed
+        args = (player1_stats, player2_stats, self.hero_name, self.player1_tag, self.player2_tag)
+        if self.view == 'summary':
+            # Only the enhanced analysis and category wins are computed, no per-stat detail
+            result = summarize_hero_comparison(*args, self.gamemode, self.platform, self.selection)
+        elif self.hero_name == ALL_HEROES:
+            result = compare_all_heroes(
+                player1_stats, player2_stats, self.player1_tag, self.player2_tag,
+                detail_heroes=self.detail_heroes,
+                gamemode=self.gamemode, platform=self.platform, selection=self.selection
+            )
+        elif self.top_k:
+            # Only the largest weighted differences, no categories or analysis
+            result = top_hero_differences(*args, self.top_k, self.gamemode, self.platform, self.selection)
+        else:
+            # Compare stats with enhanced analysis
+            result = enhanced_compare_hero_stats(*args, self.gamemode, self.platform, self.selection)
+        if "error" not in result:
+            result["data_freshness"] = data_freshness(lookups, self.player1_tag, self.player2_tag)
+        return result
+
+def plan_comparison(data, query_params):
+    """Validate a compare request; returns ``(ComparisonPlan, None)`` or ``(None, error_message)``."""
+    params, error = parse_comparison_request(data, allow_all_heroes=True)
+    if error:
+        return None, error
+    hero_name = params[2]
+    top_k, error = parse_top_k(data.get('top_k', query_params.get('top_k')))
+    if not error and top_k and hero_name == ALL_HEROES:
+        error = "top_k requires a single hero"
+    if error:
+        return None, error
+    detail_heroes = parse_detail_heroes(data.get('detail')) if hero_name == ALL_HEROES else ()
+    return ComparisonPlan(
+        'compare', params, FieldSelection.from_request(query_params, data), top_k, detail_heroes
+    ), None
+
+def plan_summary(data, query_params):
+    """Validate a summary request like plan_comparison; ``hero`` must be a single hero."""
+    params, error = parse_comparison_request(data)
+    if error:
+        return None, error
+    return ComparisonPlan('summary', params, FieldSelection.from_request(query_params, data)), None
+
+class BatchPlan:
+    """Validated batch jobs, shared by the sync and async batch views."""
+
+    def __init__(self, parsed_jobs, gamemode, platform, selection):
+        self.parsed_jobs = parsed_jobs
+        self.gamemode = gamemode
+        self.platform = platform
+        self.selection = selection
+
+    @property
+    def battletags(self):
+        return [tag for params, error in self.parsed_jobs if not error for tag in params[:2]]
+
+    def run(self, lookups):
+        """Compare every job against the fetched lookups and build the batch response body."""
+        results = []
+        for index, (params, error) in enumerate(self.parsed_jobs):
+            if error:
+                results.append({"index": index, "status": status.HTTP_400_BAD_REQUEST, "error": error})
+                continue
+            player1_tag, player2_tag, hero_name = params[:3]
+            missing = [tag for tag in (player1_tag, player2_tag) if not lookups[tag].stats]
+            if missing:
+                results.append({
+                    "index": index,
+                    "status": status.HTTP_404_NOT_FOUND,
+                    "error": f"Unable to fetch stats for player: {missing[0]}",
+                })
+                continue
+
+            comparison_result = enhanced_compare_hero_stats(
+                lookups[player1_tag].parsed, lookups[player2_tag].parsed, hero_name, player1_tag, player2_tag,
+                self.gamemode, self.platform, self.selection
+            )
+            if "error" in comparison_result:
+                results.append({"index": index, "status": status.HTTP_404_NOT_FOUND, "error": comparison_result["error"]})
+                continue
+            comparison_result["data_freshness"] = data_freshness(lookups, player1_tag, player2_tag)
+            results.append({"index": index, "status": status.HTTP_200_OK, "result": comparison_result})
+
+        return {
+            "gamemode": self.gamemode,
+            "platform": self.platform,
+            "players_fetched": len(lookups),
+            "results": results,
+        }
+
+def plan_batch(data, query_params):
+    """Validate a batch request; returns ``(BatchPlan, None)`` or ``(None, error_message)``.
+
+    Malformed jobs do not fail the batch, they get a 400 entry in the results.
+    """
+    if not isinstance(data, dict):
+        return None, "Request body must be a JSON object"
+    jobs = data.get('jobs')
+    gamemode = data.get('gamemode', 'quickplay')
+    platform = data.get('platform', 'pc')
+    max_jobs = getattr(settings, 'OVERFAST_BATCH_MAX_JOBS', 50)
+
+    if not isinstance(jobs, list) or not jobs:
+        return None, "Missing required field: jobs (a non-empty list)"
+    if not isinstance(gamemode, str) or not isinstance(platform, str):
+        return None, "Fields gamemode and platform must be strings"
+    if len(jobs) > max_jobs:
+        return None, f"Too many jobs: {len(jobs)} (maximum is {max_jobs})"
+
+    # Validate every job before fetching anything
+    parsed_jobs = []
+    for job in jobs:
+        if not isinstance(job, dict):
+            parsed_jobs.append((None, "Each job must be an object"))
+            continue
+        parsed_jobs.append(parse_comparison_request({**job, 'gamemode': gamemode, 'platform': platform}))
+    return BatchPlan(parsed_jobs, gamemode, platform, FieldSelection.from_request(query_params, data)), None
 
 @api_view(['GET'])
 def get_heroes(request):
     """Return list of all available heroes."""
-    heroes = [{"value": hero.value, "label": hero.value.replace('-', ' ').title()} for hero in Hero]
-    return Response(heroes)
+    return Response(get_hero_choices())
+
+class IsAdminOrDebug(BasePermission):
+    """Allow staff users, or anyone while DEBUG is on."""
+
+    def has_permission(self, request, view):
+        return settings.DEBUG or bool(request.user and request.user.is_staff)
+
+@api_view(['GET'])
+@permission_classes([IsAdminOrDebug])
+def get_cache_stats(request):
+    """Return hit/miss counters for the caches, plus the OverFast rate limiter and circuit breaker state.
+
+    Internal state, so only staff users (or anyone in DEBUG) may read it.
+    """
+    cache_stats = get_stats_cache().stats()
+    cache_stats["result_cache"] = get_result_cache().stats()
+    cache_stats["upstream"] = guard_stats()
+    return Response(cache_stats)
 
 @api_view(['POST'])
 def compare_players(request):
-    """Compare two players' stats for a specific hero."""
+    """Compare two players' stats for a specific hero, or for every hero with hero="all"."""
+    return run_comparison(request, plan_comparison)
+
+@api_view(['POST'])
+def get_enhanced_summary(request):
+    """Get only the enhanced analysis summary without detailed stat breakdown."""
+    return run_comparison(request, plan_summary)
+
+def run_comparison(request, planner):
+    """Plan a comparison with ``planner``, fetch its players and answer with its (possibly cached) result."""
     try:
-        data = request.data
-        player1_tag = data.get('player1')
-        player2_tag = data.get('player2')
-        hero_name = data.get('hero')
-        gamemode = data.get('gamemode', 'quickplay')
-        platform = data.get('platform', 'pc')
+        plan, error = planner(request.data, request.query_params)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
         
-        if not all([player1_tag, player2_tag, hero_name]):
-            return Response(
-                {"error": "Missing required fields: player1, player2, hero"}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        # Fetch stats for both players concurrently
+        lookups = lookup_many_player_stats(plan.battletags, plan.gamemode, plan.platform)
+        error = plan.missing_player(lookups)
+        if error:
+            return Response({"error": error}, status=status.HTTP_404_NOT_FOUND)
         
-        # Validate hero
-        valid_heroes = [hero.value for hero in Hero]
-        if hero_name not in valid_heroes:
-            return Response(
-                {"error": f"Invalid hero: {hero_name}"}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Fetch stats for both players
-        player1_stats = get_player_stats(player1_tag, gamemode, platform)
-        player2_stats = get_player_stats(player2_tag, gamemode, platform)
-        
-        if not player1_stats:
-            return Response(
-                {"error": f"Unable to fetch stats for player: {player1_tag}"}, 
-                status=status.HTTP_404_NOT_FOUND
-            )
-        
-        if not player2_stats:
-            return Response(
-                {"error": f"Unable to fetch stats for player: {player2_tag}"}, 
-                status=status.HTTP_404_NOT_FOUND
-            )
-        
-        # Compare stats with enhanced analysis
-        comparison_result = enhanced_compare_hero_stats(
-            player1_stats, player2_stats, hero_name, player1_tag, player2_tag
-        )
+        etag = plan.etag(lookups)
+        response = cached_comparison(request, etag)
+        if response is not None:
+            return response
         
+        comparison_result = plan.run(lookups)
         if "error" in comparison_result:
             return Response(comparison_result, status=status.HTTP_404_NOT_FOUND)
-        
-        return Response(comparison_result)
+        return tag_response(json_response(store_result(etag, comparison_result)), etag)
         
     except Exception as e:
         return Response(
@@ -106,69 +326,20 @@ def compare_players(request):
         )
 
 @api_view(['POST'])
-def get_enhanced_summary(request):
-    """Get only the enhanced analysis summary without detailed stat breakdown."""
+def compare_players_batch(request):
+    """Compare many (player1, player2, hero) jobs, fetching each distinct player once."""
     try:
-        data = request.data
-        player1_tag = data.get('player1')
-        player2_tag = data.get('player2')
-        hero_name = data.get('hero')
-        gamemode = data.get('gamemode', 'quickplay')
-        platform = data.get('platform', 'pc')
-        
-        if not all([player1_tag, player2_tag, hero_name]):
-            return Response(
-                {"error": "Missing required fields: player1, player2, hero"}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Validate hero
-        valid_heroes = [hero.value for hero in Hero]
-        if hero_name not in valid_heroes:
-            return Response(
-                {"error": f"Invalid hero: {hero_name}"}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Fetch stats for both players
-        player1_stats = get_player_stats(player1_tag, gamemode, platform)
-        player2_stats = get_player_stats(player2_tag, gamemode, platform)
-        
-        if not player1_stats or not player2_stats:
-            return Response(
-                {"error": "Unable to fetch stats for one or both players"}, 
-                status=status.HTTP_404_NOT_FOUND
-            )
-        
-        # Get enhanced comparison
-        comparison_result = enhanced_compare_hero_stats(
-            player1_stats, player2_stats, hero_name, player1_tag, player2_tag
-        )
-        
-        if "error" in comparison_result:
-            return Response(comparison_result, status=status.HTTP_404_NOT_FOUND)
-        
-        # Return only the enhanced analysis part
-        summary_only = {
-            "hero": comparison_result["hero"],
-            "player1": comparison_result["player1"],
-            "player2": comparison_result["player2"],
-            "enhanced_analysis": comparison_result.get("enhanced_analysis", {}),
-            "quick_summary": {
-                "total_categories": len(comparison_result.get("categories", [])),
-                "category_winners": {
-                    "player1": sum(1 for cat in comparison_result.get("categories", []) 
-                                 if cat.get("summary", {}).get("player1_wins", 0) > cat.get("summary", {}).get("player2_wins", 0)),
-                    "player2": sum(1 for cat in comparison_result.get("categories", []) 
-                                 if cat.get("summary", {}).get("player2_wins", 0) > cat.get("summary", {}).get("player1_wins", 0))
-                }
-            }
-        }
-        
-        return Response(summary_only)
-        
+        plan, error = plan_batch(request.data, request.query_params)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Fetch every distinct player once, in parallel
+        battletags = plan.battletags
+        lookups = lookup_many_player_stats(battletags, plan.gamemode, plan.platform) if battletags else {}
+        return Response(plan.run(lookups))
+
     except Exception as e:
         return Response(
-            {"error": f"Internal server error: {str(e)}"}, 
+            {"error": f"Internal server error: {str(e)}"},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
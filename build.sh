@@ -16,6 +16,8 @@ pip install -r backend/requirements.txt
 echo "🔧 Making startup script executable..."
 chmod +x start.sh
 
-# Note: collectstatic will be run by Django when needed in production
+# Collect hashed, precompressed static files now so container boots can skip it
+echo "📁 Collecting static files..."
+(cd backend && DEBUG=False python manage.py prestart --skip-migrate)
 
 echo "✅ Build complete!"
@@ -9,6 +9,12 @@ import sys
 import os
 from pathlib import Path
 
+def server_command(python_cmd):
+    """Gunicorn with the production config; it does not run on Windows, so fall back to runserver there."""
+    if sys.platform == "win32":
+        return [python_cmd, "manage.py", "runserver"]
+    return [python_cmd, "-m", "gunicorn", "-c", "gunicorn.conf.py"]
+
 def main():
     base_dir = Path(__file__).parent
     frontend_dir = base_dir / "frontend"
@@ -47,17 +53,12 @@ def main():
         print(f"❌ pip install failed: {result.stderr}")
         sys.exit(1)
     
-    # Run migrations
-    result = subprocess.run([python_cmd, "manage.py", "migrate"], 
-                          capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"⚠️  Migration warning: {result.stderr}")
-    
-    # Collect static files
-    result = subprocess.run([python_cmd, "manage.py", "collectstatic", "--noinput"], 
-                          capture_output=True, text=True)
+    # Apply migrations and collect static files in one Django process, skipping unchanged steps
+    result = subprocess.run([python_cmd, "manage.py", "prestart"], capture_output=True, text=True)
     if result.returncode != 0:
-        print(f"⚠️  Static files warning: {result.stderr}")
+        print(f"⚠️  Pre-start warning: {result.stderr}")
+    else:
+        print(result.stdout.rstrip())
     
     print("✅ Django backend configured!")
     
@@ -73,13 +74,13 @@ def main():
         print("\n🌐 Starting server on http://localhost:8000")
         print("Press Ctrl+C to stop")
         try:
-            subprocess.run([python_cmd, "manage.py", "runserver"])
+            subprocess.run(server_command(python_cmd))
         except KeyboardInterrupt:
             print("\n👋 Server stopped!")
     else:
         print("\n📝 To start the server later, run:")
         print(f"   cd {backend_dir}")
-        print("   python manage.py runserver")
+        print(f"   {' '.join(server_command(python_cmd))}")
         print("\n🌐 Your app will be available at: http://localhost:8000")
 
 if __name__ == "__main__":
@@ -207,6 +207,11 @@ function ComparePage() {
           <div className="alert alert-success">
             <strong>{comparison.hero.toUpperCase()} Comparison:</strong> {comparison.player1} vs {comparison.player2}
           </div>
+          {comparison.data_freshness && comparison.data_freshness.stale && (
+            <div className="alert alert-warning">
+              Some stats are from a cached copy and may be slightly out of date while they refresh.
+            </div>
+          )}
           {/* Enhanced Analysis Summary */}
           {comparison.enhanced_analysis && (
             <div className="result-card">
@@ -8,12 +8,28 @@ export async function fetchHeroes() {
   return response.json();
 }
 
+// Last comparison result and ETag per request body, revalidated with If-None-Match
+const comparisonCache = new Map();
+const COMPARISON_CACHE_SIZE = 20;
+
 export async function comparePlayers(formData) {
-  const response = await fetch(`${API_BASE_URL}/compare/`, {
-    method: 'POST',
-    headers: { 'Content-Type': 'application/json' },
-    body: JSON.stringify(formData)
-  });
+  const body = JSON.stringify(formData);
+  const cached = comparisonCache.get(body);
+  const headers = { 'Content-Type': 'application/json' };
+  if (cached) headers['If-None-Match'] = cached.etag;
+
+  const response = await fetch(`${API_BASE_URL}/compare/`, { method: 'POST', headers, body });
+  if (response.status === 304 && cached) return cached.data;
   if (!response.ok) throw new Error('Failed to compare players');
-  return response.json();
+  const data = await response.json();
+
+  const etag = response.headers.get('ETag');
+  comparisonCache.delete(body);
+  if (etag) {
+    comparisonCache.set(body, { etag, data });
+    if (comparisonCache.size > COMPARISON_CACHE_SIZE) {
+      comparisonCache.delete(comparisonCache.keys().next().value);
+    }
+  }
+  return data;
 }
@@ -3,7 +3,6 @@
 Railway startup script that properly handles the PORT environment variable
 """
 import os
-import subprocess
 import sys
 
 def main():
@@ -21,25 +20,14 @@ def main():
     # Get port from environment variable, default to 8000
     port = os.environ.get('PORT', '8000')
     
-    # Run migrations
-    print("📋 Running migrations...")
-    result = subprocess.run([sys.executable, 'manage.py', 'migrate', '--noinput'], capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"❌ Migration failed: {result.stderr}")
-    else:
-        print("✅ Migrations completed successfully")
+    # Migrations and collectstatic run inside gunicorn's master before the app loads, skipping
+    # unchanged steps (collectstatic normally already ran at build time)
     
-    # Collect static files
-    print("📁 Collecting static files...")
-    result = subprocess.run([sys.executable, 'manage.py', 'collectstatic', '--noinput'], capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"❌ Static collection failed: {result.stderr}")
-    else:
-        print("✅ Static files collected successfully")
-    
-    # Start server
-    print(f"🌐 Starting server on 0.0.0.0:{port}")
-    subprocess.run([sys.executable, 'manage.py', 'runserver', f'0.0.0.0:{port}'])
+    # Start server: gunicorn replaces this process so it receives Railway's signals directly
+    interface = os.environ.get('SERVER_INTERFACE', 'wsgi')
+    print(f"🌐 Starting gunicorn ({interface}) on 0.0.0.0:{port}")
+    sys.stdout.flush()
+    os.execv(sys.executable, [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py'])
 
 if __name__ == '__main__':
     main()
@@ -9,15 +9,10 @@ if [ -d "backend" ]; then
     cd backend
 fi
 
-# Run migrations
-echo "📋 Running Django migrations..."
-python3 manage.py migrate --noinput
+# Migrations and collectstatic run inside gunicorn's master before the app loads,
+# skipping unchanged steps (see stats/startup.py)
 
-# Collect static files
-echo "📁 Collecting static files..."
-python3 manage.py collectstatic --noinput
-
-# Start the server
-PORT=${PORT:-8000}
-echo "🌐 Starting Django server on port $PORT"
-python3 manage.py runserver "0.0.0.0:$PORT"
+# Start the server (gunicorn.conf.py reads PORT, WEB_CONCURRENCY, SERVER_INTERFACE, ...)
+export PORT=${PORT:-8000}
+echo "🌐 Starting gunicorn (${SERVER_INTERFACE:-wsgi}) on port $PORT"
+exec python3 -m gunicorn -c gunicorn.conf.py